@@ -41,6 +41,8 @@ INSTALLED_APPS = [
 
 # === Middleware ===
 MIDDLEWARE = [
+    # primero: mide el request completo (consultas, tiempos; ver productos/metrics.py)
+    "productos.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -96,10 +98,135 @@ else:
         }
     }
 
-    
+
+_db_options = {}
 _pg_search_path = env("DB_PG_SEARCH_PATH", default="")
 if _pg_search_path:
-    DATABASES["default"]["OPTIONS"] = {"options": f"-c search_path={_pg_search_path}"}
+    _db_options["options"] = f"-c search_path={_pg_search_path}"
+
+# --- Manejo de conexiones ---
+# DB_CONN_MAX_AGE: segundos que se reutiliza una conexión entre requests
+#   (0 = una conexión por request; "none" = sin límite). Con runserver no sirve:
+#   crea un hilo por request.
+# DB_CONN_HEALTH_CHECKS: antes de reutilizar una conexión persistente, verifica
+#   que siga viva (evita errores tras un reinicio de la BD o un corte de red).
+# DB_POOL (solo PostgreSQL con psycopg 3 y psycopg-pool): pool nativo de
+#   Django 5.1+. Reemplaza a las conexiones persistentes (Django exige
+#   CONN_MAX_AGE=0 con pool); si psycopg-pool no está instalado, se usan
+#   conexiones persistentes.
+_conn_max_age = env("DB_CONN_MAX_AGE", default="0").strip().lower()
+DATABASES["default"]["CONN_MAX_AGE"] = None if _conn_max_age == "none" else int(_conn_max_age or 0)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = env.bool("DB_CONN_HEALTH_CHECKS", default=False)
+
+DB_POOL_ENABLED = False
+if env.bool("DB_POOL", default=False) and "postgresql" in DB_ENGINE:
+    import importlib.util
+
+    if importlib.util.find_spec("psycopg") and importlib.util.find_spec("psycopg_pool"):
+        DB_POOL_ENABLED = True
+        _db_options["pool"] = {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+            "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),  # espera por una conexión libre
+        }
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+    elif not DATABASES["default"]["CONN_MAX_AGE"]:
+        DATABASES["default"]["CONN_MAX_AGE"] = 60
+        DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+if _db_options:
+    DATABASES["default"]["OPTIONS"] = _db_options
+
+# === Cache ===
+# locmem por defecto; con varios workers conviene uno compartido
+# (p.ej. CACHE_URL=filecache:///var/tmp/inventario o redis://...)
+CACHES = {"default": env.cache_url("CACHE_URL", default="locmemcache://")}
+
+# Segundos que viven en cache los KPIs y conteos de los paneles
+KPI_CACHE_TTL = env.int("KPI_CACHE_TTL", default=300)
+
+# Segundos que viven en cache los fragmentos de plantilla (filas de los listados
+# CRUD, tarjetas de módulos) y los gráficos del dashboard; igual se renuevan al
+# cambiar las tablas que leen
+FRAGMENT_CACHE_TTL = env.int("FRAGMENT_CACHE_TTL", default=300)
+
+# Paneles (inicio, dashboard, módulos): versiones async con consultas en paralelo
+# para servir con ASGI (uvicorn); PANEL_QUERY_WORKERS = hilos/conexiones del pool
+PANEL_ASYNC_VIEWS = env.bool("PANEL_ASYNC_VIEWS", default=False)
+PANEL_QUERY_WORKERS = env.int("PANEL_QUERY_WORKERS", default=4)
+
+# Segundos que se comparte entre requests el snapshot de permisos de cada usuario
+# (0 = solo dentro del request)
+PERMS_CACHE_TTL = env.int("PERMS_CACHE_TTL", default=300)
+
+# === CRUD genérico ===
+# Filas por lote al exportar CSV (iterator(chunk_size) + envío por bloques)
+CRUD_EXPORT_CHUNK_SIZE = env.int("CRUD_EXPORT_CHUNK_SIZE", default=2000)
+# Filas por transacción (bulk_create/bulk_update) al importar CSV/Excel
+CRUD_IMPORT_CHUNK_SIZE = env.int("CRUD_IMPORT_CHUNK_SIZE", default=1000)
+# Modelos (app_label.model) cuyo conteo en los paneles es estimado en PostgreSQL,
+# p.ej. CRUD_COUNT_ESTIMATE=productos.detallefactura,productos.mantencion
+CRUD_COUNT_ESTIMATE = env.list("CRUD_COUNT_ESTIMATE", default=[])
+# Modelos con paginación por cursor (after=/before=) en vez de OFFSET
+CRUD_KEYSET_PAGINATION = env.list("CRUD_KEYSET_PAGINATION", default=[])
+# Modelos cuyo total de listado se estima (EXPLAIN en PostgreSQL) en vez de COUNT(*)
+CRUD_APPROXIMATE_COUNT = env.list("CRUD_APPROXIMATE_COUNT", default=[])
+# Backend de búsqueda del parámetro ?q=: auto | like | fts (SQLite) | trigram (PostgreSQL)
+CRUD_SEARCH_BACKEND = env("CRUD_SEARCH_BACKEND", default="auto")
+# Formularios: FK a tablas con más filas que esto usan autocompletar en vez de <select> completo
+CRUD_FK_AUTOCOMPLETE_THRESHOLD = env.int("CRUD_FK_AUTOCOMPLETE_THRESHOLD", default=200)
+# Resultados por página del JSON de autocompletar
+CRUD_AUTOCOMPLETE_PAGE_SIZE = env.int("CRUD_AUTOCOMPLETE_PAGE_SIZE", default=20)
+
+# Exportar CSV como tarea en segundo plano (manage.py runworker); False: streaming en el request
+CRUD_EXPORT_JOBS = env.bool("CRUD_EXPORT_JOBS", default=True)
+
+# === Tareas en segundo plano (productos/jobs.py, manage.py runworker) ===
+# procesos e hilos por proceso del worker (se pueden cambiar con --processes / --threads)
+JOB_WORKER_PROCESSES = env.int("JOB_WORKER_PROCESSES", default=1)
+JOB_WORKER_THREADS = env.int("JOB_WORKER_THREADS", default=2)
+# segundos entre consultas a la cola cuando está vacía
+JOB_POLL_SECONDS = env.float("JOB_POLL_SECONDS", default=1.0)
+# intentos por tarea; el reintento n espera JOB_RETRY_DELAY * 2**(n-1) segundos
+JOB_MAX_ATTEMPTS = env.int("JOB_MAX_ATTEMPTS", default=3)
+JOB_RETRY_DELAY = env.int("JOB_RETRY_DELAY", default=30)
+# una tarea "en proceso" por más de esto (worker caído) vuelve a la cola
+JOB_TIMEOUT = env.int("JOB_TIMEOUT", default=3600)
+# subcarpeta de MEDIA_ROOT para los archivos generados (exportaciones)
+JOB_EXPORT_DIR = env("JOB_EXPORT_DIR", default="exports")
+# segundos que se guardan las tareas terminadas y sus archivos (runworker o
+# `manage.py prune_jobs` borran los más viejos); 0: no se borran
+JOB_RESULT_TTL = env.int("JOB_RESULT_TTL", default=7 * 24 * 3600)
+# segundos en cola sin que un worker la tome antes de avisar en la página de la
+# tarea que probablemente no hay `manage.py runworker` corriendo
+JOB_UNCLAIMED_WARNING = env.int("JOB_UNCLAIMED_WARNING", default=30)
+
+# === Exportación completa (productos/archive.py, exportar/todo/, manage.py export_all) ===
+# tablas exportadas en paralelo, cada una con su conexión; procesos (fork) en vez
+# de hilos aprovechan varios núcleos al armar las filas
+EXPORT_ALL_WORKERS = env.int("EXPORT_ALL_WORKERS", default=4)
+EXPORT_ALL_PROCESSES = env.bool("EXPORT_ALL_PROCESSES", default=False)
+
+# === Métricas por vista (productos/metrics.py) ===
+# Consultas, tiempo de BD, de plantilla y total por nombre de URL; log en
+# productos.metrics y texto Prometheus en /metrics/
+REQUEST_METRICS = env.bool("REQUEST_METRICS", default=True)
+# Token para leer /metrics/ sin sesión (Authorization: Bearer <token>); vacío = solo superusuarios
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+# Máximo de consultas por vista (nombre de URL; admite comodines). Al excederse se
+# registra un warning; con QUERY_BUDGET_STRICT (tests) el request falla.
+# Se agregan/reemplazan con QUERY_BUDGETS=productos:equipos_list=5;productos:home=20
+QUERY_BUDGETS = {
+    "productos:home": 20,
+    "productos:dashboard": 12,
+    "productos:vistas_*": 10,
+    "productos:*_list": 8,
+    # importar: consultas fijas por bloque, más la puesta al día de derivados (listado, cola, historial)
+    "productos:*_import": 40,
+    **env.dict("QUERY_BUDGETS", cast={"value": int}, default={}),
+}
+QUERY_BUDGET_DEFAULT = env.int("QUERY_BUDGET_DEFAULT", default=30)
+QUERY_BUDGET_STRICT = env.bool("QUERY_BUDGET_STRICT", default=False)
 
 # === Passwords ===
 AUTH_PASSWORD_VALIDATORS = [
@@ -152,6 +279,9 @@ LOGGING = {
     "disable_existing_loggers": False,
     "handlers": {"console": {"class": "logging.StreamHandler"}},
     "root": {"handlers": ["console"], "level": "INFO"},
+    # línea por request de productos/metrics.py: con INFO se ven todas; por
+    # defecto solo los excesos de presupuesto de consultas
+    "loggers": {"productos.metrics": {"level": env("REQUEST_LOG_LEVEL", default="WARNING")}},
 }
 
 # Redirecciones de autenticación
@@ -13,6 +13,23 @@ CSRF_COOKIE_SECURE = True
 X_FRAME_OPTIONS = "DENY"
 SECURE_BROWSER_XSS_FILTER = True
 
+# Conexiones persistentes con verificación por defecto en producción
+# (si no se configuró DB_CONN_MAX_AGE ni el pool; ver base.py)
+if not env("DB_CONN_MAX_AGE", default="") and not DB_POOL_ENABLED:
+    DATABASES["default"]["CONN_MAX_AGE"] = 60
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Cache en disco compartido entre workers si no se definió CACHE_URL
+if not env("CACHE_URL", default=""):
+    CACHE_DIR = BASE_DIR / "cache"
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(CACHE_DIR),
+        }
+    }
+
 # Asegurar carpeta de logs
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -36,4 +53,13 @@ LOGGING = {
         },
     },
     "root": {"handlers": ["file", "console"], "level": "INFO"},
+    "loggers": {
+        # una línea por request (consultas y tiempos) solo al archivo; los
+        # excesos de presupuesto de consultas salen como WARNING
+        "productos.metrics": {
+            "handlers": ["file"],
+            "level": env("REQUEST_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
 }
@@ -5,6 +5,7 @@ from .models_inventario import (
     TipoEquipo, Equipo, AtributosEquipo, EstadoMantencion, Mantencion,
     Factura, DetalleFactura
 )
+from .models import IntervaloMantencion
 
 admin.site.register(Empresa)
 admin.site.register(Departamento)
@@ -19,3 +20,4 @@ admin.site.register(EstadoMantencion)
 admin.site.register(Mantencion)
 admin.site.register(Factura)
 admin.site.register(DetalleFactura)
+admin.site.register(IntervaloMantencion)
@@ -11,3 +11,10 @@ def home(request):
 class ProductosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'productos'
+
+    def ready(self):
+        from . import models_inventario  # noqa: F401  (registra los modelos)
+        from .crud import build_registry
+        from .signals import connect_signals
+        build_registry()
+        connect_signals()
@@ -0,0 +1,228 @@
+# productos/archive.py
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import json
+import csv
+import multiprocessing
+import os
+import tarfile
+import tempfile
+import threading
+import zipfile
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db import connection, connections
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import redirect
+
+from .crud import CrudConfig, get_crud_configs, get_registry, iter_export_rows
+from .perms import has
+
+# Exportación de todos los modelos del CRUD a un solo archivo (zip o tar.gz),
+# una tabla por miembro, en CSV (igual que <slug>/exportar/csv/) o Parquet.
+# Cada tabla se exporta en un hilo o proceso del pool, con su propia conexión,
+# a un archivo temporal escrito por bloques (CRUD_EXPORT_CHUNK_SIZE filas);
+# el hilo principal los agrega al archivo final a medida que terminan. La
+# memoria queda acotada por bloque × workers y el tiempo total tiende al de la
+# tabla más grande cuando hay núcleos suficientes (con procesos; con hilos, el
+# armado de filas en Python comparte el GIL y solo se solapan las lecturas).
+
+ARCHIVE_FORMATS = {"zip": ".zip", "tar.gz": ".tar.gz"}
+TABLE_FORMATS = ("csv", "parquet")
+
+
+def _rows(cfg: CrudConfig):
+    return cfg.base_queryset().order_by(*cfg.ordering)
+
+
+def _write_csv(cfg: CrudConfig, path: Path, chunk_size: int) -> int:
+    # mismo contenido que iter_csv_chunks; el archivo ya escribe con buffer
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(cfg.list_display)
+        for n, row in enumerate(iter_export_rows(cfg, _rows(cfg), chunk_size), start=1):
+            w.writerow(row)
+    return n
+
+
+def _write_parquet(cfg: CrudConfig, path: Path, chunk_size: int) -> int:
+    # columnas de texto con los mismos valores que el CSV; un row group por bloque
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(cfg.list_display)
+    schema = pa.schema([(c, pa.string()) for c in columns])
+    n = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch: List[list] = []
+
+        def flush():
+            cols = list(zip(*batch)) if batch else [()] * len(columns)
+            writer.write_table(pa.table([pa.array(col, pa.string()) for col in cols], schema=schema))
+            batch.clear()
+
+        for row in iter_export_rows(cfg, _rows(cfg), chunk_size):
+            batch.append(row)
+            n += 1
+            if len(batch) >= chunk_size:
+                flush()
+        if batch or not n:
+            flush()
+    return n
+
+
+_pool_process = False
+
+
+def _in_pool() -> bool:
+    return _pool_process or threading.current_thread() is not threading.main_thread()
+
+
+def _init_process():
+    # hijo del fork; el padre cerró sus conexiones antes, así que abre las propias
+    global _pool_process
+    _pool_process = True
+
+
+def export_table(slug: str, folder: str, table_format: str = "csv", chunk_size: Optional[int] = None
+                 ) -> Tuple[str, str, int]:
+    """Exporta una tabla a `folder`; devuelve (slug, ruta, filas). Corre en un hilo o proceso del pool."""
+    cfg = get_registry().by_slug(slug)
+    chunk_size = chunk_size or getattr(settings, "CRUD_EXPORT_CHUNK_SIZE", 2000)
+    path = Path(folder, f"{slug}.{table_format}")
+    try:
+        write = _write_parquet if table_format == "parquet" else _write_csv
+        return slug, str(path), write(cfg, path, chunk_size)
+    finally:
+        # conexión propia de este hilo/proceso: no queda abierta en el pool
+        if _in_pool():
+            connections.close_all()
+
+
+def _check_formats(archive: str, table_format: str):
+    if archive not in ARCHIVE_FORMATS:
+        raise ValueError(f"Formato de archivo no soportado: {archive} (zip, tar.gz)")
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(f"Formato de tabla no soportado: {table_format} (csv, parquet)")
+    if table_format == "parquet":
+        import importlib.util
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ValueError("Parquet requiere pyarrow (pip install pyarrow).")
+
+
+class _Writer:
+    """Agrega archivos al zip / tar.gz, uno a la vez (desde el hilo principal)."""
+
+    def __init__(self, path: Path, archive: str):
+        if archive == "zip":
+            self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+            self._tar = None
+        else:
+            self._zip, self._tar = None, tarfile.open(path, "w:gz")
+
+    def add(self, source: str, name: str):
+        if self._zip is not None:
+            self._zip.write(source, name)
+        else:
+            self._tar.add(source, name)
+
+    def close(self):
+        (self._zip or self._tar).close()
+
+
+def export_all(dest: Path | str, archive: str = "zip", table_format: str = "csv",
+               slugs: Optional[Sequence[str]] = None, workers: Optional[int] = None,
+               processes: Optional[bool] = None,
+               progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """
+    Escribe `dest` con una tabla por CrudConfig (todas, o las de `slugs`) más
+    manifest.json. Devuelve {slug: filas}. `dest` aparece solo al terminar.
+    """
+    _check_formats(archive, table_format)
+    slugs = list(slugs) if slugs is not None else [c.slug for c in get_crud_configs()]
+    workers = workers or getattr(settings, "EXPORT_ALL_WORKERS", 4)
+    processes = getattr(settings, "EXPORT_ALL_PROCESSES", False) if processes is None else processes
+    # dentro de una transacción (p.ej. TestCase) otras conexiones no ven sus cambios
+    serial = workers <= 1 or connection.in_atomic_block
+    dest = Path(dest)
+    tmp_dest = dest.with_name(dest.name + ".part")
+    counts: Dict[str, int] = {}
+
+    with tempfile.TemporaryDirectory(prefix="export_all-") as folder:
+        writer = _Writer(tmp_dest, archive)
+        try:
+            def done(slug, path, rows):
+                writer.add(path, f"{slug}.{table_format}")
+                os.remove(path)  # el disco temporal tampoco crece más que lo pendiente
+                counts[slug] = rows
+                if progress:
+                    progress(len(counts), len(slugs))
+
+            if serial:
+                for slug in slugs:
+                    done(*export_table(slug, folder, table_format))
+            else:
+                if processes:
+                    connections.close_all()  # el fork no debe heredar conexiones abiertas
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process,
+                                               mp_context=multiprocessing.get_context("fork"))
+                else:
+                    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export-all")
+                with pool:
+                    futures = [pool.submit(export_table, slug, folder, table_format) for slug in slugs]
+                    try:
+                        for f in as_completed(futures):
+                            done(*f.result())
+                    except BaseException:
+                        pool.shutdown(cancel_futures=True)  # no seguir con las tablas en cola
+                        raise
+
+            manifest = {
+                "generado": datetime.now().astimezone().isoformat(timespec="seconds"),
+                "formato": table_format,
+                "tablas": {slug: {"filas": counts[slug], "columnas": list(get_registry().by_slug(slug).list_display)}
+                           for slug in slugs},
+            }
+            manifest_path = Path(folder, "manifest.json")
+            manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+            writer.add(str(manifest_path), "manifest.json")
+        except BaseException:
+            writer.close()
+            tmp_dest.unlink(missing_ok=True)
+            raise
+        writer.close()
+    os.replace(tmp_dest, dest)
+    return counts
+
+
+# ---------- vista ----------
+
+@login_required
+def export_all_view(request):
+    """Los modelos que el usuario puede ver, en un archivo (?formato=zip|tar.gz)."""
+    slugs = [c.slug for c in get_crud_configs() if has(request.user, "view", c)]
+    if not slugs:
+        return HttpResponse(status=403)
+    archive = request.GET.get("formato", "zip")
+    if archive not in ARCHIVE_FORMATS:
+        archive = "zip"
+
+    if getattr(settings, "CRUD_EXPORT_JOBS", True):
+        from .jobs import enqueue  # importa archive.py
+        job = enqueue("export_all", {"archive": archive, "table_format": "csv", "slugs": slugs},
+                      request.user, reuse=True)
+        return redirect("productos:job_detail", pk=job.pk)
+
+    # sin worker: se arma en el request; el temporal se borra apenas se abre (sigue legible)
+    fd, name = tempfile.mkstemp(prefix="inventario-", suffix=ARCHIVE_FORMATS[archive])
+    os.close(fd)
+    try:
+        export_all(name, archive=archive, slugs=slugs)
+        f = open(name, "rb")
+    finally:
+        os.unlink(name)
+    return FileResponse(f, as_attachment=True, filename=f"inventario{ARCHIVE_FORMATS[archive]}")
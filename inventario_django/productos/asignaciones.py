@@ -0,0 +1,114 @@
+# productos/asignaciones.py
+from datetime import datetime, time, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import AsignacionEquipo
+from .models_inventario import Empleado, Equipo
+
+# Historial de asignaciones equipo -> empleado (AsignacionEquipo). Equipo
+# guarda solo el empleado actual; aquí queda cada intervalo [desde, hasta).
+# Al guardar un Equipo, sync() compara su empleado con la asignación vigente:
+# si cambió, la cierra y abre otra. Las consultas "en T" son igualdad por
+# equipo o empleado + rango sobre desde, cubiertas por los índices del modelo.
+
+
+def _chunks(ids, size):
+    it = iter(ids)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def sync(equipo_ids: Iterable[int], cuando: Optional[datetime] = None, chunk_size: int = 500) -> int:
+    """
+    Alinea las asignaciones vigentes con Equipo.id_empleado para `equipo_ids`
+    (equipos borrados: se cierra la vigente). Devuelve las asignaciones abiertas.
+    """
+    cuando = cuando or timezone.now()
+    abiertas_total = 0
+    for chunk in _chunks(sorted(set(equipo_ids)), chunk_size):
+        actual = dict(Equipo.objects.filter(pk__in=chunk).values_list("pk", "id_empleado"))
+        with transaction.atomic():
+            vigentes = dict(
+                AsignacionEquipo.objects.filter(id_equipo__in=chunk, hasta__isnull=True)
+                .values_list("id_equipo", "id_empleado")
+            )
+            cerrar = [pk for pk, emp in vigentes.items() if actual.get(pk) != emp]
+            abrir = [AsignacionEquipo(id_equipo_id=pk, id_empleado_id=emp, desde=cuando)
+                     for pk, emp in actual.items() if emp is not None and vigentes.get(pk) != emp]
+            if cerrar:
+                AsignacionEquipo.objects.filter(id_equipo__in=cerrar, hasta__isnull=True).update(hasta=cuando)
+            AsignacionEquipo.objects.bulk_create(abrir)
+        abiertas_total += len(abrir)
+    return abiertas_total
+
+
+def parse_as_of(value: str) -> Optional[datetime]:
+    """?as_of=: fecha (AAAA-MM-DD, al cierre de ese día) o fecha y hora ISO; None si no es válida."""
+    value = (value or "").strip()
+    try:
+        dt = parse_datetime(value)
+        d = None if dt else parse_date(value)
+    except ValueError:
+        return None
+    if d is not None:
+        dt = datetime.combine(d + timedelta(days=1), time.min) - timedelta(microseconds=1)
+    if dt is None:
+        return None
+    return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+
+
+def vigentes_en(cuando: datetime):
+    """Asignaciones vigentes en el instante `cuando` (desde <= cuando < hasta)."""
+    return AsignacionEquipo.objects.filter(
+        Q(hasta__gt=cuando) | Q(hasta__isnull=True), desde__lte=cuando,
+    )
+
+
+def vigentes_de(equipo_ids: Iterable[int], cuando: datetime):
+    """Asignaciones vigentes en `cuando` de esos equipos, con su empleado (sin evaluar)."""
+    return vigentes_en(cuando).filter(id_equipo__in=list(equipo_ids)).select_related("id_empleado")
+
+
+def empleados_en(equipo_ids: Iterable[int], cuando: datetime) -> Dict[int, Empleado]:
+    """{id_equipo: Empleado} en `cuando` para esos equipos (los sin asignación no aparecen); una consulta."""
+    return {a.id_equipo_id: a.id_empleado for a in vigentes_de(equipo_ids, cuando)}
+
+
+def historial_equipo(equipo_id: int):
+    """Asignaciones del equipo, la más reciente primero."""
+    return (AsignacionEquipo.objects.filter(id_equipo=equipo_id)
+            .select_related("id_empleado").order_by("-desde"))
+
+
+def historial_empleado(empleado_id: int, inicio: Optional[datetime] = None, fin: Optional[datetime] = None):
+    """Línea de tiempo del empleado: asignaciones que se cruzan con [inicio, fin), en orden."""
+    qs = AsignacionEquipo.objects.filter(id_empleado=empleado_id)
+    if fin is not None:
+        qs = qs.filter(desde__lt=fin)
+    if inicio is not None:
+        qs = qs.filter(Q(hasta__gt=inicio) | Q(hasta__isnull=True))
+    return qs.select_related("id_equipo").order_by("desde")
+
+
+# ---------- mantenimiento incremental ----------
+
+def _despues(sender, instance, created=False, **kwargs):
+    if created:
+        # equipo nuevo: no hay vigente que cerrar
+        if instance.id_empleado_id is not None:
+            AsignacionEquipo.objects.create(id_equipo_id=instance.pk, id_empleado_id=instance.id_empleado_id,
+                                            desde=timezone.now())
+    else:
+        sync([instance.pk])
+
+
+def connect_asignacion_signals():
+    post_save.connect(_despues, sender=Equipo, dispatch_uid="asignaciones:post_save:equipo")
+    post_delete.connect(_despues, sender=Equipo, dispatch_uid="asignaciones:post_delete:equipo")
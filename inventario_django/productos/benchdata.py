@@ -0,0 +1,174 @@
+# productos/benchdata.py
+from datetime import date, timedelta
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List
+import random
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AsignacionEquipo, EquipoListing, GastoMensual, IntervaloMantencion, MantencionProgramada
+from .models_inventario import (
+    AtributosEquipo, DetalleFactura, Departamento, Empleado, Empresa, Equipo, EstadoEquipo,
+    EstadoMantencion, Factura, Mantencion, Marca, Proveedor, TipoEquipo,
+)
+
+# Datos sintéticos para benchmarks (manage.py seed_bench). La escala es la
+# cantidad de equipos; el resto se deriva con proporciones fijas. Se inserta
+# con bulk_create y PK explícitos a partir del máximo actual, así que puede
+# sumarse a datos existentes. bulk_create no emite señales: quien llame debe
+# reconstruir los derivados (gasto, listado, programación de mantenciones,
+# búsqueda) e invalidar caches.
+
+MANTENCIONES_POR_EQUIPO = 2
+EQUIPOS_POR_FACTURA = 5
+EQUIPOS_POR_EMPLEADO = 20
+ASIGNACIONES_ANTERIORES = 3  # máximo de dueños previos por equipo
+
+ESTADOS_EQUIPO = (("Disponible", 5), ("En uso", 8), ("En reparación", 1), ("De baja", 1))
+ESTADOS_MANTENCION = (("Pendiente", 2), ("En curso", 1), ("Hecha", 7))
+TIPOS = ("Notebook", "Desktop", "Monitor", "Impresora", "Servidor", "Switch",
+         "Router", "Tablet", "Teléfono", "Proyector", "UPS", "Docking")
+MARCAS = ("Lenovo", "HP", "Dell", "Apple", "Asus", "Acer", "Samsung", "LG", "Cisco", "Epson",
+          "Brother", "Logitech", "Microsoft", "Huawei", "Xiaomi", "APC", "Ubiquiti", "Kingston")
+
+# orden de borrado (hijos primero)
+INVENTORY_MODELS = (DetalleFactura, Factura, Mantencion, Equipo, AtributosEquipo, Empleado,
+                    Departamento, Empresa, Proveedor, Marca, TipoEquipo, EstadoEquipo, EstadoMantencion)
+DERIVED_MODELS = (GastoMensual, EquipoListing, MantencionProgramada)
+# intervalo de mantención (días) por tipo; los tipos sin entrada no se programan
+INTERVALOS = {"Notebook": 180, "Desktop": 365, "Impresora": 90, "Servidor": 90, "Switch": 365,
+              "Router": 365, "UPS": 180, "Proyector": 180}
+
+
+def ensure_tables() -> List[str]:
+    """Crea las tablas de models_inventario (managed=False) que falten en esta BD."""
+    existing = set(connection.introspection.table_names())
+    created = []
+    with connection.schema_editor() as editor:
+        for m in reversed(INVENTORY_MODELS):
+            if m._meta.db_table not in existing:
+                editor.create_model(m)
+                created.append(m._meta.db_table)
+    return created
+
+
+def flush():
+    """Vacía las tablas del inventario y sus derivados (TRUNCATE en PostgreSQL)."""
+    tables = [m._meta.db_table for m in (*INVENTORY_MODELS, IntervaloMantencion, AsignacionEquipo, *DERIVED_MODELS)]
+    connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+
+
+def _next_pk(model) -> int:
+    last = model.objects.order_by("-pk").values_list("pk", flat=True).first()
+    return (last or 0) + 1
+
+
+def _insert(model, objs: Iterable, chunk_size: int) -> int:
+    it, total = iter(objs), 0
+    while chunk := list(islice(it, chunk_size)):
+        with transaction.atomic():
+            model.objects.bulk_create(chunk)
+        total += len(chunk)
+    return total
+
+
+def _weighted(rng: random.Random, ids_weights):
+    ids, weights = zip(*ids_weights)
+    return lambda: rng.choices(ids, weights)[0]
+
+
+def _estados(model, field: str, names_weights):
+    """Estados con nombre fijo (los KPIs los buscan por nombre): se reutilizan si ya existen."""
+    out = []
+    for name, weight in names_weights:
+        obj, _ = model.objects.get_or_create(**{field: name})
+        out.append((obj.pk, weight))
+    return out
+
+
+def generate(equipos: int = 10_000, seed: int = 1, chunk_size: int = 5000,
+             log: Callable[[str], None] = lambda msg: None) -> Dict[str, int]:
+    """Inserta un inventario sintético con `equipos` equipos. Devuelve filas creadas por tabla."""
+    rng = random.Random(seed)
+    hoy = date.today()
+    created: Dict[str, int] = {}
+
+    def add(model, objs):
+        created[model._meta.db_table] = _insert(model, objs, chunk_size)
+        log(f"{model._meta.db_table}: {created[model._meta.db_table]}")
+
+    def rango(model, n, make) -> range:
+        start = _next_pk(model)
+        add(model, (make(pk) for pk in range(start, start + n)))
+        return range(start, start + n)
+
+    # catálogos y organización
+    empresas = rango(Empresa, 5, lambda pk: Empresa(
+        pk=pk, rut_empresa=f"76.{pk:03d}.000-{pk % 10}", nombre_empresa=f"Empresa {pk}"))
+    deptos = rango(Departamento, 4 * len(empresas), lambda pk: Departamento(
+        pk=pk, nombre_departamento=f"Depto {pk}", id_empresa_id=rng.choice(empresas)))
+    marcas = rango(Marca, len(MARCAS), lambda pk: Marca(pk=pk, nombre_marca=f"{MARCAS[pk % len(MARCAS)]} {pk}"))
+    tipos = rango(TipoEquipo, len(TIPOS), lambda pk: TipoEquipo(pk=pk, tipo_equipo=f"{TIPOS[pk % len(TIPOS)]} {pk}"))
+    add(IntervaloMantencion, (IntervaloMantencion(id_tipo_equipo_id=pk, dias=INTERVALOS[TIPOS[pk % len(TIPOS)]])
+                              for pk in tipos if TIPOS[pk % len(TIPOS)] in INTERVALOS))
+    proveedores = rango(Proveedor, 40, lambda pk: Proveedor(
+        pk=pk, nombre_proveedor=f"Proveedor {pk}", rut_proveedor=f"77.{pk:06d}-{pk % 10}"))
+    rango(AtributosEquipo, 4 * len(tipos), lambda pk: AtributosEquipo(
+        pk=pk, id_tipo_equipo_id=tipos[pk % len(tipos)], atributo=f"Atributo {pk}", valor=str(pk)))
+    estado_equipo = _weighted(rng, _estados(EstadoEquipo, "descripcion", ESTADOS_EQUIPO))
+    estado_mant = _weighted(rng, _estados(EstadoMantencion, "tipo", ESTADOS_MANTENCION))
+
+    empleados = rango(Empleado, max(20, equipos // EQUIPOS_POR_EMPLEADO), lambda pk: Empleado(
+        pk=pk, rut=f"{pk:08d}-{pk % 10}", nombre=f"Nombre{pk}", apellido_paterno=f"Apellido{pk % 997}",
+        apellido_materno=f"Materno{pk % 101}" if pk % 3 else None, activo=pk % 10 != 0,
+        id_empresa_id=rng.choice(empresas), id_departamento_id=rng.choice(deptos)))
+
+    # equipos y su historia
+    eq = rango(Equipo, equipos, lambda pk: Equipo(
+        pk=pk, nombre_equipo=f"EQ-{pk:07d}", id_marca_id=rng.choice(marcas), id_tipo_equipo_id=rng.choice(tipos),
+        id_estado_equipo_id=estado_equipo(),
+        id_empleado_id=rng.choice(empleados) if rng.random() < 0.7 else None,
+        id_proveedor_id=rng.choice(proveedores)))
+
+    def asignaciones():
+        # hacia atrás desde hoy: la vigente (si tiene empleado) y hasta ASIGNACIONES_ANTERIORES cerradas
+        ahora = timezone.now()
+        for pk, empleado in Equipo.objects.filter(pk__in=eq).values_list("pk", "id_empleado").iterator():
+            fin = ahora - timedelta(days=rng.randrange(1, 60))
+            if empleado is not None:
+                yield AsignacionEquipo(id_equipo_id=pk, id_empleado_id=empleado, desde=fin)
+            for _ in range(rng.randrange(ASIGNACIONES_ANTERIORES + 1)):
+                inicio = fin - timedelta(days=rng.randrange(30, 400))
+                yield AsignacionEquipo(id_equipo_id=pk, id_empleado_id=rng.choice(empleados), desde=inicio, hasta=fin)
+                fin = inicio
+    add(AsignacionEquipo, asignaciones())
+    rango(Mantencion, equipos * MANTENCIONES_POR_EQUIPO, lambda pk: Mantencion(
+        pk=pk, id_equipo_id=rng.choice(eq), id_estado_mantencion_id=estado_mant(),
+        fecha=hoy - timedelta(days=rng.randrange(3 * 365)) if rng.random() < 0.9 else None,
+        descripcion=f"Mantención {pk}"))
+    facturas = rango(Factura, max(1, equipos // EQUIPOS_POR_FACTURA), lambda pk: Factura(
+        pk=pk, id_proveedor_id=rng.choice(proveedores), fecha_emision=hoy - timedelta(days=rng.randrange(730))))
+
+    def detalle(pk):
+        cantidad, unitario = rng.choice((1, 1, 1, 2)), rng.randrange(150_000, 1_500_000, 1000)
+        neto = cantidad * unitario
+        equipo = eq[(pk - detalles_start) % len(eq)]
+        return DetalleFactura(pk=pk, id_factura_id=rng.choice(facturas), id_equipo_id=equipo,
+                              nombre_equipo=f"EQ-{equipo:07d}", cantidad=cantidad, valor_unitario=unitario,
+                              valor_neto=neto, iva=round(neto * 0.19), valor_total=round(neto * 1.19))
+    detalles_start = _next_pk(DetalleFactura)
+    rango(DetalleFactura, equipos, detalle)
+
+    # PostgreSQL: las secuencias no avanzan con PK explícitos
+    with connection.cursor() as cur:
+        for sql in connection.ops.sequence_reset_sql(no_style(), INVENTORY_MODELS):
+            cur.execute(sql)
+    return created
+
+
+def iter_counts() -> Iterator:
+    """(tabla, filas) del inventario, para el encabezado de los resultados."""
+    for m in reversed(INVENTORY_MODELS):
+        yield m._meta.db_table, m.objects.count()
@@ -0,0 +1,175 @@
+# productos/benchsuite.py
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .crud import get_registry
+from .models import EquipoListing
+from .models_inventario import Equipo
+
+# Escenarios de bench_suite: las rutas web que más leen del inventario
+# (listados CRUD, exportación CSV, listado y detalle de equipos y paneles).
+# Cada escenario se ejecuta en el proceso, con el Client de pruebas o, para
+# las vistas sin ruta (views_old), con RequestFactory; se miden latencia,
+# cantidad de consultas y, en una pasada aparte, el pico de memoria Python.
+
+CRUD_SLUGS = ("equipos", "mantencions", "detallefacturas")
+
+
+@dataclass
+class Scenario:
+    name: str
+    call: Callable[[], object]  # hace el request y consume la respuesta completa
+
+
+@dataclass
+class Result:
+    name: str
+    times_ms: List[float] = field(default_factory=list)
+    queries: int = 0
+    status: int = 0
+    peak_kb: Optional[float] = None
+
+    def as_dict(self) -> Dict:
+        t = sorted(self.times_ms)
+        return {
+            "runs": len(t),
+            "p50_ms": statistics.median(t),
+            "p95_ms": percentile(t, 95),
+            "mean_ms": statistics.fmean(t),
+            "min_ms": t[0],
+            "queries": self.queries,
+            "status": self.status,
+            "peak_kb": self.peak_kb,
+        }
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentil por rango más cercano (sorted_values ya ordenado)."""
+    k = max(0, -(-len(sorted_values) * p // 100) - 1)
+    return sorted_values[int(k)]
+
+
+def _consume(response) -> int:
+    if getattr(response, "streaming", False):
+        for _ in response.streaming_content:
+            pass
+    elif hasattr(response, "render"):
+        response.render()
+    return response.status_code
+
+
+def _get(client: Client, url: str, params: Optional[dict] = None):
+    secure = getattr(settings, "SECURE_SSL_REDIRECT", False)
+    return lambda: _consume(client.get(url, params or {}, secure=secure))
+
+
+def _streamed_csv(client: Client, url: str):
+    get = _get(client, url)
+
+    def call():
+        with override_settings(CRUD_EXPORT_JOBS=False):
+            return get()
+    return call
+
+
+def _view(view_cls, user, params: Optional[dict] = None, **kwargs):
+    view, factory = view_cls.as_view(), RequestFactory()
+
+    def call():
+        request = factory.get("/", params or {})
+        request.user = user
+        return _consume(view(request, **kwargs))
+    return call
+
+
+def default_scenarios(user) -> List[Scenario]:
+    """Escenarios sobre los datos actuales de la BD (páginas e IDs se eligen según su tamaño)."""
+    from .views_old import EquipoDetailView, EquiposListView  # sin ruta; solo para medir
+
+    hosts = [h for h in settings.ALLOWED_HOSTS if h != "*"]
+    client = Client(HTTP_HOST=hosts[0] if hosts else "localhost")
+    client.force_login(user)
+    registry = get_registry()
+    out = [
+        Scenario("home", _get(client, reverse("productos:home"))),
+        Scenario("dashboard", _get(client, reverse("productos:dashboard"))),
+        Scenario("vistas_modulos", _get(client, reverse("productos:vistas_modulos"))),
+    ]
+    for slug in CRUD_SLUGS:
+        cfg = registry.by_slug(slug)
+        url = reverse(cfg.url_names["list"])
+        middle = max(1, cfg.model._default_manager.count() // 25 // 2)
+        out += [
+            Scenario(f"crud:{slug}", _get(client, url)),
+            Scenario(f"crud:{slug}:page_{middle}", _get(client, url, {"page": middle})),
+            Scenario(f"crud:{slug}:search", _get(client, url, {"q": "EQ-00001"})),
+        ]
+    for slug in ("equipos", "detallefacturas"):
+        # la exportación en streaming: mide el mismo trabajo que hace la tarea del worker
+        out.append(Scenario(f"csv:{slug}", _streamed_csv(client, reverse(registry.by_slug(slug).url_names["csv"]))))
+
+    listing = EquipoListing.objects.order_by("pk")
+    sample = listing.filter(mantenciones__gt=0).values_list("pk", "id_marca_id").first()
+    if sample is None:
+        sample = Equipo.objects.order_by("pk").values_list("pk", "id_marca_id").first() or (1, 1)
+    as_of = (date.today() - timedelta(days=90)).isoformat()
+    out += [
+        Scenario("equipos_list", _view(EquiposListView, user)),
+        Scenario("equipos_list:search", _view(EquiposListView, user, {"q": "EQ-00001"})),
+        Scenario("equipos_list:marca", _view(EquiposListView, user, {"marca": sample[1]})),
+        Scenario("equipos_list:as_of", _view(EquiposListView, user, {"as_of": as_of})),
+        Scenario("equipo_detail", _view(EquipoDetailView, user, equipo_id=sample[0])),
+    ]
+    return out
+
+
+def select(scenarios: Iterable[Scenario], patterns: Iterable[str]) -> List[Scenario]:
+    patterns = list(patterns)
+    return [s for s in scenarios if not patterns or any(p in s.name for p in patterns)]
+
+
+def run(scenario: Scenario, iterations: int = 20, warmup: int = 2, warm: bool = False,
+        memory: bool = True) -> Result:
+    """
+    Mide `scenario`. En frío (por defecto) se vacía el cache antes de cada
+    ejecución, fuera del tiempo medido; con warm=True se mide con cache.
+    """
+    result = Result(scenario.name)
+
+    def once():
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            result.status = scenario.call()
+            elapsed = (time.perf_counter() - t0) * 1000
+        return elapsed, len(ctx)
+
+    for _ in range(warmup):
+        once()
+    for _ in range(iterations):
+        elapsed, result.queries = once()
+        result.times_ms.append(elapsed)
+
+    if memory:
+        # pasada aparte: tracemalloc hace todo más lento y no debe entrar en las latencias
+        if not warm:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            scenario.call()
+            result.peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+    return result
@@ -0,0 +1,157 @@
+# productos/bulk.py
+from copy import deepcopy
+from itertools import islice
+from typing import Dict, Iterable, List, Sequence, Tuple, Type
+
+from django import forms
+from django.contrib import messages
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Model
+from django.shortcuts import redirect, render
+from django.utils.http import urlencode
+from django.views import View
+
+from .crud import CrudConfig, bulk_fields, get_registry
+from .derived import after_bulk_write, before_bulk_write
+from .fk_choices import form_class_for, use_autocomplete
+from .mixins import ModelPermsMixin
+from .search import get_search_backend
+
+# Acciones masivas del listado CRUD: cambiar un campo (o reasignar un FK) y
+# eliminar, sobre las filas seleccionadas o todas las que calzan con ?q=.
+# Se escriben con UPDATE / DELETE por conjunto (en bloques de PK), sin cargar
+# objetos; como eso no emite señales, derived.after_bulk_write mantiene lo
+# que ellas mantienen.
+
+CHUNK_SIZE = 500
+
+# acción -> permiso que exige
+BULK_ACTIONS: Dict[str, str] = {"update": "change", "delete": "delete"}
+
+
+def value_form(cfg: CrudConfig, field_name: str, data=None) -> forms.Form:
+    """Formulario de un solo campo ("value") con el mismo form field que el ModelForm del CRUD."""
+    field = deepcopy(form_class_for(cfg).base_fields[field_name])
+    use_autocomplete(cfg, field_name, field)
+    form = forms.Form(data)
+    form.fields["value"] = field
+    return form
+
+
+def _chunks(pks: Sequence, size: int = CHUNK_SIZE) -> Iterable[Sequence]:
+    it = iter(pks)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def related_counts(model: Type[Model], qs) -> List[Tuple[str, int]]:
+    """(tabla relacionada, filas) que apuntan a las filas de `qs`: bloquean el borrado."""
+    out = []
+    for rel in model._meta.related_objects:
+        if rel.many_to_many or rel.field.model is model:
+            continue
+        n = rel.related_model._default_manager.filter(**{f"{rel.field.name}__in": qs.values("pk")}).count()
+        if n:
+            out.append((str(rel.related_model._meta.verbose_name_plural), n))
+    return out
+
+
+def bulk_update(cfg: CrudConfig, qs, field_name: str, value) -> int:
+    """UPDATE <tabla> SET <campo> = value para las filas de `qs`. Devuelve las filas cambiadas."""
+    model = cfg.model
+    with transaction.atomic():
+        pks = list(qs.values_list("pk", flat=True))
+        before = before_bulk_write(model, pks)
+        n = sum(model._base_manager.filter(pk__in=chunk).update(**{field_name: value}) for chunk in _chunks(pks))
+        after_bulk_write(model, pks, before=before, reindex=field_name in cfg.search_fields)
+    return n
+
+
+def bulk_delete(cfg: CrudConfig, qs) -> int:
+    """
+    DELETE por conjunto de las filas de `qs`. Las FK son DO_NOTHING: si otra
+    tabla las referencia, la BD rechaza el borrado (IntegrityError) y no se borra nada.
+    """
+    model = cfg.model
+    qn = connection.ops.quote_name
+    table, pk = qn(model._meta.db_table), qn(model._meta.pk.column)
+    n = 0
+    with transaction.atomic():
+        pks = list(qs.values_list("pk", flat=True))
+        before = before_bulk_write(model, pks)
+        with connection.cursor() as cur:
+            for chunk in _chunks(pks):
+                cur.execute(f"DELETE FROM {table} WHERE {pk} IN ({', '.join(['%s'] * len(chunk))})", chunk)
+                n += cur.rowcount
+        after_bulk_write(model, pks, before=before, deleted=True)
+    return n
+
+
+class GenericBulk(ModelPermsMixin, View):
+    """
+    POST desde el listado: sin confirm=1 muestra la vista previa (filas
+    afectadas y, para cambiar un campo, el valor nuevo); con confirm=1 ejecuta.
+    """
+    http_method_names = ["post"]
+    template_name = "crud/bulk.html"
+    crud_config: CrudConfig
+
+    def dispatch(self, request, *args, **kwargs):
+        # un solo chequeo de permiso (ModelPermsMixin), el que pide la acción
+        self.action = request.POST.get("action", "")
+        self.action_perm = BULK_ACTIONS.get(self.action, "change")
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self, scope, pks, q):
+        cfg = self.crud_config
+        if scope == "filter":
+            return get_search_backend().filter(cfg.model._default_manager.all(), q, cfg.search_fields)
+        return cfg.model._default_manager.filter(pk__in=pks)
+
+    def post(self, request, *args, **kwargs):
+        cfg = self.crud_config
+        post = request.POST
+        q = post.get("q", "").strip()
+        scope = "filter" if post.get("scope") == "filter" else "selected"
+        pks = [int(p) for p in post.getlist("pk") if p.isdigit()]
+        field_name = post.get("field", "")
+        list_url = get_registry().urls(cfg)["list"]
+        back = f"{list_url}?{urlencode({'q': q})}" if q else list_url
+
+        fields = {f.name: f for f in bulk_fields(cfg.model)}
+        if self.action not in BULK_ACTIONS or (self.action == "update" and field_name not in fields):
+            messages.error(request, "Acción masiva no válida.")
+            return redirect(back)
+        if scope == "selected" and not pks:
+            messages.error(request, "No seleccionaste registros.")
+            return redirect(back)
+
+        qs = self.get_queryset(scope, pks, q)
+        confirm = post.get("confirm") == "1"
+        form = value_form(cfg, field_name, post if confirm else None) if self.action == "update" else None
+        related = related_counts(cfg.model, qs) if self.action == "delete" else []
+
+        if confirm and not related and (form is None or form.is_valid()):
+            try:
+                if form is None:
+                    n = bulk_delete(cfg, qs)
+                    messages.success(request, f"{n} registro(s) eliminado(s).")
+                else:
+                    n = bulk_update(cfg, qs, field_name, form.cleaned_data["value"])
+                    messages.success(request, f"{n} registro(s) actualizado(s).")
+            except IntegrityError:
+                messages.error(request, "No se eliminó nada: otros registros los referencian.")
+            return redirect(back)
+
+        return render(request, self.template_name, {
+            "cfg": cfg,
+            "action": self.action,
+            "scope": scope,
+            "q": q,
+            "pks": pks,
+            "field": fields.get(field_name),
+            "form": form,
+            "rows": qs.count(),
+            "related": related,
+            "back": back,
+        })
@@ -0,0 +1,104 @@
+# productos/catalogs.py
+from typing import Dict, Iterator, Tuple, Type
+import threading
+
+from django.db import transaction
+from django.db.models import Model
+
+from .models_inventario import EstadoEquipo, EstadoMantencion, Marca, TipoEquipo
+from .versioning import bump_version, get_version
+
+# Catálogos: tablas chicas que casi no cambian. Cada proceso guarda una copia
+# en memoria y, en cada uso, compara su versión con la del cache compartido
+# (una lectura de cache, sin BD). Las señales suben la versión al confirmarse
+# cada guardado o borrado, así todos los workers recargan en su siguiente request.
+
+# modelo -> campo con el nombre visible
+CATALOG_MODELS: Dict[Type[Model], str] = {
+    Marca: "nombre_marca",
+    TipoEquipo: "tipo_equipo",
+    EstadoEquipo: "descripcion",
+    EstadoMantencion: "tipo",
+}
+
+_catalogs: Dict[str, "Catalog"] = {}
+_lock = threading.Lock()
+
+
+class Catalog:
+    """Copia inmutable de un catálogo: objetos ordenados por nombre, id -> objeto y nombre -> ids."""
+    __slots__ = ("model", "version", "objects", "by_id", "_by_name")
+
+    def __init__(self, model, label_field: str, objects, version: int):
+        self.model = model
+        self.version = version
+        self.objects: Tuple[Model, ...] = tuple(objects)
+        self.by_id: Dict[int, Model] = {o.pk: o for o in self.objects}
+        by_name: Dict[str, Tuple[int, ...]] = {}
+        for o in self.objects:
+            key = str(getattr(o, label_field) or "").casefold()
+            by_name[key] = by_name.get(key, ()) + (o.pk,)
+        self._by_name = by_name
+
+    def __iter__(self) -> Iterator[Model]:
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def get(self, pk):
+        return self.by_id.get(pk)
+
+    def ids_for(self, name: str) -> Tuple[int, ...]:
+        """PKs cuyo nombre coincide sin distinguir mayúsculas (equivale a __iexact)."""
+        return self._by_name.get(name.casefold(), ())
+
+    def id_for(self, name: str):
+        ids = self.ids_for(name)
+        return ids[0] if ids else None
+
+
+def _version_name(model) -> str:
+    return f"catalog:{model._meta.label_lower}"
+
+
+def get_catalog(model) -> Catalog:
+    label_field = CATALOG_MODELS[model]
+    version = get_version(_version_name(model))
+    cat = _catalogs.get(model._meta.label_lower)
+    if cat is None or cat.version != version:
+        cat = Catalog(model, label_field, model.objects.order_by(label_field), version)
+        with _lock:
+            _catalogs[model._meta.label_lower] = cat
+    return cat
+
+
+def attach(objs, **fks):
+    """
+    Asigna a cada obj el objeto de catálogo de cada FK (p.ej. id_marca=Marca)
+    en vez de traerlo con select_related.
+    """
+    cats = {fk: get_catalog(model) for fk, model in fks.items()}
+    for o in objs:
+        for fk, cat in cats.items():
+            pk = getattr(o, f"{fk}_id")
+            if pk is not None and pk in cat.by_id:
+                setattr(o, fk, cat.by_id[pk])
+    return objs
+
+
+def invalidate_catalog(sender, **kwargs):
+    label = sender._meta.label_lower
+
+    def bump():
+        bump_version(_version_name(sender))
+        with _lock:
+            _catalogs.pop(label, None)
+
+    # este proceso suelta su copia ya (lo que siga en la transacción lee los
+    # nombres nuevos); la versión compartida sube al confirmarse, como en
+    # http_cache.touch_tables: antes, otro worker podría recargar los nombres
+    # viejos y guardarlos con la versión nueva
+    with _lock:
+        _catalogs.pop(label, None)
+    transaction.on_commit(bump)
@@ -1,21 +1,54 @@
 # productos/crud.py
 from dataclasses import dataclass, field
-from typing import Sequence, List, Dict, Type
+from types import MappingProxyType
+from typing import Callable, Sequence, List, Dict, Mapping, Set, Type, Tuple
+import ast
 import csv
+import inspect
+import io
+import textwrap
 
 from django.apps import apps
-from django.db.models import Q, Model, CharField, TextField, BooleanField, \
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, CharField, TextField, BooleanField, \
                              IntegerField, FloatField, ForeignKey, DateField, DateTimeField
-from django.forms import modelform_factory
-from django.http import HttpResponse
-from django.urls import path, reverse_lazy
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.urls import path, reverse, reverse_lazy
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from .http_cache import ConditionalPageMixin
+from .importer import ImportFileError, ImportForm, Importer, import_columns
 from .mixins import ModelPermsMixin
+from .perms import has
+from .rows import compile_accessors
+from .pagination import ApproximatePaginator, approximate_count, keyset_paginate, keyset_ordering
+from .search import get_search_backend
 
 # ---------- Config e inferencia ----------
 
-@dataclass
+ACTIONS = ("view", "add", "change", "delete")
+URL_ACTIONS = ("list", "create", "update", "delete", "csv", "import", "autocomplete", "bulk")
+
+ICON_MAP = {
+    "empresa": "bi-buildings",
+    "proveedor": "bi-truck",
+    "departamento": "bi-diagram-3",
+    "empleado": "bi-people",
+    "equipo": "bi-cpu",
+    "tipoequipo": "bi-hdd-stack",
+    "estadoequipo": "bi-check2-circle",
+    "atributosequipo": "bi-sliders",
+    "factura": "bi-receipt",
+    "detallefactura": "bi-list-check",
+    "mantencion": "bi-tools",
+    "estadomantencion": "bi-clipboard2-check",
+    "marca": "bi-tag",
+}
+DEFAULT_ICON = "bi-grid-3x3-gap"
+
+@dataclass(frozen=True, slots=True)
 class CrudConfig:
     model: Type[Model]
     slug: str                     # p.ej. "equipos"
@@ -24,8 +57,33 @@ class CrudConfig:
     search_fields: Sequence[str] = field(default_factory=list)  # campos texto
     ordering: Sequence[str] = field(default_factory=lambda: ("id",))
     label_attr: str | None = None 
+    select_related: Sequence[str] = field(default_factory=tuple)  # plan de joins
+    count_estimate: bool = False  # conteo aproximado (pg_class.reltuples) en el panel
+    pagination: str = "offset"    # "offset" (Paginator) | "keyset" (after=/before=)
+    approximate_count: bool = False  # total del listado estimado por el planner
+    icon: str = DEFAULT_ICON
+    perms: Mapping[str, str] = field(default_factory=dict)      # "view" -> "productos.view_equipo"
+    url_names: Mapping[str, str] = field(default_factory=dict)  # "list" -> "productos:equipos_list"
+    accessors: Tuple[Callable, ...] = field(default_factory=tuple)  # uno por columna (ver rows.py)
+
+    def base_queryset(self):
+        # queryset de partida con el plan de joins ya aplicado
+        qs = self.model.objects.all()
+        if self.select_related:
+            qs = qs.select_related(*self.select_related)
+        return qs
+
+    def read_models(self) -> Tuple[Type[Model], ...]:
+        """Modelos que lee el listado: el propio y los del plan de joins (ETag y fragmentos)."""
+        models = [self.model]
+        for path_ in self.select_related:
+            m = self.model
+            for name in path_.split("__"):
+                m = m._meta.get_field(name).related_model
+                if m not in models:
+                    models.append(m)
+        return tuple(models)
 
-    
     # devuelve una etiqueta legible para un objeto
     def obj_label(self, obj):
         # 1) si especificas label_attr en el registro de este modelo
@@ -65,35 +123,30 @@ def infer_text_fields(m: Type[Model]) -> List[str]:
     rest = [n for n in names if n not in prefer]
     return prefer + rest
 
+LIST_PREFER_ORDER = (
+    "rut", "nombre", "apellido_paterno", "apellido_materno",
+    "correo", "telefono", "descripcion", "codigo", "serie",
+    "departamento", "empresa", "marca", "tipo_equipo"
+)
+LIST_FIELD_TYPES = (CharField, TextField, BooleanField, IntegerField, FloatField,
+                    DateField, DateTimeField, ForeignKey)
+
 def infer_list_display(m: Type[Model]) -> List[str]:
     pk_name = m._meta.pk.name
     cols: List[str] = [pk_name]
-
-    # Campos que queremos priorizar si existen
-    prefer_order = (
-        "rut", "nombre", "apellido_paterno", "apellido_materno",
-        "correo", "telefono", "descripcion", "codigo", "serie",
-        "departamento", "empresa", "marca", "tipo_equipo"
-    )
+    by_name = {f.name: f for f in m._meta.fields}
 
     # 1) agrega preferidos en orden si existen y no son el PK
-    for name in prefer_order:
-        f = next((f for f in m._meta.fields if f.name == name), None)
-        if f and f.name not in cols and f.name != pk_name:
-            cols.append(f.name)
+    for name in LIST_PREFER_ORDER:
+        if name in by_name and name not in cols:
+            cols.append(name)
 
     # 2) completa con el resto de campos “mostrables”
     for f in m._meta.fields:
         if f.name in ("id", pk_name):   # <-- evita duplicar el PK
             continue
-        from django.db.models import (
-            CharField, TextField, BooleanField, IntegerField, FloatField,
-            DateField, DateTimeField, ForeignKey
-        )
-        if isinstance(f, (CharField, TextField, BooleanField, IntegerField, FloatField,
-                          DateField, DateTimeField, ForeignKey)):
-            if f.name not in cols:
-                cols.append(f.name)
+        if isinstance(f, LIST_FIELD_TYPES) and f.name not in cols:
+            cols.append(f.name)
 
         # sube el límite si quieres ver aún más columnas
         if len(cols) >= 9:  # pk + 8 útiles
@@ -102,19 +155,119 @@ def infer_list_display(m: Type[Model]) -> List[str]:
     return cols or [pk_name]
 
 
+def _str_attrs(m: Type[Model]) -> Set[str] | None:
+    """Atributos self.<x> que lee el __str__ propio del modelo (None si no se puede analizar)."""
+    fn = m.__dict__.get("__str__")
+    if fn is None:
+        return None
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(fn)))
+    except (OSError, TypeError, SyntaxError):
+        return None
+    return {
+        node.attr for node in ast.walk(tree)
+        if isinstance(node, ast.Attribute)
+        and isinstance(node.value, ast.Name) and node.value.id == "self"
+    }
+
+def _str_fk_names(m: Type[Model]) -> List[str]:
+    """FKs que usa el __str__ propio del modelo (accesos self.<fk>)."""
+    used = _str_attrs(m) or set()
+    return [f.name for f in m._meta.fields if isinstance(f, ForeignKey) and f.name in used]
+
+def bulk_fields(model: Type[Model]) -> List:
+    """Campos que se pueden fijar en masa: editables, no PK y no únicos."""
+    return [f for f in model._meta.concrete_fields if f.editable and not f.primary_key and not f.unique]
+
+
+def infer_label_fields(m: Type[Model], max_depth: int = 3) -> Tuple[str, ...] | None:
+    """
+    Campos (para .only()) que necesita str(obj), incluidos los de las FK que
+    recorre el __str__ (p.ej. Equipo -> id_marca__nombre_marca). None si el
+    __str__ usa algo que no es un campo: ahí se cargan todos.
+    """
+    out: List[str] = []
+
+    def walk(model, prefix, depth) -> bool:
+        used = _str_attrs(model)
+        if used is None:
+            return False
+        fields = {f.name: f for f in model._meta.concrete_fields}
+        by_attname = {f.attname: f for f in fields.values()}
+        out.append(f"{prefix}{model._meta.pk.name}")
+        for attr in sorted(used):
+            f = fields.get(attr)
+            if f is not None and isinstance(f, ForeignKey):
+                if depth >= max_depth or not walk(f.related_model, f"{prefix}{f.name}__", depth + 1):
+                    return False
+            elif f is not None or attr in by_attname:
+                out.append(f"{prefix}{(f or by_attname[attr]).name}")
+            elif attr != "pk":
+                return False
+        return True
+
+    return tuple(dict.fromkeys(out)) if walk(m, "", 1) else None
+
+def infer_select_related(m: Type[Model], columns: Sequence[str], max_depth: int = 3) -> Tuple[str, ...]:
+    """
+    Plan de select_related: las FK de `columns` más las FK que necesita el
+    __str__ de cada modelo relacionado (p.ej. Departamento -> id_empresa).
+    """
+    fields = {f.name: f for f in m._meta.fields}
+    roots = [c for c in columns if isinstance(fields.get(c), ForeignKey)]
+    roots += [n for n in _str_fk_names(m) if n not in roots]
+
+    paths: List[str] = []
+
+    def walk(model, prefix, names, depth):
+        for name in names:
+            rel = model._meta.get_field(name).related_model
+            path_ = f"{prefix}{name}"
+            if path_ in paths:
+                continue
+            paths.append(path_)
+            if depth < max_depth:
+                walk(rel, f"{path_}__", _str_fk_names(rel), depth + 1)
+
+    walk(m, "", roots, 1)
+    # basta con las hojas: select_related("a__b") ya incluye "a"
+    leaves = [p for p in paths if not any(o.startswith(f"{p}__") for o in paths)]
+    return tuple(leaves)
+
 def make_slug(m: Type[Model]) -> str:
     # plural simple: agrega 's'. Para nombres que ya terminen en 's' se mantiene.
     base = m._meta.model_name
     return base if base.endswith("s") else f"{base}s"
 
+def icon_for(m: Type[Model]) -> str:
+    key = m._meta.model_name
+    if key in ICON_MAP:
+        return ICON_MAP[key]
+    # busca coincidencias parciales razonables
+    for k, v in ICON_MAP.items():
+        if k in key:
+            return v
+    return DEFAULT_ICON
+
 def build_config(m: Type[Model]) -> CrudConfig:
+    list_display = tuple(infer_list_display(m))
+    slug = make_slug(m)
+    opts = m._meta
     return CrudConfig(
         model=m,
-        slug=make_slug(m),
+        slug=slug,
         verbose_plural=m._meta.verbose_name_plural.title(),
-        list_display=infer_list_display(m),
-        search_fields=infer_text_fields(m),
+        list_display=list_display,
+        search_fields=tuple(infer_text_fields(m)),
         ordering=(m._meta.pk.name,),
+        select_related=infer_select_related(m, list_display),
+        count_estimate=m._meta.label_lower in getattr(settings, "CRUD_COUNT_ESTIMATE", ()),
+        pagination="keyset" if m._meta.label_lower in getattr(settings, "CRUD_KEYSET_PAGINATION", ()) else "offset",
+        approximate_count=m._meta.label_lower in getattr(settings, "CRUD_APPROXIMATE_COUNT", ()),
+        icon=icon_for(m),
+        perms=MappingProxyType({a: f"{opts.app_label}.{a}_{opts.model_name}" for a in ACTIONS}),
+        url_names=MappingProxyType({a: f"productos:{slug}_{a}" for a in URL_ACTIONS}),
+        accessors=compile_accessors(list_display),
     )
 
 # ---------- Vistas genéricas ----------
@@ -141,36 +294,61 @@ def build_config(m: Type[Model]) -> CrudConfig:
 
 
 
-class GenericList(ModelPermsMixin, ListView):
+class GenericList(ModelPermsMixin, ConditionalPageMixin, ListView):
     template_name = "crud/list.html"
     context_object_name = "items"
     paginate_by = 25
     action_perm = "view"
     crud_config: CrudConfig
 
+    def conditional_models(self):
+        return self.crud_config.read_models()
+
+    def get_ordering(self):
+        order = self.request.GET.get("o", "")
+        if not order:
+            return list(self.crud_config.ordering)
+        pk_name = self.model._meta.pk.name
+        if order.lstrip("-") == "id":
+            order = order.replace("id", pk_name, 1)
+        return [order]
+
     def get_queryset(self):
         q = self.request.GET.get("q", "").strip()
-        order = self.request.GET.get("o", "")
-        qs = self.model.objects.all()
-        if q and self.crud_config.search_fields:
-            cond = Q()
-            for f in self.crud_config.search_fields:
-                cond |= Q(**{f"{f}__icontains": q})
-            qs = qs.filter(cond)
-        if order:
-            pk_name = self.model._meta.pk.name
-            if order.lstrip("-") == "id":
-                order = order.replace("id", pk_name, 1)
-            qs = qs.order_by(order)
-        else:
-            qs = qs.order_by(*self.crud_config.ordering)
-        return qs
+        qs = self.crud_config.base_queryset()
+        qs = get_search_backend().filter(qs, q, self.crud_config.search_fields)
+        return qs.order_by(*self.get_ordering())
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if self.crud_config.approximate_count:
+            return ApproximatePaginator(queryset, per_page, **kwargs)
+        return super().get_paginator(queryset, per_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        cfg = self.crud_config
+        if cfg.pagination == "keyset":
+            try:
+                ordering = keyset_ordering(self.model, self.get_ordering())
+            except FieldDoesNotExist:
+                ordering = None
+            # columnas con NULL u orden por relación: se queda con OFFSET
+            if ordering:
+                page = keyset_paginate(
+                    queryset, ordering, page_size,
+                    after=self.request.GET.get("after", ""),
+                    before=self.request.GET.get("before", ""),
+                )
+                if cfg.approximate_count:
+                    page.count = approximate_count(queryset)
+                return (None, page, page.object_list, True)
+        return super().paginate_queryset(queryset, page_size)
 
-def get_context_data(self, **kwargs):
+    def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["q"] = self.request.GET.get("q", "")
         ctx["o"] = self.request.GET.get("o", "")
         ctx["cfg"] = self.crud_config
+        ctx["bulk_fields"] = bulk_fields(self.model)
         return ctx
 
 class GenericCreate(ModelPermsMixin, CreateView):
@@ -179,12 +357,11 @@ class GenericCreate(ModelPermsMixin, CreateView):
     crud_config: CrudConfig
 
     def get_form_class(self):
-        from django.forms import modelform_factory
-        return modelform_factory(self.model, fields="__all__")
+        from .fk_choices import form_class_for  # importa crud.py
+        return form_class_for(self.crud_config)
 
     def get_success_url(self):
-        from django.urls import reverse_lazy
-        return reverse_lazy(f"productos:{self.crud_config.slug}_list")
+        return get_registry().urls(self.crud_config)["list"]
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -198,13 +375,15 @@ class GenericUpdate(ModelPermsMixin, UpdateView):
     action_perm = "change"
     crud_config: CrudConfig
 
+    def get_queryset(self):
+        return self.crud_config.base_queryset()
+
     def get_form_class(self):
-        from django.forms import modelform_factory
-        return modelform_factory(self.model, fields="__all__")
+        from .fk_choices import form_class_for  # importa crud.py
+        return form_class_for(self.crud_config)
 
     def get_success_url(self):
-        from django.urls import reverse_lazy
-        return reverse_lazy(f"productos:{self.crud_config.slug}_list")
+        return get_registry().urls(self.crud_config)["list"]
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -221,9 +400,11 @@ class GenericDelete(ModelPermsMixin, DeleteView):
     action_perm = "delete"
     crud_config: CrudConfig
 
+    def get_queryset(self):
+        return self.crud_config.base_queryset()
+
     def get_success_url(self):
-        from django.urls import reverse_lazy
-        return reverse_lazy(f"productos:{self.crud_config.slug}_list")
+        return get_registry().urls(self.crud_config)["list"]
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -232,30 +413,90 @@ class GenericDelete(ModelPermsMixin, DeleteView):
         ctx["cfg"] = self.crud_config
         return ctx
 
+class GenericImport(ModelPermsMixin, FormView):
+    template_name = "crud/import.html"
+    action_perm = "add"
+    form_class = ImportForm
+    crud_config: CrudConfig
+    max_errors_shown = 200
+
+    def form_valid(self, form):
+        archivo = form.cleaned_data["archivo"]
+        importer = Importer(
+            self.crud_config, user=self.request.user,
+            chunk_size=getattr(settings, "CRUD_IMPORT_CHUNK_SIZE", 1000),
+            dry_run=form.cleaned_data["solo_validar"],
+        )
+        try:
+            report = importer.run(archivo.file, archivo.name)
+        except ImportFileError as e:
+            form.add_error("archivo", str(e))
+            return self.form_invalid(form)
+        return self.render_to_response(self.get_context_data(form=form, report=report))
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        report = ctx.get("report")
+        if report:
+            ctx["errors_shown"] = report.errors[:self.max_errors_shown]
+        ctx["cfg"] = self.crud_config
+        ctx["columns"] = import_columns(self.crud_config.model)
+        return ctx
+
+def iter_export_rows(cfg: CrudConfig, qs, chunk_size: int):
+    """Filas de list_display como listas de str, sin cachear el queryset."""
+    fields = {f.name: f for f in cfg.model._meta.fields}
+    if not any(isinstance(fields.get(c), ForeignKey) for c in cfg.list_display):
+        # solo columnas escalares: tuplas planas, sin instanciar modelos
+        rows = qs.values_list(*cfg.list_display).iterator(chunk_size=chunk_size)
+        for row in rows:
+            yield ["" if v is None else str(v) for v in row]
+        return
+
+    # con FKs se necesita el __str__ del relacionado (ya viene por select_related)
+    for r in qs.iterator(chunk_size=chunk_size):
+        out = []
+        for col in cfg.list_display:
+            val = getattr(r, col, "")
+            out.append("" if val is None else str(val))
+        yield out
+
+def iter_csv_chunks(cfg: CrudConfig, qs, chunk_size: int):
+    """Genera el CSV en bloques de `chunk_size` filas (el encabezado va solo, primero)."""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(cfg.list_display)
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate(0)
+
+    for i, row in enumerate(iter_export_rows(cfg, qs, chunk_size), start=1):
+        w.writerow(row)
+        if i % chunk_size == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue()
+
 def export_csv_view(model: Type[Model], cfg: CrudConfig):
     def view(request):
-        if not request.user.has_perm(f"{model._meta.app_label}.view_{model._meta.model_name}"):
+        if not has(request.user, "view", cfg):
             return HttpResponse(status=403)
 
         q = request.GET.get("q", "").strip()
-        rows = model.objects.all()
-        if q and cfg.search_fields:
-            cond = Q()
-            for f in cfg.search_fields:
-                cond |= Q(**{f"{f}__icontains": q})
-            rows = rows.filter(cond)
-
-        resp = HttpResponse(content_type="text/csv")
+        if getattr(settings, "CRUD_EXPORT_JOBS", True):
+            # lo genera `manage.py runworker`; la página de la tarea muestra la descarga
+            from .jobs import enqueue  # importa crud.py
+            job = enqueue("crud_csv", {"slug": cfg.slug, "q": q}, request.user, reuse=True)
+            return redirect("productos:job_detail", pk=job.pk)
+
+        rows = get_search_backend().filter(cfg.base_queryset(), q, cfg.search_fields)
+        rows = rows.order_by(*cfg.ordering)
+
+        chunk_size = getattr(settings, "CRUD_EXPORT_CHUNK_SIZE", 2000)
+        resp = StreamingHttpResponse(iter_csv_chunks(cfg, rows, chunk_size), content_type="text/csv")
         resp["Content-Disposition"] = f'attachment; filename="{cfg.slug}.csv"'
-        w = csv.writer(resp)
-        w.writerow(cfg.list_display)
-
-        for r in rows:
-            out = []
-            for col in cfg.list_display:
-                val = getattr(r, col, "")
-                out.append("" if val is None else str(val))
-            w.writerow(out)
         return resp
     return view
 
@@ -263,8 +504,62 @@ def export_csv_view(model: Type[Model], cfg: CrudConfig):
 # ---------- Registro automático de modelos y URL patterns ----------
 
 def discover_producto_models() -> List[Type[Model]]:
-    """Toma todos los modelos de la app 'productos' (incluye models_inventario si está importado)."""
-    return list(apps.get_app_config("productos").get_models())
+    """Modelos del inventario (models_inventario); las tablas propias de la app (models.py) no van al CRUD."""
+    return [m for m in apps.get_app_config("productos").get_models()
+            if m.__module__.endswith(".models_inventario")]
+
+class CrudRegistry:
+    """
+    CrudConfig de todos los modelos, construidos una sola vez (ProductosConfig.ready).
+    Búsqueda O(1) por modelo, label ("productos.equipo") o slug ("equipos").
+    """
+    __slots__ = ("configs", "_by_label", "_by_slug", "_urls")
+
+    def __init__(self, configs):
+        self.configs: Tuple[CrudConfig, ...] = tuple(configs)
+        self._by_label = MappingProxyType({c.model._meta.label_lower: c for c in self.configs})
+        self._by_slug = MappingProxyType({c.slug: c for c in self.configs})
+        self._urls: Dict[str, Mapping[str, str]] = {}
+
+    def __iter__(self):
+        return iter(self.configs)
+
+    def __len__(self):
+        return len(self.configs)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key) -> CrudConfig | None:
+        """Acepta una clase de modelo, una instancia, un label o un slug."""
+        if isinstance(key, str):
+            return self._by_label.get(key.lower()) or self._by_slug.get(key)
+        return self._by_label.get(key._meta.label_lower)
+
+    def by_slug(self, slug: str) -> CrudConfig:
+        return self._by_slug[slug]
+
+    def urls(self, cfg: CrudConfig) -> Mapping[str, str]:
+        """URLs sin argumentos (list/create/csv/import), revertidas una vez y memorizadas."""
+        urls = self._urls.get(cfg.slug)
+        if urls is None:
+            urls = MappingProxyType({a: reverse(cfg.url_names[a]) for a in ("list", "create", "csv", "import")})
+            self._urls[cfg.slug] = urls
+        return urls
+
+_registry: CrudRegistry | None = None
+
+def build_registry(models: Sequence[Type[Model]] | None = None) -> CrudRegistry:
+    global _registry
+    models = models if models is not None else discover_producto_models()
+    _registry = CrudRegistry(build_config(m) for m in models)
+    return _registry
+
+def get_registry() -> CrudRegistry:
+    return _registry if _registry is not None else build_registry()
+
+def get_crud_configs() -> Tuple[CrudConfig, ...]:
+    return get_registry().configs
 
 def view_class(model, cfg, base_cls):
     # Crea una subclase dinámica con el modelo y la cfg incrustados
@@ -275,16 +570,22 @@ def view_class(model, cfg, base_cls):
     )
 
 def make_urlpatterns(include: Sequence[Type[Model]] | None = None):
-    models = include if include else discover_producto_models()
+    from .bulk import GenericBulk  # importa crud.py
+    from .fk_choices import autocomplete_view  # importa crud.py
+    registry = get_registry()
+    configs = [registry.get(m) or build_config(m) for m in include] if include else registry
     patterns = []
-    for m in models:
-        cfg = build_config(m)
+    for cfg in configs:
+        m = cfg.model
 
         ListCls   = view_class(m, cfg, GenericList)
         CreateCls = view_class(m, cfg, GenericCreate)
         UpdateCls = view_class(m, cfg, GenericUpdate)
         DeleteCls = view_class(m, cfg, GenericDelete)
+        ImportCls = view_class(m, cfg, GenericImport)
+        BulkCls   = view_class(m, cfg, GenericBulk)
         csv_view  = export_csv_view(m, cfg)
+        autocomplete = autocomplete_view(cfg)
 
         patterns += [
             path(f"{cfg.slug}/",                ListCls.as_view(),   name=f"{cfg.slug}_list"),
@@ -292,33 +593,8 @@ def make_urlpatterns(include: Sequence[Type[Model]] | None = None):
             path(f"{cfg.slug}/<int:pk>/editar/",UpdateCls.as_view(), name=f"{cfg.slug}_update"),
             path(f"{cfg.slug}/<int:pk>/eliminar/", DeleteCls.as_view(), name=f"{cfg.slug}_delete"),
             path(f"{cfg.slug}/exportar/csv/",   csv_view,            name=f"{cfg.slug}_csv"),
+            path(f"{cfg.slug}/importar/",       ImportCls.as_view(), name=f"{cfg.slug}_import"),
+            path(f"{cfg.slug}/autocomplete/<str:field>/", autocomplete, name=f"{cfg.slug}_autocomplete"),
+            path(f"{cfg.slug}/masivo/",         BulkCls.as_view(),   name=f"{cfg.slug}_bulk"),
         ]
     return patterns
-
-# Se exporta listo para incluir desde productos/urls.py
-urlpatterns = make_urlpatterns()
-
-# --- al final de productos/crud.py ---
-
-def _collect_unique_crud_configs():
-    configs = []
-    for p in urlpatterns:
-        vc = getattr(p.callback, "view_class", None)
-        cfg = getattr(vc, "crud_config", None)
-        if cfg:
-            configs.append(cfg)
-
-    # dedup por modelo (único por app_label.model_name)
-    uniq, seen = [], set()
-    for cfg in configs:
-        key = cfg.model._meta.label_lower  # p.ej. "productos.empresa"
-        if key in seen:
-            continue
-        seen.add(key)
-        uniq.append(cfg)
-    return uniq
-
-CRUD_CONFIGS = _collect_unique_crud_configs()
-
-def get_crud_configs():
-    return CRUD_CONFIGS
@@ -0,0 +1,126 @@
+# productos/derived.py
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from typing import Callable, Iterable, Optional, Sequence, Set, Type
+
+from django.db.models import Model
+
+from . import asignaciones, gastos, listing, programacion
+from .catalogs import CATALOG_MODELS, invalidate_catalog
+from .http_cache import touch_tables
+from .kpis import KPI_MODELS, invalidate_home_kpis
+from .models_inventario import Equipo, EstadoMantencion
+from .search import get_search_backend
+
+# Lo que mantienen las señales (signals.py), para las escrituras que no las
+# emiten: bulk_create / bulk_update del importador, UPDATE / DELETE por
+# conjunto de las acciones masivas y la carga de seed_bench. Índice de
+# búsqueda, rollup de gasto, listado de equipos, cola de mantenciones,
+# historial de asignaciones, conteos, KPIs, catálogos y versión de la tabla:
+# un derivado nuevo se agrega aquí y en su receptor de señal, en ningún otro lado.
+
+CHUNK_SIZE = 500
+
+
+def _chunks(pks: Iterable, size: int = CHUNK_SIZE):
+    it = iter(pks)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+@dataclass
+class Antes:
+    """Lo que las filas aportan a los derivados antes de cambiarlas (meses de gasto, equipos del listado)."""
+    meses: Set[date] = field(default_factory=set)
+    equipos: Set[int] = field(default_factory=set)
+
+
+def before_bulk_write(model: Type[Model], pks: Sequence) -> Antes:
+    """Llamar antes de un UPDATE / DELETE por conjunto (o bulk_update) sobre `pks`."""
+    antes = Antes()
+    for chunk in _chunks(pks):
+        if model in gastos.GASTO_MODELS:
+            antes.meses |= gastos.meses_en_bd(model, chunk)
+        if model in listing.SOURCE_MODELS:
+            antes.equipos |= listing.equipos_de(model, chunk)
+    return antes
+
+
+def _invalidate(models: Iterable[Type[Model]]):
+    from .stats import invalidate_module_counts  # stats importa crud
+    models = set(models)
+    invalidate_module_counts()
+    if any(m.__name__ in KPI_MODELS for m in models):
+        invalidate_home_kpis()
+    for m in models & set(CATALOG_MODELS):
+        invalidate_catalog(m)
+    touch_tables(*models)
+
+
+def after_bulk_write(model: Type[Model], pks: Sequence, *, before: Optional[Antes] = None,
+                     deleted: bool = False, reindex: bool = True):
+    """
+    Actualiza los derivados tras escribir `pks` de `model` sin señales.
+    `before`: resultado de before_bulk_write (filas actualizadas o borradas);
+    reindex=False si no cambió ningún campo de búsqueda.
+    """
+    pks = list(pks)
+    if not pks:
+        return
+    antes = before or Antes()
+    despues = Antes() if deleted else before_bulk_write(model, pks)
+
+    gastos.marcar_meses(antes.meses | despues.meses)
+    equipos = antes.equipos | despues.equipos
+    if equipos:
+        listing.refresh(equipos)
+        if model in programacion.SCHEDULE_MODELS:
+            programacion.refresh(equipos)
+    if model in listing.RELATED:
+        listing.rename(model, pks, deleted=deleted)
+    if model is EstadoMantencion and not deleted:
+        invalidate_catalog(model)
+        programacion.refresh(programacion.equipos_de(model, pks))
+    if model is Equipo:
+        asignaciones.sync(pks)
+
+    backend = get_search_backend()
+    if deleted:
+        backend.unindex_pks(model, pks)
+    elif reindex:
+        for chunk in _chunks(pks):
+            backend.index_objects(model, list(model._base_manager.filter(pk__in=chunk)))
+
+    _invalidate([model])
+
+
+def after_bulk_load(models: Sequence[Type[Model]], log: Callable[[str], None] = lambda msg: None):
+    """Tras cargar tablas completas sin señales (seed_bench): reconstruye los derivados de esos modelos."""
+    from .crud import get_registry  # crud importa importer, que importa este módulo
+    from .models import AsignacionEquipo, EquipoListing, GastoMensual, MantencionProgramada
+
+    models = set(models)
+    rebuilt = set()
+    if models & set(gastos.GASTO_MODELS):
+        log(f"gasto_mensual: {gastos.rebuild()}")
+        rebuilt.add(GastoMensual)
+    if models & set(listing.LISTING_MODELS):
+        log(f"equipo_listing: {listing.rebuild(chunk_size=2000)}")
+        rebuilt.add(EquipoListing)
+    if models & set(programacion.SCHEDULE_MODELS):
+        log(f"mantencion_programada: {programacion.rebuild()}")
+        rebuilt.add(MantencionProgramada)
+    if Equipo in models:
+        ids = Equipo.objects.order_by("pk").values_list("pk", flat=True)
+        log(f"asignacion_equipo: {asignaciones.sync(ids.iterator(chunk_size=2000), chunk_size=2000)} abiertas")
+        rebuilt.add(AsignacionEquipo)
+
+    backend = get_search_backend()
+    for cfg in get_registry():
+        if cfg.model in models and cfg.search_fields:
+            log(f"búsqueda {cfg.slug}: {backend.build_index(cfg.model, cfg.search_fields)}")
+    if models & set(listing.LISTING_MODELS):
+        log(f"búsqueda equipo_listing: {backend.build_index(EquipoListing, listing.LISTING_SEARCH_FIELDS)}")
+
+    _invalidate(models | rebuilt)
@@ -0,0 +1,76 @@
+# productos/fanout.py
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+# Consultas independientes de los paneles en paralelo: cada tarea corre en un
+# hilo de un pool acotado (PANEL_QUERY_WORKERS) con su propia conexión a la BD,
+# así la latencia del panel es la de la consulta más lenta y no la suma.
+# El ORM async de Django (acount, aiterator...) no sirve para esto: todas sus
+# llamadas pasan por el mismo hilo (thread_sensitive) y se ejecutan en serie.
+
+Tasks = Dict[str, Callable[[], Any]]
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_worker = threading.local()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, "PANEL_QUERY_WORKERS", 4),
+                thread_name_prefix="panel-query",
+            )
+    return _pool
+
+
+def _run(fn):
+    # mismo ciclo de vida que un request: respeta CONN_MAX_AGE y CONN_HEALTH_CHECKS
+    _worker.active = True
+    close_old_connections()
+    try:
+        return fn()
+    finally:
+        close_old_connections()
+        _worker.active = False
+
+
+def _serial() -> bool:
+    # dentro de una transacción (p.ej. TestCase) otras conexiones no ven sus
+    # cambios; dentro de un hilo del pool, anidar podría agotarlo
+    return (getattr(settings, "PANEL_QUERY_WORKERS", 4) <= 1
+            or connection.in_atomic_block
+            or getattr(_worker, "active", False))
+
+
+def run_serial(tasks: Tasks) -> Dict[str, Any]:
+    return {name: fn() for name, fn in tasks.items()}
+
+
+def run_parallel(tasks: Tasks) -> Dict[str, Any]:
+    """Ejecuta `tasks` en el pool y devuelve {nombre: resultado} (en serie si no se puede)."""
+    if len(tasks) <= 1 or _serial():
+        return run_serial(tasks)
+    futures = {name: _executor().submit(_run, fn) for name, fn in tasks.items()}
+    return {name: f.result() for name, f in futures.items()}
+
+
+async def gather(tasks: Tasks) -> Dict[str, Any]:
+    """
+    Versión async de run_parallel, para vistas ASGI: espera las tareas sin
+    bloquear el loop. Una sola tarea también va al pool, para que varios
+    gather() de la misma vista corran a la vez.
+    """
+    if await sync_to_async(_serial)():
+        return await sync_to_async(run_serial)(tasks)
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(_executor(), _run, fn) for fn in tasks.values()))
+    return dict(zip(tasks, results))
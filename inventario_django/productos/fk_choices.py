@@ -0,0 +1,198 @@
+# productos/fk_choices.py
+from typing import Dict, List, Type
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignKey, Model, Q
+from django.forms.models import ModelChoiceIterator, modelform_factory
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from .catalogs import CATALOG_MODELS, get_catalog
+from .crud import CrudConfig, get_registry, infer_label_fields, infer_select_related
+from .perms import has
+from .search import get_search_backend
+from .stats import get_module_counts
+
+# Formularios del CRUD genérico (GenericCreate / GenericUpdate).
+# - La clase del ModelForm se arma una vez por modelo.
+# - Los <select> de FK cargan solo lo que necesita el __str__ del relacionado
+#   (select_related + only, ver infer_label_fields); los catálogos salen de la
+#   copia en memoria (catalogs.py), sin consultas.
+# - Si la tabla relacionada supera CRUD_FK_AUTOCOMPLETE_THRESHOLD filas, el
+#   <select> lleva solo la opción elegida y un buscador que consulta
+#   <slug>/autocomplete/<campo>/ (JSON paginado por PK).
+
+
+def label_queryset(model: Type[Model]):
+    """Queryset mínimo para str(obj): joins del __str__ y solo sus columnas."""
+    qs = model._default_manager.all()
+    related = infer_select_related(model, [])
+    if related:
+        qs = qs.select_related(*related)
+    fields = infer_label_fields(model)
+    return qs.only(*fields) if fields else qs
+
+
+def _threshold() -> int:
+    return getattr(settings, "CRUD_FK_AUTOCOMPLETE_THRESHOLD", 200)
+
+
+def is_large(model: Type[Model]) -> bool:
+    """Tabla demasiado grande para un <select> completo (conteo de los paneles, en cache)."""
+    if model in CATALOG_MODELS:
+        return False
+    return get_module_counts().get(model._meta.label_lower, 0) > _threshold()
+
+
+class LeanChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.label_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.label_objects()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.label_objects())
+
+
+class LeanModelChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField cuyas opciones salen del catálogo en memoria o de label_queryset()."""
+    iterator = LeanChoiceIterator
+
+    def label_objects(self) -> List[Model]:
+        model = self.queryset.model
+        if model in CATALOG_MODELS:
+            return list(get_catalog(model))
+        qs = label_queryset(model)
+        if self.queryset.query.has_filters():  # limit_choices_to
+            qs = qs.filter(pk__in=self.queryset.values("pk"))
+        return list(qs)
+
+
+class AutocompleteSelect(forms.Select):
+    """<select> con solo la opción elegida más un buscador (JSON de autocomplete_view)."""
+
+    def __init__(self, url: str, model: Type[Model], attrs=None):
+        super().__init__(attrs)
+        self.url = url
+        self.model = model
+
+    def optgroups(self, name, value, attrs=None):
+        ids = [v for v in value if v not in ("", None)]
+        objs = list(label_queryset(self.model).filter(pk__in=ids)) if ids else []
+        self.choices = [("", "---------")] + [(o.pk, str(o)) for o in objs]
+        return super().optgroups(name, value, attrs)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        select = super().render(name, value, attrs, renderer)
+        return format_html(
+            '<div class="fk-autocomplete" data-url="{}">'
+            '<input type="search" class="form-control form-control-sm mb-1" placeholder="Buscar..." '
+            'autocomplete="off" data-fk-search>{}</div>{}',
+            self.url, select, AUTOCOMPLETE_JS,
+        )
+
+
+# un solo listener por página (el script se repite en cada campo)
+AUTOCOMPLETE_JS = mark_safe("""<script>
+if (!window.fkAutocomplete) {
+  window.fkAutocomplete = true;
+  let timer;
+  document.addEventListener("input", (ev) => {
+    const input = ev.target.closest("[data-fk-search]");
+    if (!input) return;
+    const box = input.closest(".fk-autocomplete"), select = box.querySelector("select");
+    clearTimeout(timer);
+    timer = setTimeout(async () => {
+      const resp = await fetch(box.dataset.url + "?q=" + encodeURIComponent(input.value));
+      if (!resp.ok) return;
+      const data = await resp.json(), keep = select.value;
+      [...select.options].forEach(o => { if (o.value && o.value !== keep) o.remove(); });
+      data.results.forEach(r => { if (String(r.id) !== keep) select.add(new Option(r.text, r.id)); });
+      if (data.more) {
+        const hint = new Option("... (afine la búsqueda)", "");
+        hint.disabled = true;
+        select.add(hint);
+      }
+    }, 250);
+  });
+}
+</script>""")
+
+
+def _formfield(db_field, **kwargs):
+    if isinstance(db_field, ForeignKey):
+        return db_field.formfield(form_class=LeanModelChoiceField, **kwargs)
+    return db_field.formfield(**kwargs)
+
+
+def use_autocomplete(cfg: CrudConfig, name: str, field: forms.Field):
+    """Cambia el <select> del FK `name` de `cfg` por autocompletar si la tabla es grande."""
+    if isinstance(field, LeanModelChoiceField) and is_large(field.queryset.model):
+        url = reverse(cfg.url_names["autocomplete"], args=[name])
+        field.widget = AutocompleteSelect(url, field.queryset.model, field.widget.attrs)
+
+
+class LeanModelForm(forms.ModelForm):
+    """Elige en cada formulario entre <select> completo y autocompletar según el tamaño de la tabla."""
+    crud_config: CrudConfig
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            use_autocomplete(self.crud_config, name, field)
+
+
+_forms: Dict[Type[Model], Type[forms.ModelForm]] = {}
+
+
+def form_class_for(cfg: CrudConfig) -> Type[forms.ModelForm]:
+    """ModelForm de todos los campos del modelo, construido una vez por modelo."""
+    form = _forms.get(cfg.model)
+    if form is None:
+        form = modelform_factory(cfg.model, form=LeanModelForm, fields="__all__", formfield_callback=_formfield)
+        form.crud_config = cfg
+        _forms[cfg.model] = form
+    return form
+
+
+def autocomplete_view(cfg: CrudConfig):
+    """JSON {"results": [{"id", "text"}], "more", "next"} para un FK de `cfg`: ?q= y ?after=<pk>."""
+    def view(request, field):
+        if not (has(request.user, "add", cfg) or has(request.user, "change", cfg)):
+            return HttpResponse(status=403)
+        try:
+            db_field = cfg.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            raise Http404
+        if not isinstance(db_field, ForeignKey):
+            raise Http404
+        target = db_field.related_model
+
+        qs = label_queryset(target)
+        q = request.GET.get("q", "").strip()
+        if q:
+            target_cfg = get_registry().get(target)
+            found = get_search_backend().filter(qs, q, target_cfg.search_fields if target_cfg else ())
+            qs = qs.filter(Q(pk__in=found.values("pk")) | (Q(pk=int(q)) if q.isdigit() else Q()))
+        after = request.GET.get("after", "")
+        if after.isdigit():
+            qs = qs.filter(pk__gt=int(after))
+
+        size = getattr(settings, "CRUD_AUTOCOMPLETE_PAGE_SIZE", 20)
+        objs = list(qs.order_by("pk")[:size + 1])
+        more = len(objs) > size
+        objs = objs[:size]
+        return JsonResponse({
+            "results": [{"id": o.pk, "text": str(o)} for o in objs],
+            "more": more,
+            "next": objs[-1].pk if more else None,
+        })
+    return view
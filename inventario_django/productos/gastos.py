@@ -0,0 +1,130 @@
+# productos/gastos.py
+from datetime import date, timedelta
+from typing import Iterable, Set
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .kpis import invalidate_home_kpis
+from .models import GastoMensual
+from .models_inventario import DetalleFactura, Equipo, Factura
+
+# Rollup de gasto (GastoMensual): una fila por mes/proveedor/tipo de equipo.
+# Las señales de Factura, DetalleFactura y Equipo (cambio de tipo) marcan los
+# meses afectados; al confirmar la transacción se recalculan solo esos meses.
+# `manage.py rebuild_gastos` lo reconstruye completo.
+
+_local = threading.local()
+
+
+def _mes(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _mes_siguiente(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def gasto_rows(meses: Iterable[date] | None = None):
+    """Agregado de DetalleFactura por (mes, proveedor, tipo), opcionalmente solo de `meses`."""
+    lineas = DetalleFactura.objects.filter(id_factura__fecha_emision__isnull=False)
+    if meses is not None:
+        cond = Q()
+        for m in meses:
+            cond |= Q(id_factura__fecha_emision__gte=m, id_factura__fecha_emision__lt=_mes_siguiente(m))
+        lineas = lineas.filter(cond)
+    return (
+        lineas.annotate(mes=TruncMonth("id_factura__fecha_emision"))
+        .values("mes", "id_factura__id_proveedor", "id_equipo__id_tipo_equipo")
+        .annotate(total=Coalesce(Sum("valor_total"), 0), lineas=Count("pk"))
+        .order_by()
+    )
+
+
+def rebuild(meses: Iterable[date] | None = None, chunk_size: int = 2000) -> int:
+    """Recalcula el rollup (todo, o solo `meses`). Devuelve las filas escritas."""
+    destino = GastoMensual.objects.all()
+    if meses is not None:
+        meses = sorted({_mes(m) for m in meses})
+        if not meses:
+            return 0
+        destino = destino.filter(mes__in=meses)
+
+    filas = [
+        GastoMensual(
+            mes=r["mes"],
+            id_proveedor_id=r["id_factura__id_proveedor"],
+            id_tipo_equipo_id=r["id_equipo__id_tipo_equipo"],
+            total=r["total"],
+            lineas=r["lineas"],
+        )
+        for r in gasto_rows(meses).iterator(chunk_size=chunk_size)
+    ]
+    with transaction.atomic():
+        destino.delete()
+        GastoMensual.objects.bulk_create(filas, batch_size=chunk_size)
+    return len(filas)
+
+
+# ---------- mantenimiento incremental ----------
+
+GASTO_MODELS = (Factura, DetalleFactura, Equipo)
+
+
+def meses_en_bd(sender, pks: Iterable) -> Set[date]:
+    """Meses de gasto a los que hoy (en la BD) aportan las filas `pks` de `sender`."""
+    if sender is Factura:
+        fechas = Factura.objects.filter(pk__in=pks).values_list("fecha_emision", flat=True)
+    else:
+        filtro = {"pk__in": pks} if sender is DetalleFactura else {"id_equipo__in": pks}
+        fechas = (DetalleFactura.objects.filter(**filtro)
+                  .values_list("id_factura__fecha_emision", flat=True).distinct())
+    return {_mes(f) for f in fechas if f}
+
+
+def marcar_meses(meses: Iterable[date]):
+    """Agenda el recálculo de `meses` para cuando se confirme la transacción."""
+    meses = set(meses)
+    if meses:
+        # varios callbacks en la misma transacción: el primero recalcula todo
+        _local.__dict__.setdefault("meses", set()).update(meses)
+        transaction.on_commit(_flush)
+
+
+def _flush():
+    meses = _local.__dict__.pop("meses", set())
+    if meses:
+        rebuild(meses)
+        invalidate_home_kpis()
+
+
+def _antes(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._gasto_meses = set()
+    elif sender is Equipo:
+        # solo importa si cambia el tipo de equipo
+        tipo = Equipo.objects.filter(pk=instance.pk).values_list("id_tipo_equipo", flat=True).first()
+        cambia = tipo != instance.id_tipo_equipo_id
+        instance._gasto_meses = meses_en_bd(Equipo, [instance.pk]) if cambia else set()
+    else:
+        instance._gasto_meses = meses_en_bd(sender, [instance.pk])
+
+
+def _despues(sender, instance, **kwargs):
+    meses = getattr(instance, "_gasto_meses", set())
+    if sender is not Equipo and kwargs.get("signal") is post_save:
+        meses = meses | meses_en_bd(sender, [instance.pk])
+    marcar_meses(meses)
+
+
+def connect_gasto_signals():
+    for m in GASTO_MODELS:
+        label = m._meta.label_lower
+        pre_save.connect(_antes, sender=m, dispatch_uid=f"gastos:pre_save:{label}")
+        post_save.connect(_despues, sender=m, dispatch_uid=f"gastos:post_save:{label}")
+        if m is not Equipo:
+            pre_delete.connect(_antes, sender=m, dispatch_uid=f"gastos:pre_delete:{label}")
+            post_delete.connect(_despues, sender=m, dispatch_uid=f"gastos:post_delete:{label}")
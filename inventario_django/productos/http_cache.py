@@ -0,0 +1,122 @@
+# productos/http_cache.py
+from dataclasses import dataclass
+from typing import Iterable, Tuple
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .perms import get_perm_snapshot
+from .versioning import bump_version, get_versions
+
+# Contador de cambios por tabla (versioning.py) + hora del último cambio.
+# Con eso las páginas de solo lectura:
+# - responden GET condicionales (ETag / Last-Modified -> 304 Not Modified), y
+# - arman las claves de sus fragmentos en cache ({% cache %}), que cambian
+#   solas al cambiar cualquiera de las tablas que leen.
+# Las señales (signals.py) tocan la tabla al guardar o borrar; las operaciones
+# masivas (importador) lo hacen a mano.
+
+
+def _label(model) -> str:
+    return model._meta.label_lower
+
+
+def _mtime_key(label: str) -> str:
+    return f"productos:mtime:{label}"
+
+
+def touch_tables(*models):
+    """Marca las tablas como cambiadas, al confirmarse la transacción en curso."""
+    labels = {_label(m) for m in models}
+
+    def bump():
+        for label in labels:
+            bump_version(f"table:{label}")
+        cache.set_many({_mtime_key(label): time.time() for label in labels}, timeout=None)
+
+    # antes del commit otro request podría leer datos viejos y guardarlos con la versión nueva
+    transaction.on_commit(bump)
+
+
+def touch_table(sender, **kwargs):
+    """Receptor de post_save / post_delete."""
+    touch_tables(sender)
+
+
+@dataclass(frozen=True)
+class TableState:
+    digest: str           # cambia si cambia cualquiera de las tablas
+    last_modified: float  # epoch del último cambio conocido
+
+
+def table_state(models: Iterable) -> TableState:
+    labels = sorted({_label(m) for m in models})
+    versions = get_versions(f"table:{label}" for label in labels)
+    mtimes = cache.get_many([_mtime_key(label) for label in labels])
+    now = time.time()
+    for label in labels:
+        if _mtime_key(label) not in mtimes:
+            # sin registro (cache vacío): se asume "recién cambiada"
+            cache.add(_mtime_key(label), now, timeout=None)
+            mtimes[_mtime_key(label)] = now
+    raw = "|".join(f"{k}={v}" for k, v in sorted(versions.items()))
+    return TableState(hashlib.sha1(raw.encode()).hexdigest()[:16], max(mtimes.values(), default=now))
+
+
+def page_etag(request, state: TableState) -> str:
+    """ETag de la página: datos + URL completa + usuario y sus permisos + token CSRF."""
+    user = request.user
+    parts = (
+        state.digest,
+        request.get_full_path(),
+        str(user.pk),
+        # el superusuario puede todo: no hace falta cargar sus permisos
+        "*" if user.is_superuser else ",".join(sorted(get_perm_snapshot(user))),
+        # la página lleva un token derivado del secreto CSRF (formulario de logout)
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    )
+    return '"%s"' % hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+
+
+def fragment_ttl() -> int:
+    return getattr(settings, "FRAGMENT_CACHE_TTL", 300)
+
+
+class ConditionalPageMixin:
+    """
+    GET condicional para vistas de solo lectura. La subclase define
+    conditional_models() con los modelos que lee la página; el estado de esas
+    tablas queda en self.tables (para claves de fragmentos o de cache por vista).
+    """
+    tables: TableState
+
+    def conditional_models(self) -> Tuple:
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        self.tables = table_state(self.conditional_models())
+        # con mensajes pendientes la página no es la misma aunque no cambien los datos
+        if len(get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        etag = page_etag(request, self.tables)
+        last_modified = int(self.tables.last_modified)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(last_modified))
+        # el navegador guarda la página pero revalida siempre
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["fragment_ttl"] = fragment_ttl()
+        ctx["tables_digest"] = self.tables.digest
+        return ctx
@@ -0,0 +1,320 @@
+# productos/importer.py
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+import csv
+import datetime
+import io
+import re
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import CharField
+from django.forms import modelform_factory
+
+from .derived import Antes, after_bulk_write, before_bulk_write
+from .perms import has
+
+# Importación masiva CSV/Excel para los modelos del CRUD genérico.
+# - El archivo se lee en streaming y se procesa en bloques de `chunk_size` filas.
+# - Cada celda se valida con el campo del mismo modelform_factory que usa GenericCreate.
+# - Las FK aceptan el PK o una clave natural (nombre, RUT, tipo...) que se
+#   resuelve con diccionarios precargados: una consulta por FK, no por fila.
+# - Filas con PK existente se actualizan; sin PK se crean. Cada bloque va en su
+#   propia transacción con bulk_create/bulk_update; si la BD rechaza el bloque,
+#   se reintenta fila por fila para reportar cuál falló.
+
+
+class ImportFileError(Exception):
+    """El archivo no se puede leer (formato, encabezado, dependencia faltante)."""
+
+
+@dataclass
+class RowError:
+    line: int
+    errors: Dict[str, List[str]]
+
+    def __str__(self):
+        return "; ".join(f"{k}: {' '.join(v)}" for k, v in self.errors.items())
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    ignored_columns: List[str] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class ImportForm(forms.Form):
+    archivo = forms.FileField(help_text="CSV (UTF-8, separado por , o ;) o Excel .xlsx; la primera fila es el encabezado.")
+    solo_validar = forms.BooleanField(required=False, label="Solo validar (no guarda)")
+
+
+# ---------- Lectura del archivo ----------
+
+def _cell(v):
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return int(v)  # Excel guarda los enteros como float
+    if isinstance(v, datetime.datetime) and v.time() == datetime.time():
+        return v.date()
+    return v
+
+
+def _iter_csv(f) -> Iterator[Sequence]:
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    first = text.readline()
+    # Excel en es-CL exporta con ';'
+    delimiter = ";" if first.count(";") > first.count(",") else ","
+    yield from csv.reader(chain([first], text), delimiter=delimiter)
+
+
+def _iter_xlsx(f) -> Iterator[Sequence]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Para importar Excel instala openpyxl (pip install openpyxl).")
+    wb = load_workbook(f, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield [_cell(v) for v in row]
+    finally:
+        wb.close()
+
+
+def read_table(f, filename: str) -> Tuple[List[str], Iterator[Tuple[int, Sequence]]]:
+    """(encabezado, iterador de (n° de línea, valores)) de un CSV o .xlsx."""
+    rows = _iter_xlsx(f) if filename.lower().endswith((".xlsx", ".xlsm")) else _iter_csv(f)
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFileError("El archivo está vacío.")
+    except UnicodeDecodeError:
+        raise ImportFileError("El CSV debe venir en UTF-8.")
+    body = ((n, r) for n, r in enumerate(rows, start=2) if any(str(v).strip() for v in r))
+    return [str(h or "").strip() for h in header], body
+
+
+# ---------- Columnas y claves naturales ----------
+
+def _norm(v) -> str:
+    # "11.111.111-1" == "11111111-1", "Dell  Inc." == "dell inc"
+    return re.sub(r"[.\s]+", "", str(v)).casefold()
+
+
+def natural_key_fields(model) -> Tuple[str, ...]:
+    """Campos con que se puede nombrar una fila relacionada: CharField únicos y el primer CharField."""
+    chars = [f for f in model._meta.fields if isinstance(f, CharField)]
+    keys = [f.attname for f in chars if f.unique]
+    if chars and chars[0].attname not in keys:
+        keys.append(chars[0].attname)
+    return tuple(keys)
+
+
+class FkLookup:
+    """PK o clave natural -> valor de la FK, cargado con una sola consulta."""
+
+    def __init__(self, fk):
+        rel = fk.related_model
+        target = fk.target_field.attname
+        keys = natural_key_fields(rel)
+        self.pks: Dict[str, object] = {}
+        self.by_key: Dict[str, object] = {}
+        self.ambiguous = set()
+        for row in rel._base_manager.values_list(target, *keys).iterator(chunk_size=5000):
+            self.pks[str(row[0])] = row[0]
+            for v in row[1:]:
+                if not v:
+                    continue
+                k = _norm(v)
+                if self.by_key.setdefault(k, row[0]) != row[0]:
+                    self.ambiguous.add(k)
+        self.keys = keys
+
+    def resolve(self, raw):
+        raw = str(raw).strip()
+        if raw in self.pks:
+            return self.pks[raw]
+        k = _norm(raw)
+        if k in self.ambiguous:
+            raise ValidationError(f"'{raw}' es ambiguo; usa el ID.")
+        if k not in self.by_key:
+            raise ValidationError(f"'{raw}' no existe.")
+        return self.by_key[k]
+
+
+def import_columns(model) -> List[str]:
+    """Encabezados que entiende el importador: el PK (para actualizar) y los campos del formulario."""
+    form_fields = modelform_factory(model, fields="__all__").base_fields
+    return [model._meta.pk.name] + [f.name for f in model._meta.fields if f.name in form_fields]
+
+
+def map_columns(model, form_fields, header: Sequence[str]):
+    """
+    Índice de columna -> campo del modelo (por name, attname, columna o verbose_name).
+    Devuelve (columnas, índice del PK o None, encabezados ignorados).
+    """
+    names = {}
+    for f in model._meta.fields:
+        if f.primary_key or f.name in form_fields:
+            for alias in (f.name, f.attname, f.column, str(f.verbose_name)):
+                names.setdefault(alias.casefold(), f)
+    columns, pk_idx, ignored = [], None, []
+    seen = set()
+    for i, h in enumerate(header):
+        f = names.get(h.casefold())
+        if f is None or f.name in seen:
+            ignored.append(h)
+            continue
+        seen.add(f.name)
+        if f.primary_key:
+            pk_idx = i
+        else:
+            columns.append((i, f))
+    return columns, pk_idx, ignored
+
+
+# ---------- Importación ----------
+
+def _chunks(it: Iterable, size: int):
+    it = iter(it)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+class Importer:
+    def __init__(self, cfg, user=None, chunk_size: int = 1000, dry_run: bool = False):
+        self.cfg = cfg
+        self.model = cfg.model
+        self.user = user
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        # mismos campos y validaciones que el formulario de GenericCreate
+        self.form_fields = modelform_factory(self.model, fields="__all__").base_fields
+        self.can_change = user is None or has(user, "change", cfg)
+
+    def run(self, f, filename: str) -> ImportReport:
+        header, rows = read_table(f, filename)
+        self.columns, self.pk_idx, ignored = map_columns(self.model, self.form_fields, header)
+        if not self.columns:
+            raise ImportFileError("Ninguna columna del encabezado corresponde a un campo de "
+                                  f"{self.cfg.verbose_name}.")
+        present = {f.name for _, f in self.columns}
+        self.missing = [n for n, ff in self.form_fields.items() if ff.required and n not in present]
+        self.lookups = {f.name: FkLookup(f) for _, f in self.columns if f.is_relation}
+
+        report = ImportReport(ignored_columns=ignored, dry_run=self.dry_run)
+        for chunk in _chunks(rows, self.chunk_size):
+            report.rows += len(chunk)
+            self._process(chunk, report)
+        report.errors.sort(key=lambda e: e.line)
+        return report
+
+    def clean_row(self, values) -> Dict[str, object]:
+        data, errors = {}, {}
+        for i, f in self.columns:
+            raw = values[i] if i < len(values) else ""
+            try:
+                if f.is_relation:
+                    if str(raw).strip() == "":
+                        if not f.null:
+                            raise ValidationError(forms.Field.default_error_messages["required"])
+                        data[f.attname] = None
+                    else:
+                        data[f.attname] = self.lookups[f.name].resolve(raw)
+                else:
+                    data[f.attname] = self.form_fields[f.name].clean(raw)
+            except ValidationError as e:
+                errors[f.name] = e.messages
+        if errors:
+            raise ValidationError(errors)
+        return data
+
+    def _process(self, chunk, report: ImportReport):
+        pk_name = self.model._meta.pk.attname
+        parsed = []  # (línea, datos, pk | None)
+        for line, values in chunk:
+            pk = None
+            if self.pk_idx is not None and self.pk_idx < len(values) and str(values[self.pk_idx]).strip():
+                try:
+                    pk = self.model._meta.pk.to_python(values[self.pk_idx])
+                except ValidationError as e:
+                    report.errors.append(RowError(line, {pk_name: e.messages}))
+                    continue
+            try:
+                parsed.append((line, self.clean_row(values), pk))
+            except ValidationError as e:
+                report.errors.append(RowError(line, e.message_dict))
+
+        pks = [pk for _, _, pk in parsed if pk is not None]
+        existing = set(self.model._base_manager.filter(pk__in=pks).values_list("pk", flat=True)) if pks else set()
+
+        to_create, to_update = [], []
+        for line, data, pk in parsed:
+            if pk is None:
+                if self.missing:
+                    report.errors.append(RowError(line, {n: ["Falta la columna (obligatoria para crear)."]
+                                                         for n in self.missing}))
+                    continue
+                to_create.append((line, self.model(**data)))
+            elif pk not in existing:
+                report.errors.append(RowError(line, {pk_name: [f"No existe un registro con ID {pk}."]}))
+            elif not self.can_change:
+                report.errors.append(RowError(line, {"__all__": ["Sin permiso para modificar registros."]}))
+            else:
+                to_update.append((line, self.model(pk=pk, **data)))
+
+        if self.dry_run:
+            report.created += len(to_create)
+            report.updated += len(to_update)
+            return
+        # lo que las filas actualizadas aportaban antes (p.ej. el equipo anterior de una mantención)
+        before = before_bulk_write(self.model, [o.pk for _, o in to_update]) if to_update else Antes()
+        created, updated, saved_one_by_one = self._write(to_create, to_update, report)
+        report.created += len(created)
+        report.updated += len(updated)
+        if not saved_one_by_one:
+            # bulk_create / bulk_update no emiten señales; obj.save() sí (ya se mantuvo todo)
+            after_bulk_write(self.model, [o.pk for o in chain(created, updated)], before=before)
+
+    def _write(self, to_create, to_update, report):
+        """Escribe el bloque; devuelve (creados, actualizados, True si se guardó fila por fila)."""
+        fields = [f.name for _, f in self.columns]
+        try:
+            with transaction.atomic():
+                created = self.model.objects.bulk_create([o for _, o in to_create])
+                updated = [o for _, o in to_update]
+                if updated:
+                    self.model.objects.bulk_update(updated, fields)
+            return created, updated, False
+        except DatabaseError:
+            # la BD rechazó el bloque: fila por fila para aislar la(s) culpable(s)
+            created, updated = [], []
+            with transaction.atomic():
+                for bucket, rows, save in ((created, to_create, self._insert),
+                                           (updated, to_update, self._update(fields))):
+                    for line, obj in rows:
+                        try:
+                            with transaction.atomic():
+                                save(obj)
+                            bucket.append(obj)
+                        except DatabaseError as e:
+                            report.errors.append(RowError(line, {"__all__": [str(e).strip()]}))
+        return created, updated, True
+
+    def _insert(self, obj):
+        obj.save(force_insert=True)
+
+    def _update(self, fields):
+        def save(obj):
+            obj.save(update_fields=fields)
+        return save
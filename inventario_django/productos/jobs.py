@@ -0,0 +1,330 @@
+# productos/jobs.py
+from datetime import timedelta
+from pathlib import Path
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple
+import logging
+import os
+import threading
+import traceback
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db import DatabaseError, close_old_connections
+from django.db.models import F
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.utils import timezone
+
+from .models import Job
+
+# Cola de tareas en la BD (tabla job), sin servicios externos. La vista
+# encola (enqueue) y responde de inmediato; `manage.py runworker` toma las
+# tareas pendientes y ejecuta su handler. Tomar una tarea es un UPDATE
+# condicionado a status = pending: de varios workers, solo uno la obtiene
+# (igual en SQLite y PostgreSQL). Si el handler falla se reintenta con
+# espera creciente hasta max_attempts; una tarea "en proceso" por más de
+# JOB_TIMEOUT sin dar señales de vida (worker caído) vuelve a la cola: cada
+# guardado del avance renueva locked_at, y el resultado solo se registra si
+# el worker sigue teniendo la tarea. Las tareas terminadas y sus
+# archivos se borran pasado JOB_RESULT_TTL (prune(), desde el worker).
+
+logger = logging.getLogger("productos.jobs")
+
+# kind -> handler(job, progress); devuelve el resultado (p.ej. ruta bajo MEDIA_ROOT) o ""
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+
+class PermanentJobError(Exception):
+    """Error que no se arregla reintentando (parámetros inválidos): la tarea falla de inmediato."""
+
+
+def job_handler(kind: str):
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind: str, params: Optional[dict] = None, user=None, max_attempts: Optional[int] = None,
+            reuse: bool = False) -> Job:
+    """
+    Encola una tarea. Con reuse=True devuelve la misma tarea si ese usuario ya
+    tiene una igual en cola o en proceso (doble clic en "Exportar").
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Tipo de tarea desconocido: {kind}")
+    params = params or {}
+    user = user if user is not None and user.is_authenticated else None
+    if reuse:
+        job = (Job.objects.filter(kind=kind, params=params, created_by=user,
+                                  status__in=(Job.PENDING, Job.RUNNING)).order_by("-pk").first())
+        if job is not None:
+            return job
+    return Job.objects.create(
+        kind=kind, params=params, created_by=user,
+        max_attempts=max_attempts or getattr(settings, "JOB_MAX_ATTEMPTS", 3),
+    )
+
+
+def _requeue_stale(now):
+    limit = now - timedelta(seconds=getattr(settings, "JOB_TIMEOUT", 3600))
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=limit)
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, error="Tiempo agotado (worker caído).", finished_at=now)
+    stale.update(status=Job.PENDING, locked_by="", locked_at=None)
+
+
+def claim(worker: str, batch: int = 5) -> Optional[Job]:
+    """Toma la siguiente tarea lista para correr, o None si no hay."""
+    now = timezone.now()
+    _requeue_stale(now)
+    candidates = (Job.objects.filter(status=Job.PENDING, run_after__lte=now)
+                  .order_by("run_after", "id").values_list("pk", flat=True)[:batch])
+    for pk in candidates:
+        taken = Job.objects.filter(pk=pk, status=Job.PENDING).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F("attempts") + 1)
+        if taken:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+class Progress:
+    """
+    progress(done, total=None): guarda el avance, a lo más una vez cada `every`
+    segundos, y renueva locked_at (la tarea sigue viva: _requeue_stale no la toca).
+    """
+
+    def __init__(self, job: Job, every: float = 1.0):
+        self.job = job
+        self.every = every
+        self._last = 0.0
+
+    def __call__(self, done: int, total: Optional[int] = None):
+        self.job.progress_done = done
+        if total is not None:
+            self.job.progress_total = total
+        now = monotonic()
+        if now - self._last >= self.every or done == self.job.progress_total:
+            self._last = now
+            try:
+                Job.objects.filter(pk=self.job.pk, locked_by=self.job.locked_by).update(
+                    progress_done=done, progress_total=self.job.progress_total, locked_at=timezone.now())
+            except DatabaseError:
+                # el avance es informativo: no hace fallar la tarea (p.ej. SQLite bloqueada)
+                logger.debug("no se pudo guardar el avance de %s", self.job, exc_info=True)
+
+
+def execute(job: Job) -> Job:
+    """
+    Corre el handler de una tarea ya tomada y registra el resultado, o el error y
+    el reintento. Si entretanto la tarea volvió a la cola (JOB_TIMEOUT), el
+    resultado se descarta: lo registra el worker que la tiene ahora.
+    """
+    worker = job.locked_by
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise PermanentJobError(f"Tipo de tarea desconocido: {job.kind}")
+        job.result = handler(job, Progress(job)) or ""
+    except Exception as e:
+        job.error = traceback.format_exc()
+        logger.warning("tarea %s falló (intento %d de %d)", job, job.attempts, job.max_attempts, exc_info=True)
+        if job.attempts < job.max_attempts and not isinstance(e, PermanentJobError):
+            delay = getattr(settings, "JOB_RETRY_DELAY", 30) * 2 ** (job.attempts - 1)
+            job.status, job.run_after = Job.PENDING, timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status, job.finished_at = Job.FAILED, timezone.now()
+    else:
+        job.status, job.error, job.finished_at = Job.DONE, "", timezone.now()
+    job.locked_by, job.locked_at = "", None
+    fields = ("result", "error", "status", "run_after", "finished_at", "locked_by", "locked_at",
+              "progress_done", "progress_total")
+    saved = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=worker).update(
+        **{f: getattr(job, f) for f in fields})
+    if not saved:
+        logger.warning("%s ya no tiene %s (volvió a la cola): se descarta su resultado", worker, job)
+        job.refresh_from_db()
+    return job
+
+
+def prune(ttl: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Borra las tareas terminadas hace más de `ttl` segundos (por defecto JOB_RESULT_TTL)
+    y los archivos de JOB_EXPORT_DIR más viejos que eso. Devuelve (tareas, archivos).
+    """
+    ttl = getattr(settings, "JOB_RESULT_TTL", 7 * 24 * 3600) if ttl is None else ttl
+    if ttl <= 0:
+        return 0, 0
+    limit = timezone.now() - timedelta(seconds=ttl)
+    jobs, _ = Job.objects.filter(status__in=(Job.DONE, Job.FAILED), finished_at__lt=limit).delete()
+    files = 0
+    folder = Path(settings.MEDIA_ROOT, getattr(settings, "JOB_EXPORT_DIR", "exports"))
+    if folder.is_dir():
+        # también los de `manage.py export_all` y los .part de workers caídos
+        for path in folder.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < limit.timestamp():
+                    path.unlink()
+                    files += 1
+            except FileNotFoundError:
+                pass  # lo borró otro worker
+    return jobs, files
+
+
+PRUNE_EVERY = 3600  # segundos entre limpiezas de cada hilo del worker
+
+
+def work(worker: str, stop: threading.Event, once: bool = False, poll: Optional[float] = None,
+         max_jobs: Optional[int] = None) -> int:
+    """Bucle de un hilo del worker. Con once=True termina cuando la cola queda vacía. Devuelve tareas corridas."""
+    poll = poll if poll is not None else getattr(settings, "JOB_POLL_SECONDS", 1.0)
+    done = 0
+    pruned_at = None
+    while not stop.is_set() and (max_jobs is None or done < max_jobs):
+        if pruned_at is None or monotonic() - pruned_at >= PRUNE_EVERY:
+            pruned_at = monotonic()
+            try:
+                prune()
+            except DatabaseError:
+                logger.warning("%s: no se pudo limpiar tareas viejas", worker, exc_info=True)
+        close_old_connections()  # CONN_MAX_AGE y conexiones caídas, como entre requests
+        try:
+            job = claim(worker)
+        except DatabaseError:
+            logger.warning("%s: no se pudo leer la cola", worker, exc_info=True)
+            stop.wait(poll)
+            continue
+        if job is None:
+            if once:
+                break
+            stop.wait(poll)
+            continue
+        logger.info("%s toma %s", worker, job)
+        execute(job)
+        done += 1
+    return done
+
+
+# ---------- archivos generados ----------
+
+def export_path(name: str) -> Path:
+    """Ruta bajo MEDIA_ROOT/JOB_EXPORT_DIR (crea la carpeta)."""
+    folder = Path(settings.MEDIA_ROOT, getattr(settings, "JOB_EXPORT_DIR", "exports"))
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / name
+
+
+def result_path(job: Job) -> Optional[Path]:
+    """Archivo de una tarea terminada, si existe y está dentro de MEDIA_ROOT."""
+    if job.status != Job.DONE or not job.result:
+        return None
+    root = Path(settings.MEDIA_ROOT).resolve()
+    path = (root / job.result).resolve()
+    return path if path.is_relative_to(root) and path.is_file() else None
+
+
+def download_name(path: Path) -> str:
+    """Nombre de descarga sin el número de tarea: equipos-17.csv -> equipos.csv, inventario-9.tar.gz -> inventario.tar.gz."""
+    stem, dot, ext = path.name.partition(".")
+    return stem.rsplit("-", 1)[0] + dot + ext
+
+
+# ---------- vistas ----------
+
+def _own_job(request, pk) -> Job:
+    job = Job.objects.filter(pk=pk).first()
+    if job is None or not (request.user.is_superuser or job.created_by_id == request.user.pk):
+        raise Http404
+    return job
+
+
+@login_required
+def job_detail(request, pk):
+    """Estado de la tarea; se recarga sola hasta terminar y entonces muestra la descarga."""
+    job = _own_job(request, pk)
+    path = result_path(job)
+    wait = timedelta(seconds=getattr(settings, "JOB_UNCLAIMED_WARNING", 30))
+    return render(request, "jobs/detail.html", {
+        "job": job, "file": path, "filename": download_name(path) if path else "",
+        # nunca tomada y ya vieja: no hay worker corriendo
+        "unclaimed": job.status == Job.PENDING and not job.attempts and timezone.now() - job.created_at > wait,
+    })
+
+
+@login_required
+def job_download(request, pk):
+    path = result_path(_own_job(request, pk))
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=download_name(path))
+
+
+# ---------- handlers ----------
+
+@job_handler("crud_csv")
+def export_csv(job: Job, progress: Progress) -> str:
+    """CSV de un modelo del CRUD (params: slug, q), igual que la exportación en streaming."""
+    from .crud import get_registry, iter_csv_chunks
+    from .search import get_search_backend
+
+    try:
+        cfg = get_registry().by_slug(job.params["slug"])
+    except KeyError:
+        raise PermanentJobError(f"Modelo desconocido: {job.params.get('slug')}")
+    rows = get_search_backend().filter(cfg.base_queryset(), job.params.get("q", ""), cfg.search_fields)
+    rows = rows.order_by(*cfg.ordering)
+    chunk_size = getattr(settings, "CRUD_EXPORT_CHUNK_SIZE", 2000)
+
+    total = rows.count()
+    progress(0, total)
+    path = export_path(f"{cfg.slug}-{job.pk}.csv")
+    tmp = path.with_suffix(".part")
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            for i, chunk in enumerate(iter_csv_chunks(cfg, rows, chunk_size)):
+                f.write(chunk)
+                if i:  # el primer bloque es el encabezado
+                    progress(min(i * chunk_size, total))
+        os.replace(tmp, path)  # el archivo aparece completo o no aparece
+    finally:
+        tmp.unlink(missing_ok=True)
+    progress(total, total)
+    return path.relative_to(settings.MEDIA_ROOT).as_posix()
+
+
+@job_handler("export_all")
+def export_archive(job: Job, progress: Progress) -> str:
+    """Todos los modelos del CRUD en un zip / tar.gz (params: archive, table_format, slugs)."""
+    from .archive import ARCHIVE_FORMATS, export_all
+    from .crud import get_registry
+
+    archive = job.params.get("archive", "zip")
+    slugs = {c.slug for c in get_registry()}
+    unknown = [slug for slug in job.params.get("slugs") or () if slug not in slugs]
+    if unknown:
+        raise PermanentJobError(f"Modelos desconocidos: {', '.join(unknown)}")
+    if archive not in ARCHIVE_FORMATS:
+        raise PermanentJobError(f"Formato de archivo no soportado: {archive}")
+    path = export_path(f"inventario-{job.pk}{ARCHIVE_FORMATS[archive]}")
+    export_all(path, archive=archive, table_format=job.params.get("table_format", "csv"),
+               slugs=job.params.get("slugs"), progress=progress)
+    return path.relative_to(settings.MEDIA_ROOT).as_posix()
+
+
+@job_handler("rebuild_gastos")
+def rebuild_gastos(job: Job, progress: Progress) -> str:
+    from .gastos import rebuild
+    return f"{rebuild()} filas"
+
+
+@job_handler("rebuild_listing")
+def rebuild_listing(job: Job, progress: Progress) -> str:
+    from .listing import rebuild
+    return f"{rebuild(chunk_size=2000)} filas"
+
+
+@job_handler("rebuild_programacion")
+def rebuild_programacion(job: Job, progress: Progress) -> str:
+    from .programacion import rebuild
+    return f"{rebuild()} filas"
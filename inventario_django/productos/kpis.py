@@ -0,0 +1,162 @@
+# productos/kpis.py
+from datetime import date, timedelta
+from functools import partial
+from typing import Callable, Dict
+import calendar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .catalogs import get_catalog
+from .fanout import gather, run_serial
+from .models import GastoMensual, IntervaloMantencion, MantencionProgramada
+from .models_inventario import Equipo, EstadoEquipo, EstadoMantencion, Mantencion
+from .versioning import aget_or_compute, bump_version, versioned_key
+
+# Modelos cuyos cambios invalidan los KPIs del inicio (ver signals.py): los
+# que se cuentan y los catálogos cuyos nombres muestran (últimos equipos y
+# mantenciones, gráficos) o que resuelven estados por nombre. El gráfico de
+# gastos sale de GastoMensual, que invalida al recalcularse (gastos.py)
+KPI_MODELS = ("Equipo", "Mantencion", "Marca", "TipoEquipo", "EstadoEquipo", "EstadoMantencion")
+
+
+def _chart(rows, key, empty_label, value="n"):
+    return [r[key] or empty_label for r in rows], [r[value] for r in rows]
+
+
+def _seis_meses_atras(hoy: date) -> date:
+    return (hoy.replace(day=1) - timedelta(days=180)).replace(day=1)
+
+
+def kpi_querysets(hoy: date | None = None) -> dict:
+    """Consultas del inicio sin evaluar (las usa compute_home_kpis y el comando audit_indexes)."""
+    hoy = hoy or date.today()
+    estados = get_catalog(EstadoEquipo)
+    return {
+        "total_equipos": Equipo.objects.all(),
+        # estados resueltos a IDs con el catálogo: filtro por FK, sin join
+        "disponibles": Equipo.objects.filter(id_estado_equipo__in=estados.ids_for("Disponible")),
+        "en_uso": Equipo.objects.filter(id_estado_equipo__in=estados.ids_for("En uso")),
+        # equipos con mantención vencida: rango sobre el índice de la cola (programacion.py)
+        "mantenciones_pendientes": MantencionProgramada.objects.filter(proxima__lte=hoy),
+        "ultimos_equipos": (
+            Equipo.objects.select_related("id_marca", "id_tipo_equipo")
+            .order_by("-id_equipo")[:6]
+        ),
+        "ultimas_mantenciones": (
+            Mantencion.objects
+            .select_related("id_equipo__id_marca", "id_equipo__id_tipo_equipo", "id_estado_mantencion")
+            .order_by("-id_mantencion")[:6]
+        ),
+        "chart_tipos": (
+            Equipo.objects.values("id_tipo_equipo__tipo_equipo")
+            .annotate(n=Count("id_equipo")).order_by("id_tipo_equipo__tipo_equipo")
+        ),
+        "chart_marcas": (
+            Equipo.objects.values("id_marca__nombre_marca")
+            .annotate(n=Count("id_equipo")).order_by("-n")[:10]
+        ),
+        "chart_mant": (
+            Mantencion.objects.values("id_estado_mantencion__tipo")
+            .annotate(n=Count("id_mantencion")).order_by("id_estado_mantencion__tipo")
+        ),
+        "chart_gastos": (
+            GastoMensual.objects
+            .filter(mes__gte=_seis_meses_atras(hoy))
+            .values("mes")
+            .annotate(gasto=Sum("total"))
+            .order_by("mes")
+        ),
+    }
+
+
+def gastos_ultimos_meses(hoy: date | None = None, gastos_por_mes=None):
+    """Gasto mensual de los últimos 6 meses (labels, values), con meses en cero."""
+    hoy = hoy or date.today()
+    seis_meses_atras = _seis_meses_atras(hoy)
+    if gastos_por_mes is None:
+        gastos_por_mes = kpi_querysets(hoy)["chart_gastos"]
+
+    labels_line = []
+    cur = seis_meses_atras
+    while cur <= hoy:
+        labels_line.append((cur.year, cur.month))
+        cur = date(cur.year + 1, 1, 1) if cur.month == 12 else date(cur.year, cur.month + 1, 1)
+
+    dic_gastos = {(g["mes"].year, g["mes"].month): (g["gasto"] or 0) for g in gastos_por_mes}
+    labels = [f"{calendar.month_abbr[m]}-{y}" for (y, m) in labels_line]
+    values = [dic_gastos.get((y, m), 0) for (y, m) in labels_line]
+    return labels, values
+
+
+def _contar_pendientes(cola) -> int:
+    """Vencidas según la cola; sin intervalos configurados (recién migrado) la cola está vacía: las "Pendiente"."""
+    if IntervaloMantencion.objects.exists():
+        return cola.count()
+    pendiente = get_catalog(EstadoMantencion).ids_for("Pendiente")
+    return Mantencion.objects.filter(id_estado_mantencion__in=pendiente).count()
+
+
+COUNT_KPIS = ("total_equipos", "disponibles", "en_uso", "mantenciones_pendientes")
+
+
+def home_kpi_tasks(hoy: date) -> Dict[str, Callable]:
+    """Una tarea (callable sin argumentos) por consulta del inicio; son independientes entre sí."""
+    qs = kpi_querysets(hoy)
+    tasks = {name: qs[name].count for name in COUNT_KPIS}
+    tasks["mantenciones_pendientes"] = partial(_contar_pendientes, qs["mantenciones_pendientes"])
+    # el resto se evalúa a lista (también para poder guardarlo en cache)
+    tasks.update({name: partial(list, q) for name, q in qs.items() if name not in tasks})
+    return tasks
+
+
+def assemble_home_kpis(r: dict, hoy: date) -> dict:
+    """Arma el contexto del inicio con los resultados de home_kpi_tasks."""
+    data = {name: r[name] for name in COUNT_KPIS}
+    data["ultimos_equipos"] = r["ultimos_equipos"]
+    data["ultimas_mantenciones"] = r["ultimas_mantenciones"]
+
+    # gráficos
+    data["chart_tipos_labels"], data["chart_tipos_values"] = _chart(
+        r["chart_tipos"], "id_tipo_equipo__tipo_equipo", "Sin tipo")
+    data["chart_marcas_labels"], data["chart_marcas_values"] = _chart(
+        r["chart_marcas"], "id_marca__nombre_marca", "Sin marca")
+    data["chart_mant_labels"], data["chart_mant_values"] = _chart(
+        r["chart_mant"], "id_estado_mantencion__tipo", "Sin estado")
+    data["chart_gastos_labels"], data["chart_gastos_values"] = gastos_ultimos_meses(
+        hoy, r["chart_gastos"])
+    return data
+
+
+def compute_home_kpis() -> dict:
+    """Calcula (sin cache) todos los KPIs y series del inicio."""
+    hoy = date.today()
+    return assemble_home_kpis(run_serial(home_kpi_tasks(hoy)), hoy)
+
+
+def get_home_kpis() -> dict:
+    """KPIs del inicio desde el cache (TTL = KPI_CACHE_TTL); se recalculan al invalidar."""
+    key = versioned_key("home_kpis")
+    data = cache.get(key)
+    if data is None:
+        data = compute_home_kpis()
+        cache.set(key, data, getattr(settings, "KPI_CACHE_TTL", 300))
+    return data
+
+
+async def aget_home_kpis() -> dict:
+    """get_home_kpis para vistas async: en un fallo de cache las consultas van en paralelo."""
+    async def compute():
+        hoy = date.today()
+        tasks = await sync_to_async(home_kpi_tasks)(hoy)  # lee los catálogos
+        return assemble_home_kpis(await gather(tasks), hoy)
+    return await aget_or_compute("home_kpis", getattr(settings, "KPI_CACHE_TTL", 300), compute)
+
+
+def invalidate_home_kpis(**kwargs):
+    # al confirmarse, como http_cache.touch_tables: antes del commit otro request
+    # podría calcular con los datos viejos y guardarlos con la versión nueva
+    transaction.on_commit(partial(bump_version, "home_kpis"))
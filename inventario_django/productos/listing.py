@@ -0,0 +1,168 @@
+# productos/listing.py
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Set, Tuple, Type
+
+from django.db import transaction
+from django.db.models import Case, CharField, F, Model, Value, When
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import EquipoListing
+from .models_inventario import (
+    Empleado, Equipo, EstadoEquipo, EstadoMantencion, Mantencion, Marca, Proveedor, TipoEquipo,
+)
+from .search import get_search_backend
+
+# Modelo de lectura de equipos (EquipoListing): una fila por equipo con los
+# nombres de marca, tipo, estado, empleado y proveedor, y el resumen de sus
+# mantenciones. El listado y el detalle de equipos leen solo esta tabla.
+# Las señales refrescan, dentro de la misma transacción, las filas de los
+# equipos afectados; `manage.py rebuild_listing` la reconstruye completa.
+# Renombrar marcas, tipos, estados, empleados o proveedores no recalcula filas:
+# un UPDATE ... SET col = CASE fk ... END por bloque cambia el nombre copiado (rename()).
+
+# campos del ?q= del listado de equipos
+LISTING_SEARCH_FIELDS = ("nombre_equipo", "marca", "tipo_equipo", "empleado")
+
+# modelo referenciado -> (FK de EquipoListing que lo apunta, columna con su nombre)
+RELATED: Dict[Type[Model], Tuple[str, str]] = {
+    Marca: ("id_marca", "marca"),
+    TipoEquipo: ("id_tipo_equipo", "tipo_equipo"),
+    EstadoEquipo: ("id_estado_equipo", "estado"),
+    Empleado: ("id_empleado", "empleado"),
+    Proveedor: ("id_proveedor", "proveedor"),
+    EstadoMantencion: ("id_estado_ultima_mantencion", "estado_ultima_mantencion"),
+}
+# modelos cuyas filas se recalculan con refresh()
+SOURCE_MODELS = (Equipo, Mantencion)
+LISTING_MODELS = (*SOURCE_MODELS, *RELATED)
+
+
+def _text(obj):
+    return str(obj) if obj is not None else None
+
+
+def build_rows(equipo_ids: Iterable[int]) -> List[EquipoListing]:
+    """Filas de EquipoListing de esos equipos (los que ya no existen no aparecen)."""
+    ids = list(equipo_ids)
+    equipos = (Equipo.objects.filter(pk__in=ids)
+               .select_related("id_marca", "id_tipo_equipo", "id_estado_equipo", "id_empleado", "id_proveedor"))
+
+    # cantidad y última mantención (la más reciente con fecha; a igual fecha, la última creada)
+    conteo, ultima = Counter(), {}
+    mantenciones = (
+        Mantencion.objects.filter(id_equipo__in=ids)
+        .order_by("id_equipo", F("fecha").desc(nulls_last=True), "-id_mantencion")
+        .values_list("id_equipo", "fecha", "id_estado_mantencion", "id_estado_mantencion__tipo")
+    )
+    for equipo_id, fecha, estado_id, estado in mantenciones:
+        conteo[equipo_id] += 1
+        ultima.setdefault(equipo_id, (fecha, estado_id, estado))
+
+    rows = []
+    for e in equipos:
+        fecha, estado_mant_id, estado_mant = ultima.get(e.pk, (None, None, None))
+        rows.append(EquipoListing(
+            id_equipo=e.pk,
+            nombre_equipo=e.nombre_equipo,
+            id_marca_id=e.id_marca_id, marca=_text(e.id_marca),
+            id_tipo_equipo_id=e.id_tipo_equipo_id, tipo_equipo=_text(e.id_tipo_equipo),
+            id_estado_equipo_id=e.id_estado_equipo_id, estado=_text(e.id_estado_equipo),
+            id_empleado_id=e.id_empleado_id, empleado=_text(e.id_empleado),
+            id_proveedor_id=e.id_proveedor_id, proveedor=_text(e.id_proveedor),
+            mantenciones=conteo[e.pk],
+            ultima_mantencion=fecha,
+            id_estado_ultima_mantencion_id=estado_mant_id,
+            estado_ultima_mantencion=estado_mant,
+        ))
+    return rows
+
+
+def _chunks(ids, size):
+    it = iter(ids)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def refresh(equipo_ids: Iterable[int], chunk_size: int = 500) -> int:
+    """Recalcula las filas de `equipo_ids` (y borra las de equipos eliminados). Devuelve las filas escritas."""
+    backend = get_search_backend()
+    total = 0
+    for chunk in _chunks(sorted(set(equipo_ids)), chunk_size):
+        rows = build_rows(chunk)
+        with transaction.atomic():
+            EquipoListing.objects.filter(pk__in=chunk).delete()
+            EquipoListing.objects.bulk_create(rows)
+            backend.index_objects(EquipoListing, rows)
+            for pk in set(chunk) - {r.pk for r in rows}:
+                backend.unindex_object(EquipoListing(pk=pk))
+        total += len(rows)
+    return total
+
+
+def rebuild(chunk_size: int = 500) -> int:
+    """Reconstruye el listado completo."""
+    with transaction.atomic():
+        EquipoListing.objects.exclude(pk__in=Equipo.objects.values("pk")).delete()
+        ids = Equipo.objects.order_by("pk").values_list("pk", flat=True)
+        return refresh(ids.iterator(chunk_size=chunk_size), chunk_size=chunk_size)
+
+
+def rename(sender, pks: Iterable, deleted: bool = False, chunk_size: int = 500) -> int:
+    """
+    Copia el nombre actual de las filas `pks` de `sender` (un modelo de RELATED)
+    a las filas del listado que las apuntan, con un UPDATE por bloque de
+    `chunk_size` (CASE según la FK), y reindexa solo esas filas si la columna
+    se busca. Devuelve las filas cambiadas.
+    """
+    fk, column = RELATED[sender]
+    pks = list(pks)
+    if deleted:
+        names = {pk: None for pk in pks}
+    else:
+        names = {obj.pk: _text(obj) for obj in sender._base_manager.filter(pk__in=pks)}
+    total = 0
+    with transaction.atomic():
+        for chunk in _chunks(names.items(), chunk_size):
+            nombre = Case(*(When(**{fk: pk}, then=Value(name)) for pk, name in chunk),
+                          output_field=CharField())
+            total += EquipoListing.objects.filter(**{f"{fk}__in": [pk for pk, _ in chunk]}).update(
+                **{column: nombre})
+        if total and column in LISTING_SEARCH_FIELDS:
+            backend = get_search_backend()
+            ids = EquipoListing.objects.filter(**{f"{fk}__in": list(names)}).values_list("pk", flat=True)
+            for chunk in _chunks(ids.iterator(chunk_size=chunk_size), chunk_size):
+                backend.index_objects(EquipoListing, list(EquipoListing.objects.filter(pk__in=chunk)))
+    return total
+
+
+# ---------- mantenimiento incremental ----------
+
+def equipos_de(sender, pks: Iterable) -> Set[int]:
+    """Equipos cuya fila de listado se recalcula (refresh) por las filas `pks` de `sender` (Equipo o Mantencion)."""
+    pks = list(pks)
+    if sender is Equipo:
+        return set(pks)
+    return set(Mantencion.objects.filter(pk__in=pks).values_list("id_equipo", flat=True))
+
+
+def _antes(sender, instance, **kwargs):
+    # una mantención que cambia de equipo también afecta al equipo anterior
+    instance._listing_equipos = equipos_de(Mantencion, [instance.pk]) if instance.pk else set()
+
+
+def _despues(sender, instance, **kwargs):
+    if sender is Mantencion:
+        refresh({instance.id_equipo_id} | getattr(instance, "_listing_equipos", set()))
+    elif sender is Equipo:
+        refresh([instance.pk])
+    else:
+        rename(sender, [instance.pk], deleted=kwargs.get("signal") is post_delete)
+
+
+def connect_listing_signals():
+    pre_save.connect(_antes, sender=Mantencion, dispatch_uid="listing:pre_save:mantencion")
+    for m in LISTING_MODELS:
+        label = m._meta.label_lower
+        post_save.connect(_despues, sender=m, dispatch_uid=f"listing:post_save:{label}")
+        post_delete.connect(_despues, sender=m, dispatch_uid=f"listing:post_delete:{label}")
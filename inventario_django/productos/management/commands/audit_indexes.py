@@ -0,0 +1,58 @@
+# productos/management/commands/audit_indexes.py
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from productos.query_audit import audit, audit_querysets, index_ddl
+
+
+class Command(BaseCommand):
+    help = (
+        "Corre EXPLAIN sobre las consultas de las vistas (listados CRUD, equipos, "
+        "detalle, paneles) y sugiere el CREATE INDEX para los seq scans y ordenamientos sin índice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sql", action="store_true", help="Imprime solo el DDL sugerido.")
+        parser.add_argument("--apply", action="store_true", help="Ejecuta el DDL sugerido en la BD.")
+        parser.add_argument("--orderings", action="store_true",
+                            help="Audita también cada ?o=<columna> de los listados CRUD.")
+        parser.add_argument("-q", "--query", default="", help="Audita solo las consultas cuyo nombre contenga este texto.")
+
+    def handle(self, *args, **opts):
+        results = [
+            audit(name, qs)
+            for name, qs in audit_querysets(AnonymousUser(), opts["orderings"])
+            if opts["query"] in name
+        ]
+
+        ddl = []
+        for r in results:
+            for table, cols in r.suggestions:
+                stmt = index_ddl(table, cols)
+                if stmt not in ddl:
+                    ddl.append(stmt)
+            if opts["sql"]:
+                continue
+            if r.error:
+                self.stdout.write(self.style.ERROR(f"[{r.name}] error: {r.error}"))
+            elif r.scans or r.sorts:
+                detail = ", ".join(f"SCAN {t}" for t in r.scans)
+                if r.sorts:
+                    detail += (", " if detail else "") + "ORDER BY sin índice"
+                self.stdout.write(self.style.WARNING(f"[{r.name}] {detail}"))
+                for table, cols in r.suggestions:
+                    self.stdout.write(f"    -> {table} ({', '.join(cols)})")
+            elif opts["verbosity"] > 1:
+                self.stdout.write(f"[{r.name}] ok")
+
+        if not opts["sql"]:
+            self.stdout.write(f"\n-- {len(ddl)} índice(s) sugerido(s) para {connection.vendor}")
+        for stmt in ddl:
+            self.stdout.write(stmt)
+
+        if opts["apply"] and ddl:
+            with connection.cursor() as cur:
+                for stmt in ddl:
+                    cur.execute(stmt)
+            self.stdout.write(self.style.SUCCESS(f"{len(ddl)} índice(s) creado(s)."))
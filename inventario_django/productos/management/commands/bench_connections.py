@@ -0,0 +1,120 @@
+# productos/management/commands/bench_connections.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import reverse
+
+# (modo, variables de entorno); cada modo corre en un proceso aparte porque
+# la configuración de conexiones se lee una sola vez, al cargar settings
+MODES = (
+    ("por request", {"DB_CONN_MAX_AGE": "0", "DB_CONN_HEALTH_CHECKS": "0", "DB_POOL": "0"}),
+    ("persistente", {"DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "0", "DB_POOL": "0"}),
+    ("persistente+health", {"DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "1", "DB_POOL": "0"}),
+    ("pool", {"DB_CONN_MAX_AGE": "0", "DB_CONN_HEALTH_CHECKS": "0", "DB_POOL": "1"}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo de conexión por request: repite un request autenticado con "
+        "conexión por request, persistente (CONN_MAX_AGE), persistente con health "
+        "checks y pool de psycopg (solo PostgreSQL), cada uno en su propio proceso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--url", default="productos:vistas_lista", help="Nombre de URL a pedir.")
+        parser.add_argument("--user", help="Usuario con que se navega (por defecto, el primer superusuario).")
+        parser.add_argument("--json", dest="json_path", help="Guarda los resultados en este archivo.")
+        parser.add_argument("--child", action="store_true", help="(interno) mide en este proceso e imprime JSON.")
+
+    def handle(self, *args, **opts):
+        if opts["child"]:
+            self.stdout.write(json.dumps(self.measure(opts)))
+            return
+
+        results = {"vendor": connection.vendor}
+        for mode, overrides in MODES:
+            env = {
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "inventario.settings.dev"),
+                **overrides,
+            }
+            args = [sys.executable, "manage.py", "bench_connections", "--child",
+                    "--requests", str(opts["requests"]), "--url", opts["url"]]
+            if opts["user"]:
+                args += ["--user", opts["user"]]
+            proc = subprocess.run(args, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+            if proc.returncode:
+                raise CommandError(f"{mode}: {proc.stderr.strip().splitlines()[-1]}")
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            if overrides["DB_POOL"] == "1" and not r["pool"]:
+                continue  # SQLite, o PostgreSQL sin psycopg 3 / psycopg-pool
+            results[mode] = r
+
+        self.stdout.write(f"\nBD: {results['vendor']}, {opts['requests']} requests a {opts['url']}")
+        self.stdout.write(f"{'modo':<22}{'p50 ms':>9}{'media ms':>10}{'p95 ms':>9}{'conexiones':>12}")
+        for mode, _ in MODES:
+            r = results.get(mode)
+            if r:
+                self.stdout.write(f"{mode:<22}{r['p50_ms']:>9.2f}{r['mean_ms']:>10.2f}"
+                                  f"{r['p95_ms']:>9.2f}{r['connections']:>12}")
+        if "pool" not in results:
+            self.stdout.write("(pool omitido: requiere PostgreSQL con psycopg 3 y psycopg-pool)")
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Resultados en {opts['json_path']}")
+
+    def measure(self, opts):
+        User = get_user_model()
+        user = (User.objects.get(username=opts["user"]) if opts["user"]
+                else User.objects.filter(is_superuser=True, is_active=True).first())
+        if user is None:
+            raise CommandError("No hay usuario para la sesión; usa --user.")
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS and settings.ALLOWED_HOSTS[0] != "*" else "localhost"
+        client = Client(HTTP_HOST=host)
+        client.force_login(user)
+        url = reverse(opts["url"])
+        secure = getattr(settings, "SECURE_SSL_REDIRECT", False)
+
+        # el cliente de pruebas desconecta close_old_connections de
+        # request_started/request_finished; se llama a mano alrededor de cada
+        # request para abrir, reutilizar o devolver la conexión como el handler real
+        opened = []
+        connection_created.connect(lambda **kw: opened.append(1), weak=False)
+        connection.close()
+        client.get(url, secure=secure)  # calienta imports, plantillas y cache
+        opened.clear()
+
+        lat = []
+        for _ in range(opts["requests"]):
+            t0 = time.perf_counter()
+            close_old_connections()
+            resp = client.get(url, secure=secure)
+            close_old_connections()
+            lat.append((time.perf_counter() - t0) * 1000)
+            if resp.status_code != 200:
+                raise CommandError(f"{url}: HTTP {resp.status_code}")
+        lat.sort()
+        db = settings.DATABASES["default"]
+        return {
+            "requests": len(lat),
+            "p50_ms": statistics.median(lat),
+            "mean_ms": statistics.fmean(lat),
+            "p95_ms": lat[max(0, int(len(lat) * 0.95) - 1)],
+            "connections": len(opened),
+            "conn_max_age": db.get("CONN_MAX_AGE"),
+            "health_checks": db.get("CONN_HEALTH_CHECKS"),
+            "pool": bool(db.get("OPTIONS", {}).get("pool")),
+        }
@@ -0,0 +1,133 @@
+# productos/management/commands/bench_panels.py
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+PANELS = ("productos:home", "productos:dashboard", "productos:vistas_modulos")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara los paneles (inicio, dashboard, módulos) sync vs async bajo uvicorn: "
+        "levanta el servidor con PANEL_ASYNC_VIEWS=0 y =1 y mide latencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Requests por panel y modo.")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--user", help="Usuario con que se navega (por defecto, el primer superusuario).")
+        parser.add_argument("--warm", action="store_true",
+                            help="Con cache de KPIs/conteos (por defecto se mide en frío: KPI_CACHE_TTL=0).")
+        parser.add_argument("--json", dest="json_path", help="Guarda los resultados en este archivo.")
+
+    def handle(self, *args, **opts):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError("Instala uvicorn (pip install uvicorn).")
+
+        User = get_user_model()
+        user = (User.objects.get(username=opts["user"]) if opts["user"]
+                else User.objects.filter(is_superuser=True, is_active=True).first())
+        if user is None:
+            raise CommandError("No hay usuario para la sesión; usa --user.")
+        session = SessionStore()
+        session["_auth_user_id"] = str(user.pk)
+        session["_auth_user_backend"] = "django.contrib.auth.backends.ModelBackend"
+        session["_auth_user_hash"] = user.get_session_auth_hash()
+        session.create()
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+        results = {}
+        try:
+            for mode in ("sync", "async"):
+                results[mode] = self.run_mode(mode, cookie, opts)
+        finally:
+            session.delete()
+
+        self.stdout.write(f"\n{'panel':<28}{'modo':<7}{'p50 ms':>9}{'p95 ms':>9}{'req/s':>8}")
+        for path in results["sync"]:
+            for mode in ("sync", "async"):
+                r = results[mode][path]
+                self.stdout.write(f"{path:<28}{mode:<7}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['rps']:>8.1f}")
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Resultados en {opts['json_path']}")
+
+    def run_mode(self, mode, cookie, opts):
+        port = _free_port()
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "inventario.settings.dev"),
+            "PANEL_ASYNC_VIEWS": "1" if mode == "async" else "0",
+        }
+        if not opts["warm"]:
+            env["KPI_CACHE_TTL"] = "0"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "inventario.asgi:application",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        base = f"http://127.0.0.1:{port}"
+        try:
+            self.wait_ready(base, server)
+            return {reverse(name): self.measure(base + reverse(name), cookie, opts) for name in PANELS}
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    def wait_ready(self, base, server, timeout=20):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("uvicorn terminó antes de aceptar conexiones.")
+            try:
+                with socket.create_connection(("127.0.0.1", int(base.rsplit(":", 1)[1])), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("uvicorn no respondió a tiempo.")
+
+    def measure(self, url, cookie, opts):
+        def hit(_):
+            t0 = time.perf_counter()
+            try:
+                with urlopen(Request(url, headers={"Cookie": cookie}), timeout=30) as resp:
+                    resp.read()
+                    if resp.url != url:
+                        raise CommandError(f"{url}: redirigido a {resp.url} (¿sesión inválida?)")
+            except HTTPError as e:
+                raise CommandError(f"{url}: HTTP {e.code}")
+            return (time.perf_counter() - t0) * 1000
+
+        hit(0)  # calienta el proceso (imports, plantillas, registro)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            lat = sorted(pool.map(hit, range(opts["requests"])))
+        elapsed = time.perf_counter() - t0
+        return {
+            "requests": len(lat),
+            "p50_ms": statistics.median(lat),
+            "p95_ms": lat[max(0, int(len(lat) * 0.95) - 1)],
+            "rps": len(lat) / elapsed,
+        }
@@ -0,0 +1,97 @@
+# productos/management/commands/bench_rows.py
+from datetime import date, timedelta
+import json
+import re
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.template import engines
+from django.utils import timezone
+
+from productos.crud import get_registry
+from productos.rows import render_rows
+
+# tbody de crud/list.html antes de rows.py: filtro attr por celda y {% url %} por enlace
+LEGACY_TBODY = """{% load object_extras %}{% for item in items %}<tr>
+{% for col in cfg.list_display %}<td>{{ item|attr:col }}</td>{% endfor %}
+<td class="text-right">
+{% if can_change %}<a class="btn btn-xs" href="{% url 'productos:'|add:cfg.slug|add:'_update' item.pk %}">Editar</a>{% endif %}
+{% if can_delete %}<a class="btn btn-xs btn-error" href="{% url 'productos:'|add:cfg.slug|add:'_delete' item.pk %}">Eliminar</a>{% endif %}
+</td></tr>
+{% empty %}<tr><td colspan="{{ cfg.list_display|length|add:1 }}" class="text-center">No hay registros.</td></tr>
+{% endfor %}"""
+
+
+def _fake(model, i, depth=0):
+    """Instancia sin guardar con valores de ejemplo y sus FK ya resueltas (sin consultas)."""
+    values = {}
+    for f in model._meta.concrete_fields:
+        if f.primary_key:
+            values[f.attname] = i
+        elif isinstance(f, models.ForeignKey):
+            if depth < 4:
+                values[f.name] = _fake(f.related_model, i % 7 + 1, depth + 1)
+        elif isinstance(f, (models.CharField, models.TextField)):
+            values[f.attname] = f"{f.name} {i} & <cía>"[:f.max_length or None]
+        elif isinstance(f, models.BooleanField):
+            values[f.attname] = i % 2 == 0
+        elif isinstance(f, (models.IntegerField, models.FloatField, models.DecimalField)):
+            values[f.attname] = i * 1250
+        elif isinstance(f, models.DateTimeField):
+            values[f.attname] = timezone.now() - timedelta(hours=i)
+        elif isinstance(f, models.DateField):
+            values[f.attname] = date.today() - timedelta(days=i)
+    return model(**values)
+
+
+def _normalize(html: str) -> str:
+    return re.sub(r">\s+<", "><", html.strip())
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark del tbody de los listados CRUD: plantilla con el filtro attr "
+        "por celda vs. render_rows (accessors precompilados). Usa instancias sin "
+        "guardar, así que no toca la BD; verifica además que ambos HTML coincidan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="*", help="Módulos a medir (por defecto, todos).")
+        parser.add_argument("--rows", type=int, default=25, help="Filas por página.")
+        parser.add_argument("--repeat", type=int, default=200, help="Renders por medición.")
+        parser.add_argument("--json", dest="json_path", help="Guarda los resultados en este archivo.")
+
+    def handle(self, *args, **opts):
+        registry = get_registry()
+        try:
+            configs = [registry.by_slug(s) for s in opts["slugs"]] or list(registry)
+        except KeyError as e:
+            raise CommandError(f"Módulo desconocido: {e.args[0]}")
+        legacy = engines["django"].from_string(LEGACY_TBODY)
+
+        results = {}
+        self.stdout.write(f"{'módulo':<20}{'cols':>5}{'plantilla µs':>14}{'compilado µs':>14}{'x':>7}")
+        for cfg in configs:
+            items = [_fake(cfg.model, i) for i in range(1, opts["rows"] + 1)]
+            ctx = {"cfg": cfg, "items": items, "can_change": True, "can_delete": True}
+
+            def old():
+                return legacy.render(ctx)
+
+            def new():
+                return render_rows(cfg, items, True, True)
+
+            if _normalize(old()) != _normalize(new()):
+                raise CommandError(f"{cfg.slug}: el HTML de render_rows no coincide con la plantilla.")
+            t_old = min(timeit.repeat(old, number=opts["repeat"], repeat=3)) / opts["repeat"] * 1e6
+            t_new = min(timeit.repeat(new, number=opts["repeat"], repeat=3)) / opts["repeat"] * 1e6
+            results[cfg.slug] = {"columns": len(cfg.list_display), "rows": len(items),
+                                 "template_us": t_old, "compiled_us": t_new, "speedup": t_old / t_new}
+            self.stdout.write(f"{cfg.slug:<20}{len(cfg.list_display):>5}{t_old:>14.0f}{t_new:>14.0f}"
+                              f"{t_old / t_new:>7.1f}")
+
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Resultados en {opts['json_path']}")
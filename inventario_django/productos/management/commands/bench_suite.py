@@ -0,0 +1,100 @@
+# productos/management/commands/bench_suite.py
+from datetime import datetime, timezone
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from productos import benchdata
+from productos.benchsuite import default_scenarios, run, select
+
+
+def _git_head() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de las rutas web del inventario sobre los datos de la BD actual "
+        "(generarlos con seed_bench): p50/p95, consultas y pico de memoria por "
+        "escenario. Guarda JSON con --json y compara contra una corrida anterior con --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-k", dest="patterns", action="append", default=[],
+                            help="Solo escenarios cuyo nombre contenga este texto (repetible).")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--warm", action="store_true",
+                            help="Mide con cache (por defecto se vacía el cache antes de cada request).")
+        parser.add_argument("--no-memory", action="store_true", help="Omite la pasada con tracemalloc.")
+        parser.add_argument("--user", help="Usuario con que se navega (por defecto, el primer superusuario).")
+        parser.add_argument("--list", action="store_true", help="Solo lista los escenarios.")
+        parser.add_argument("--json", dest="json_path", help="Guarda los resultados en este archivo.")
+        parser.add_argument("--compare", help="JSON de una corrida anterior para comparar.")
+
+    def handle(self, *args, **opts):
+        if opts["iterations"] < 1:
+            raise CommandError("--iterations debe ser positivo.")
+        User = get_user_model()
+        user = (User.objects.filter(username=opts["user"]).first() if opts["user"]
+                else User.objects.filter(is_superuser=True, is_active=True).first())
+        if user is None:
+            raise CommandError("No hay usuario para navegar; crea un superusuario o usa --user.")
+
+        scenarios = select(default_scenarios(user), opts["patterns"])
+        if opts["list"]:
+            for s in scenarios:
+                self.stdout.write(s.name)
+            return
+        if not scenarios:
+            raise CommandError("Ningún escenario coincide con -k.")
+
+        baseline = {}
+        if opts["compare"]:
+            with open(opts["compare"]) as f:
+                baseline = json.load(f).get("scenarios", {})
+
+        meta = {
+            "git": _git_head(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "vendor": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "rows": dict(benchdata.iter_counts()),
+            "iterations": opts["iterations"],
+            "warm": opts["warm"],
+        }
+        self.stdout.write(f"{meta['vendor']} · {meta['rows']['equipo']} equipos · "
+                          f"{'con cache' if opts['warm'] else 'en frío'}")
+        self.stdout.write(f"{'escenario':<34}{'p50 ms':>9}{'p95 ms':>9}{'consultas':>10}{'pico KB':>9}")
+
+        results = {}
+        for s in scenarios:
+            r = run(s, opts["iterations"], opts["warmup"], warm=opts["warm"],
+                    memory=not opts["no_memory"]).as_dict()
+            results[s.name] = r
+            line = (f"{s.name:<34}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['queries']:>10}"
+                    f"{r['peak_kb'] or 0:>9.0f}")
+            if s.name in baseline:
+                old = baseline[s.name]
+                line += f"   {(r['p50_ms'] / old['p50_ms'] - 1) * 100:+6.1f}% p50 (antes {old['p50_ms']:.1f})"
+                if old["queries"] != r["queries"]:
+                    line += f", consultas {old['queries']} -> {r['queries']}"
+            if r["status"] != 200:
+                line += f"   HTTP {r['status']}"
+            self.stdout.write(line)
+
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as f:
+                json.dump({"meta": meta, "scenarios": results}, f, indent=2)
+            self.stdout.write(f"Resultados en {opts['json_path']}")
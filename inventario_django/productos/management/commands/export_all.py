@@ -0,0 +1,56 @@
+# productos/management/commands/export_all.py
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.archive import ARCHIVE_FORMATS, TABLE_FORMATS, export_all
+from productos.crud import get_registry
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta todos los modelos del CRUD (o los de --only) a un zip / tar.gz, una "
+        "tabla por archivo más manifest.json. Las tablas se leen en paralelo, cada una "
+        "con su conexión y en bloques de CRUD_EXPORT_CHUNK_SIZE filas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", default=None,
+                            help="Archivo de salida (por defecto MEDIA_ROOT/JOB_EXPORT_DIR/inventario-<fecha>).")
+        parser.add_argument("--format", choices=list(ARCHIVE_FORMATS), default="zip")
+        parser.add_argument("--table-format", choices=TABLE_FORMATS, default="csv",
+                            help="parquet requiere pyarrow.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Tablas en paralelo (por defecto EXPORT_ALL_WORKERS; 1 = en serie).")
+        parser.add_argument("--processes", action="store_true", default=None,
+                            help="Procesos (fork) en vez de hilos (por defecto EXPORT_ALL_PROCESSES).")
+        parser.add_argument("--only", action="append", default=None, metavar="SLUG",
+                            help="Solo este modelo (repetible).")
+
+    def handle(self, *args, **opts):
+        registry = get_registry()
+        if opts["only"]:
+            unknown = [s for s in opts["only"] if registry.get(s) is None]
+            if unknown:
+                raise CommandError(f"Modelos desconocidos: {', '.join(unknown)}")
+        ext = ARCHIVE_FORMATS[opts["format"]]
+        if opts["output"]:
+            output = Path(opts["output"])
+        else:
+            output = Path(settings.MEDIA_ROOT, getattr(settings, "JOB_EXPORT_DIR", "exports"),
+                          f"inventario-{datetime.now():%Y%m%d-%H%M%S}{ext}")
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        t0 = perf_counter()
+        try:
+            counts = export_all(output, archive=opts["format"], table_format=opts["table_format"],
+                                slugs=opts["only"], workers=opts["workers"], processes=opts["processes"],
+                                progress=lambda done, total: self.stderr.write(f"{done}/{total} tablas"))
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{output}: {len(counts)} tablas, {sum(counts.values())} filas en {perf_counter() - t0:.1f} s."
+        ))
@@ -0,0 +1,47 @@
+# productos/management/commands/import_crud.py
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.crud import get_registry
+from productos.importer import ImportFileError, Importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa un CSV o Excel (.xlsx) a un módulo del CRUD (p.ej. equipos). "
+        "Mismas reglas que <slug>/importar/: filas con ID se actualizan, sin ID se crean."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug", help="Módulo destino (slug del CRUD).")
+        parser.add_argument("archivo", help="Ruta al .csv o .xlsx.")
+        parser.add_argument("--chunk-size", type=int,
+                            default=getattr(settings, "CRUD_IMPORT_CHUNK_SIZE", 1000))
+        parser.add_argument("--dry-run", action="store_true", help="Solo valida; no escribe.")
+
+    def handle(self, *args, **opts):
+        try:
+            cfg = get_registry().by_slug(opts["slug"])
+        except KeyError:
+            raise CommandError(f"Módulo desconocido: {opts['slug']}")
+        path = Path(opts["archivo"])
+        if not path.is_file():
+            raise CommandError(f"No existe el archivo {path}")
+
+        importer = Importer(cfg, chunk_size=opts["chunk_size"], dry_run=opts["dry_run"])
+        try:
+            with path.open("rb") as f:
+                report = importer.run(f, path.name)
+        except ImportFileError as e:
+            raise CommandError(str(e))
+
+        for e in report.errors:
+            self.stderr.write(f"línea {e.line}: {e}")
+        if report.ignored_columns:
+            self.stdout.write(f"Columnas ignoradas: {', '.join(report.ignored_columns)}")
+        verbo = "validadas" if report.dry_run else "importadas"
+        msg = (f"{cfg.slug}: {report.rows} filas {verbo} · {report.created} nuevas · "
+               f"{report.updated} actualizadas · {len(report.errors)} con errores")
+        self.stdout.write(self.style.SUCCESS(msg) if report.ok else self.style.WARNING(msg))
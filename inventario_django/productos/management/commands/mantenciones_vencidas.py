@@ -0,0 +1,65 @@
+# productos/management/commands/mantenciones_vencidas.py
+import csv
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.catalogs import get_catalog
+from productos.models_inventario import TipoEquipo
+from productos.programacion import rebuild, vencidas
+
+COLUMNS = ("id_equipo", "nombre_equipo", "tipo_equipo", "ultima", "proxima", "dias_atraso")
+
+
+class Command(BaseCommand):
+    help = (
+        "Lista en CSV los equipos con mantención vencida o por vencer, desde la cola "
+        "MantencionProgramada (una sola consulta, leída en bloques). Tras migrate la "
+        "cola está vacía: solo entran los equipos de tipos con IntervaloMantencion, y "
+        "crear un intervalo (admin) encola sus equipos. Con --rebuild se reconstruye "
+        "antes; hace falta si se cargaron intervalos, equipos o mantenciones sin "
+        "señales (loaddata, SQL directo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fecha", type=date.fromisoformat, default=None,
+                            help="Fecha de referencia (AAAA-MM-DD); por defecto hoy.")
+        parser.add_argument("--dias", type=int, default=0,
+                            help="Incluir también las que vencen dentro de N días.")
+        parser.add_argument("--tipo", default=None, help="Solo este tipo de equipo (nombre).")
+        parser.add_argument("--output", "-o", default=None, help="Archivo CSV (por defecto stdout).")
+        parser.add_argument("--count", action="store_true", help="Solo mostrar la cantidad.")
+        parser.add_argument("--rebuild", action="store_true", help="Reconstruir la cola antes de listar.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        if opts["rebuild"]:
+            n = rebuild(chunk_size=opts["chunk_size"])
+            self.stderr.write(f"MantencionProgramada: {n} filas.")
+
+        hoy = opts["fecha"] or date.today()
+        tipo = None
+        if opts["tipo"]:
+            tipo = get_catalog(TipoEquipo).id_for(opts["tipo"])
+            if tipo is None:
+                raise CommandError(f"Tipo de equipo desconocido: {opts['tipo']}")
+        qs = vencidas(hoy + timedelta(days=opts["dias"]), tipo)
+
+        if opts["count"]:
+            self.stdout.write(str(qs.count()))
+            return
+
+        rows = qs.values_list("id_equipo", "id_equipo__nombre_equipo", "id_tipo_equipo__tipo_equipo",
+                              "ultima", "proxima")
+        out = open(opts["output"], "w", newline="", encoding="utf-8") if opts["output"] else self.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(COLUMNS)
+            n = 0
+            for pk, nombre, tipo_nombre, ultima, proxima in rows.iterator(chunk_size=opts["chunk_size"]):
+                writer.writerow((pk, nombre, tipo_nombre, ultima or "", proxima, (hoy - proxima).days))
+                n += 1
+        finally:
+            if out is not self.stdout:
+                out.close()
+        self.stderr.write(f"{n} equipos.")
@@ -0,0 +1,20 @@
+# productos/management/commands/prune_jobs.py
+from django.core.management.base import BaseCommand
+
+from productos.jobs import prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las tareas terminadas (tabla job) y los archivos generados bajo "
+        "MEDIA_ROOT/JOB_EXPORT_DIR más viejos que JOB_RESULT_TTL. runworker lo hace "
+        "cada hora; útil en cron si no hay worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl", type=int, default=None,
+                            help="Segundos de retención (por defecto JOB_RESULT_TTL).")
+
+    def handle(self, *args, **opts):
+        jobs, files = prune(opts["ttl"])
+        self.stdout.write(self.style.SUCCESS(f"{jobs} tarea(s) y {files} archivo(s) borrados."))
@@ -0,0 +1,29 @@
+# productos/management/commands/rebuild_gastos.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.gastos import rebuild
+from productos.kpis import invalidate_home_kpis
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el rollup de gasto mensual (GastoMensual) desde DetalleFactura. "
+        "Correr una vez tras migrate; luego se mantiene con señales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("meses", nargs="*", help="Meses a recalcular, AAAA-MM (por defecto, todos).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        meses = None
+        if opts["meses"]:
+            try:
+                meses = [date.fromisoformat(f"{m}-01") for m in opts["meses"]]
+            except ValueError as e:
+                raise CommandError(f"Mes inválido (formato AAAA-MM): {e}")
+        n = rebuild(meses, chunk_size=opts["chunk_size"])
+        invalidate_home_kpis()
+        self.stdout.write(self.style.SUCCESS(f"GastoMensual: {n} filas."))
@@ -0,0 +1,18 @@
+# productos/management/commands/rebuild_listing.py
+from django.core.management.base import BaseCommand
+
+from productos.listing import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el modelo de lectura de equipos (EquipoListing) desde Equipo, "
+        "sus catálogos y Mantencion. Correr una vez tras migrate; luego se mantiene con señales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        n = rebuild(chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"EquipoListing: {n} filas."))
@@ -0,0 +1,93 @@
+# productos/management/commands/runworker.py
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from productos.jobs import work
+
+
+def _run_threads(prefix: str, opts, stop: threading.Event) -> int:
+    """Corre `threads` hilos de work() y espera a que terminen. Devuelve las tareas corridas."""
+    done = [0] * opts["threads"]
+
+    def target(i):
+        try:
+            done[i] = work(f"{prefix}:{i}", stop, once=opts["once"], poll=opts["poll"], max_jobs=opts["max_jobs"])
+        finally:
+            connections.close_all()  # las de este hilo
+
+    threads = [threading.Thread(target=target, args=(i,), name=f"worker-{i}") for i in range(opts["threads"])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(done)
+
+
+def _process_main(prefix: str, opts):
+    # proceso hijo (fork): SIGTERM/SIGINT terminan la tarea en curso y salen
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    _run_threads(prefix, opts, stop)
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de tareas en la BD (productos/jobs.py): exportaciones CSV y "
+        "reconstrucciones. Corre --processes procesos con --threads hilos cada uno. "
+        "Ctrl-C / SIGTERM: termina las tareas en curso y sale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=None,
+                            help="Procesos (fork; por defecto JOB_WORKER_PROCESSES).")
+        parser.add_argument("--threads", type=int, default=None,
+                            help="Hilos por proceso (por defecto JOB_WORKER_THREADS).")
+        parser.add_argument("--poll", type=float, default=None,
+                            help="Segundos entre consultas con la cola vacía (por defecto JOB_POLL_SECONDS).")
+        parser.add_argument("--once", action="store_true", help="Vaciar la cola y salir (cron, pruebas).")
+        parser.add_argument("--max-jobs", type=int, default=None, help="Salir tras N tareas por hilo.")
+
+    def handle(self, *args, **opts):
+        opts["processes"] = opts["processes"] or getattr(settings, "JOB_WORKER_PROCESSES", 1)
+        opts["threads"] = opts["threads"] or getattr(settings, "JOB_WORKER_THREADS", 2)
+        if opts["processes"] < 1 or opts["threads"] < 1:
+            raise CommandError("--processes y --threads deben ser positivos.")
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {prefix}: {opts['processes']} proceso(s) × {opts['threads']} hilo(s).")
+
+        if opts["processes"] == 1:
+            stop = threading.Event()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, lambda *_: stop.set())
+            n = _run_threads(prefix, opts, stop)
+            self.stdout.write(self.style.SUCCESS(f"{n} tarea(s) corrida(s)."))
+            return
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise CommandError("--processes > 1 requiere fork (Linux/macOS); use --threads.")
+        ctx = multiprocessing.get_context("fork")
+        connections.close_all()  # cada hijo abre las suyas
+        procs = [ctx.Process(target=_process_main, args=(f"{prefix}/{i}", opts), name=f"runworker-{i}")
+                 for i in range(opts["processes"])]
+        for p in procs:
+            p.start()
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            for p in procs:
+                p.terminate()
+            for p in procs:
+                p.join()
+        failed = [p.name for p in procs if p.exitcode]
+        if failed:
+            raise CommandError(f"Procesos con error: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("Procesos terminados."))
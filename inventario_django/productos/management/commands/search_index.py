@@ -0,0 +1,40 @@
+# productos/management/commands/search_index.py
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.crud import get_crud_configs
+from productos.listing import LISTING_SEARCH_FIELDS
+from productos.models import EquipoListing
+from productos.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Construye los índices de búsqueda de los search_fields de cada CrudConfig "
+        "(y del listado de equipos): "
+        "tablas FTS5 en SQLite o índices GIN pg_trgm en PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="*", help="Módulos a indexar (por defecto, todos).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        backend = get_search_backend()
+        configs = get_crud_configs()
+        if opts["slugs"]:
+            unknown = set(opts["slugs"]) - {c.slug for c in configs}
+            if unknown:
+                raise CommandError(f"Módulos desconocidos: {', '.join(sorted(unknown))}")
+            configs = [c for c in configs if c.slug in opts["slugs"]]
+
+        self.stdout.write(f"Backend: {backend.name}")
+        for cfg in configs:
+            if not cfg.search_fields:
+                continue
+            n = backend.build_index(cfg.model, cfg.search_fields, chunk_size=opts["chunk_size"])
+            self.stdout.write(f"  {cfg.slug}: {n}")
+        if not opts["slugs"]:
+            # ?q= del listado de equipos (modelo de lectura, fuera del CRUD)
+            n = backend.build_index(EquipoListing, LISTING_SEARCH_FIELDS, chunk_size=opts["chunk_size"])
+            self.stdout.write(f"  equipo_listing: {n}")
+        self.stdout.write(self.style.SUCCESS("Índices de búsqueda listos."))
@@ -0,0 +1,45 @@
+# productos/management/commands/seed_bench.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from productos import benchdata
+from productos.derived import after_bulk_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un inventario sintético para benchmarks (bench_suite): --scale equipos, "
+        "~2 mantenciones y 1 línea de factura por equipo, una factura cada 5 equipos. "
+        "Luego reconstruye gasto mensual, listado de equipos e índices de búsqueda."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=10_000, help="Cantidad de equipos (10k a 1M).")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--flush", action="store_true",
+                            help="Vacía antes las tablas del inventario (¡borra los datos existentes!).")
+        parser.add_argument("--create-tables", action="store_true",
+                            help="Crea las tablas del inventario (managed=False) que falten en esta BD.")
+
+    def handle(self, *args, **opts):
+        if opts["scale"] < 1:
+            raise CommandError("--scale debe ser positivo.")
+        self.stdout.write(f"BD: {connection.vendor} {connection.settings_dict['NAME']}")
+        if opts["create_tables"]:
+            for table in benchdata.ensure_tables():
+                self.stdout.write(f"  tabla creada: {table}")
+        if opts["flush"]:
+            benchdata.flush()
+            self.stdout.write("  tablas vaciadas")
+
+        t0 = time.perf_counter()
+        benchdata.generate(opts["scale"], seed=opts["seed"], chunk_size=opts["chunk_size"],
+                           log=lambda msg: self.stdout.write(f"  {msg}"))
+        self.stdout.write(f"Datos en {time.perf_counter() - t0:.1f}s; reconstruyendo derivados...")
+
+        # bulk_create no emite señales
+        after_bulk_load(benchdata.INVENTORY_MODELS, log=lambda msg: self.stdout.write(f"  {msg}"))
+        self.stdout.write(self.style.SUCCESS(f"Listo en {time.perf_counter() - t0:.1f}s."))
@@ -0,0 +1,22 @@
+# productos/management/commands/sync_asignaciones.py
+from django.core.management.base import BaseCommand
+
+from productos.asignaciones import sync
+from productos.models_inventario import Equipo
+
+
+class Command(BaseCommand):
+    help = (
+        "Alinea el historial de asignaciones (AsignacionEquipo) con Equipo.id_empleado: "
+        "cierra las vigentes que ya no corresponden y abre las que faltan, con fecha de hoy. "
+        "La migración 0008 ya abre las vigentes de los equipos existentes; correr "
+        "después de cargar equipos sin señales (loaddata, SQL directo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        ids = Equipo.objects.order_by("pk").values_list("pk", flat=True)
+        n = sync(ids.iterator(chunk_size=opts["chunk_size"]), chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"AsignacionEquipo: {n} asignaciones abiertas."))
@@ -0,0 +1,161 @@
+# productos/metrics.py
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from time import perf_counter
+from typing import Dict, List, Optional
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+# Instrumentación por request (ver RequestMetricsMiddleware): consultas y
+# tiempo de BD (execute_wrapper), tiempo de render de la plantilla y total,
+# agrupados por nombre de URL ("productos:equipos_list"). Cada request deja
+# una línea en el logger productos.metrics y suma a un registro en memoria
+# que /metrics/ expone en formato de texto Prometheus. El registro es por
+# proceso: con varios workers, cada uno reporta lo suyo.
+
+logger = logging.getLogger("productos.metrics")
+
+# límites (segundos) del histograma de latencia
+BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+UNRESOLVED = "sin_ruta"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """La vista hizo más consultas que su presupuesto (solo con QUERY_BUDGET_STRICT)."""
+
+
+class QueryRecorder:
+    """execute_wrapper que cuenta consultas y suma su tiempo."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self._installed = []
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += perf_counter() - t0
+            self.queries += 1
+
+    def install(self):
+        for conn in connections.all():
+            conn.execute_wrappers.append(self)
+            self._installed.append(conn)
+
+    def uninstall(self):
+        while self._installed:
+            self._installed.pop().execute_wrappers.remove(self)
+
+
+def query_budget(view_name: str) -> Optional[int]:
+    """Presupuesto de consultas de la vista: nombre exacto, luego comodines, luego el default."""
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    if view_name in budgets:
+        return budgets[view_name]
+    for pattern, budget in budgets.items():
+        if fnmatchcase(view_name, pattern):
+            return budget
+    return getattr(settings, "QUERY_BUDGET_DEFAULT", None)
+
+
+@dataclass
+class ViewStats:
+    requests: int = 0
+    errors: int = 0  # respuestas 5xx
+    seconds: float = 0.0
+    db_seconds: float = 0.0
+    template_seconds: float = 0.0
+    queries: int = 0
+    max_queries: int = 0
+    over_budget: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+
+
+_stats: Dict[str, ViewStats] = {}
+_lock = threading.Lock()
+
+
+def record(view_name: str, status: int, seconds: float, db_seconds: float, template_seconds: float,
+           queries: int, over_budget: bool):
+    with _lock:
+        s = _stats.get(view_name)
+        if s is None:
+            s = _stats[view_name] = ViewStats()
+        s.requests += 1
+        s.errors += status >= 500
+        s.seconds += seconds
+        s.db_seconds += db_seconds
+        s.template_seconds += template_seconds
+        s.queries += queries
+        s.max_queries = max(s.max_queries, queries)
+        s.over_budget += over_budget
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                s.buckets[i] += 1
+                break
+
+
+def snapshot() -> Dict[str, ViewStats]:
+    with _lock:
+        return {name: ViewStats(**{**vars(s), "buckets": list(s.buckets)}) for name, s in _stats.items()}
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _metric(lines, name, kind, help_text, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    lines.extend(f'{name}{{view="{view}"{extra}}} {value}' for view, extra, value in values)
+
+
+def render_prometheus(stats: Dict[str, ViewStats]) -> str:
+    items = sorted(stats.items())
+    lines: List[str] = []
+    _metric(lines, "productos_requests_total", "counter", "Requests por vista.",
+            [(v, "", s.requests) for v, s in items])
+    _metric(lines, "productos_request_errors_total", "counter", "Respuestas 5xx por vista.",
+            [(v, "", s.errors) for v, s in items])
+    hist = []
+    for v, s in items:
+        acc = 0
+        for le, n in zip(BUCKETS, s.buckets):
+            acc += n
+            hist.append((v, f',le="{le}"', acc))
+        hist.append((v, ',le="+Inf"', s.requests))
+    _metric(lines, "productos_request_seconds_bucket", "counter", "Latencia total (histograma acumulado).", hist)
+    _metric(lines, "productos_request_seconds_sum", "counter", "Suma de la latencia total.",
+            [(v, "", f"{s.seconds:.6f}") for v, s in items])
+    _metric(lines, "productos_db_seconds_sum", "counter", "Suma del tiempo en la BD.",
+            [(v, "", f"{s.db_seconds:.6f}") for v, s in items])
+    _metric(lines, "productos_template_seconds_sum", "counter", "Suma del render de plantillas (TemplateResponse).",
+            [(v, "", f"{s.template_seconds:.6f}") for v, s in items])
+    _metric(lines, "productos_db_queries_total", "counter", "Consultas SQL por vista.",
+            [(v, "", s.queries) for v, s in items])
+    _metric(lines, "productos_db_queries_max", "gauge", "Máximo de consultas en un request.",
+            [(v, "", s.max_queries) for v, s in items])
+    _metric(lines, "productos_query_budget_exceeded_total", "counter", "Requests sobre el presupuesto de consultas.",
+            [(v, "", s.over_budget) for v, s in items])
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Métricas agregadas del proceso. Con METRICS_TOKEN: Authorization: Bearer <token>; si no, superusuario."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        allowed = constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    else:
+        allowed = request.user.is_authenticated and request.user.is_superuser
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(snapshot()), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,78 @@
+# productos/middleware.py
+from time import perf_counter
+
+from django.conf import settings
+
+from .metrics import UNRESOLVED, QueryBudgetExceeded, QueryRecorder, logger, query_budget, record
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide cada request (ver metrics.py). Va primero en MIDDLEWARE para incluir
+    las consultas de sesión y autenticación. En las respuestas en streaming
+    (exportar CSV) la medición termina al consumirse el contenido, y el
+    presupuesto solo se registra (el status ya se envió).
+    Las consultas que corren en otros hilos (pool de fanout.py) no se cuentan.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "REQUEST_METRICS", True):
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        request._metrics_template = [0.0, 0.0]  # inicio y duración del render
+        t0 = perf_counter()
+        recorder.install()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            recorder.uninstall()
+            raise
+
+        if response.streaming and not response.is_async:
+            content = response.streaming_content
+            response.streaming_content = self._streamed(content, request, response, recorder, t0)
+            return response
+        recorder.uninstall()
+        over = self._finish(request, response, recorder, perf_counter() - t0)
+        if over and getattr(settings, "QUERY_BUDGET_STRICT", False):
+            raise QueryBudgetExceeded(over)
+        return response
+
+    def process_template_response(self, request, response):
+        # el handler renderiza justo después de este hook; el callback marca el fin
+        timing = getattr(request, "_metrics_template", None)
+        if timing is not None:
+            timing[0] = perf_counter()
+
+            def done(rendered):
+                timing[1] = perf_counter() - timing[0]
+            response.add_post_render_callback(done)
+        return response
+
+    def _streamed(self, content, request, response, recorder, t0):
+        # response.close() cierra este generador aunque no se consuma entero
+        try:
+            yield from content
+        finally:
+            recorder.uninstall()
+            self._finish(request, response, recorder, perf_counter() - t0)
+
+    def _finish(self, request, response, recorder, seconds) -> str:
+        """Registra el request; si excedió el presupuesto devuelve el detalle ("" si no)."""
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        budget = query_budget(view)
+        over = budget is not None and recorder.queries > budget
+        template = request._metrics_template[1]
+        record(view, response.status_code, seconds, recorder.db_seconds, template, recorder.queries, over)
+        logger.info("%s %s %s %d %.1fms db=%d/%.1fms tpl=%.1fms", view, request.method, request.path,
+                    response.status_code, seconds * 1000, recorder.queries, recorder.db_seconds * 1000,
+                    template * 1000)
+        if not over:
+            return ""
+        detail = f"{view}: {recorder.queries} consultas, presupuesto {budget} ({request.get_full_path()})"
+        logger.warning(detail)
+        return detail
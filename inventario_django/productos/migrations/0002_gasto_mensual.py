@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GastoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(db_index=True)),
+                ('total', models.BigIntegerField(default=0)),
+                ('lineas', models.IntegerField(default=0)),
+                ('id_proveedor', models.ForeignKey(blank=True, db_column='id_proveedor', db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.proveedor')),
+                ('id_tipo_equipo', models.ForeignKey(blank=True, db_column='id_tipo_equipo', db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.tipoequipo')),
+            ],
+            options={
+                'db_table': 'gasto_mensual',
+                'ordering': ['mes'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0002_gasto_mensual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipoListing',
+            fields=[
+                ('id_equipo', models.IntegerField(primary_key=True, serialize=False)),
+                ('nombre_equipo', models.CharField(max_length=150)),
+                ('marca', models.CharField(blank=True, max_length=100, null=True)),
+                ('tipo_equipo', models.CharField(blank=True, max_length=100, null=True)),
+                ('estado', models.CharField(blank=True, max_length=100, null=True)),
+                ('empleado', models.CharField(blank=True, max_length=300, null=True)),
+                ('proveedor', models.CharField(blank=True, max_length=200, null=True)),
+                ('mantenciones', models.IntegerField(default=0)),
+                ('ultima_mantencion', models.DateField(blank=True, null=True)),
+                ('estado_ultima_mantencion', models.CharField(blank=True, max_length=50, null=True)),
+                ('id_empleado', models.ForeignKey(blank=True, db_column='id_empleado', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.empleado')),
+                ('id_estado_equipo', models.ForeignKey(blank=True, db_column='id_estado_equipo', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.estadoequipo')),
+                ('id_estado_ultima_mantencion', models.ForeignKey(blank=True, db_column='id_estado_ultima_mantencion', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.estadomantencion')),
+                ('id_marca', models.ForeignKey(blank=True, db_column='id_marca', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.marca')),
+                ('id_proveedor', models.ForeignKey(blank=True, db_column='id_proveedor', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.proveedor')),
+                ('id_tipo_equipo', models.ForeignKey(blank=True, db_column='id_tipo_equipo', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.tipoequipo')),
+            ],
+            options={
+                'db_table': 'equipo_listing',
+                'indexes': [models.Index(fields=['nombre_equipo'], name='equipo_listing_nombre_idx'), models.Index(fields=['id_tipo_equipo', 'nombre_equipo'], name='equipo_listing_tipo_idx'), models.Index(fields=['id_estado_equipo', 'nombre_equipo'], name='equipo_listing_estado_idx'), models.Index(fields=['id_marca', 'nombre_equipo'], name='equipo_listing_marca_idx'), models.Index(fields=['id_empleado'], name='equipo_listing_empleado_idx'), models.Index(fields=['id_proveedor'], name='equipo_listing_proveedor_idx'), models.Index(fields=['id_estado_ultima_mantencion'], name='equipo_listing_est_mant_idx')],
+            },
+        ),
+    ]
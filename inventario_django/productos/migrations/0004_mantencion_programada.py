@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:23
+# La cola nace vacía, igual que los intervalos: cada IntervaloMantencion que se
+# crea (admin) encola los equipos de su tipo por señal. Si los intervalos se
+# cargan sin señales: `manage.py mantenciones_vencidas --rebuild`.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0003_equipo_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntervaloMantencion',
+            fields=[
+                ('id_tipo_equipo', models.OneToOneField(db_column='id_tipo_equipo', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='productos.tipoequipo')),
+                ('dias', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name': 'intervalo de mantención',
+                'verbose_name_plural': 'intervalos de mantención',
+                'db_table': 'intervalo_mantencion',
+            },
+        ),
+        migrations.CreateModel(
+            name='MantencionProgramada',
+            fields=[
+                ('id_equipo', models.OneToOneField(db_column='id_equipo', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='productos.equipo')),
+                ('ultima', models.DateField(blank=True, null=True)),
+                ('alta', models.DateField()),
+                ('proxima', models.DateField()),
+                ('id_tipo_equipo', models.ForeignKey(blank=True, db_column='id_tipo_equipo', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.tipoequipo')),
+            ],
+            options={
+                'db_table': 'mantencion_programada',
+                'indexes': [models.Index(fields=['proxima', 'id_equipo'], name='mant_prog_proxima_idx'), models.Index(fields=['id_tipo_equipo', 'proxima'], name='mant_prog_tipo_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0004_mantencion_programada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsignacionEquipo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde', models.DateTimeField()),
+                ('hasta', models.DateTimeField(blank=True, null=True)),
+                ('id_empleado', models.ForeignKey(blank=True, db_column='id_empleado', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.empleado')),
+                ('id_equipo', models.ForeignKey(blank=True, db_column='id_equipo', db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='productos.equipo')),
+            ],
+            options={
+                'db_table': 'asignacion_equipo',
+                'indexes': [models.Index(fields=['id_equipo', 'desde', 'hasta'], name='asignacion_equipo_idx'), models.Index(fields=['id_empleado', 'desde', 'hasta'], name='asignacion_empleado_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('hasta__isnull', True)), fields=('id_equipo',), name='asignacion_vigente_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Llena equipo_listing (0003 la creó vacía) en las BD que ya tienen equipos.
+# Copia congelada en SQL de listing.build_rows (nombres como los __str__ de
+# esta fecha): no importa código de la app, que puede cambiar después, y
+# las tablas del inventario no tienen sus FK en el estado de migraciones.
+
+from django.db import migrations
+
+BACKFILL_SQL = """
+INSERT INTO equipo_listing (
+    id_equipo, nombre_equipo, id_marca, marca, id_tipo_equipo, tipo_equipo,
+    id_estado_equipo, estado, id_empleado, empleado, id_proveedor, proveedor,
+    mantenciones, ultima_mantencion, id_estado_ultima_mantencion, estado_ultima_mantencion
+)
+SELECT
+    e.id_equipo, e.nombre_equipo, e.id_marca, ma.nombre_marca, e.id_tipo_equipo, t.tipo_equipo,
+    e.id_estado_equipo, es.descripcion, e.id_empleado,
+    TRIM(em.nombre || ' ' || em.apellido_paterno || ' ' || COALESCE(em.apellido_materno, '')),
+    e.id_proveedor, p.nombre_proveedor,
+    (SELECT COUNT(*) FROM mantencion m WHERE m.id_equipo = e.id_equipo),
+    u.fecha, u.id_estado_mantencion, eu.tipo
+FROM equipo e
+LEFT JOIN marca ma ON ma.id_marca = e.id_marca
+LEFT JOIN tipo_equipo t ON t.id_tipo_equipo = e.id_tipo_equipo
+LEFT JOIN estado_equipo es ON es.id_estado_equipo = e.id_estado_equipo
+LEFT JOIN empleado em ON em.id_empleado = e.id_empleado
+LEFT JOIN proveedor p ON p.id_proveedor = e.id_proveedor
+-- última mantención: la más reciente con fecha; a igual fecha, la última creada
+LEFT JOIN mantencion u ON u.id_mantencion = (
+    SELECT m.id_mantencion FROM mantencion m WHERE m.id_equipo = e.id_equipo
+    ORDER BY (m.fecha IS NULL), m.fecha DESC, m.id_mantencion DESC
+    LIMIT 1
+)
+LEFT JOIN estado_mantencion eu ON eu.id_estado_mantencion = u.id_estado_mantencion
+"""
+
+
+def backfill(apps, schema_editor):
+    # las tablas del inventario son managed=False: pueden no existir (BD nueva, pruebas)
+    connection = schema_editor.connection
+    if "equipo" not in set(connection.introspection.table_names()):
+        return
+    EquipoListing = apps.get_model("productos", "EquipoListing")
+    if EquipoListing.objects.exists():
+        return
+    schema_editor.execute(BACKFILL_SQL)
+    if connection.vendor == "sqlite":
+        # un índice FTS previo quedó vacío: sin él la búsqueda cae a LIKE hasta
+        # que `manage.py search_index` lo reconstruya
+        schema_editor.execute('DROP TABLE IF EXISTS "equipo_listing_fts"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
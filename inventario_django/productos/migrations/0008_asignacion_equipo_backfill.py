@@ -0,0 +1,38 @@
+# Abre en asignacion_equipo (0005 la creó vacía) la asignación vigente de cada
+# equipo con empleado, desde la fecha de esta migración: el historial anterior
+# no existe. SQL congelado (ver 0007); no toca equipos que ya tienen una
+# vigente, así que es lo mismo que `manage.py sync_asignaciones` en una BD nueva.
+
+from django.db import migrations
+from django.utils import timezone
+
+BACKFILL_SQL = """
+INSERT INTO asignacion_equipo (id_equipo, id_empleado, desde, hasta)
+SELECT e.id_equipo, e.id_empleado, %s, NULL
+FROM equipo e
+WHERE e.id_empleado IS NOT NULL
+  AND NOT EXISTS (
+    SELECT 1 FROM asignacion_equipo a WHERE a.id_equipo = e.id_equipo AND a.hasta IS NULL
+  )
+"""
+
+
+def backfill(apps, schema_editor):
+    # las tablas del inventario son managed=False: pueden no existir (BD nueva, pruebas)
+    connection = schema_editor.connection
+    if "equipo" not in set(connection.introspection.table_names()):
+        return
+    desde = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cur:
+        cur.execute(BACKFILL_SQL, [desde])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0007_equipo_listing_backfill'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
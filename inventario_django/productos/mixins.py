@@ -1,7 +1,10 @@
 # productos/mixins.py
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
 
+from .perms import has
+
 class ModelPermsMixin(LoginRequiredMixin):
     """
     Exige login y, si la vista define action_perm = ('view'|'add'|'change'|'delete'),
@@ -10,10 +13,24 @@ class ModelPermsMixin(LoginRequiredMixin):
     action_perm: str | None = None  # 'view' | 'add' | 'change' | 'delete'
 
     def dispatch(self, request, *args, **kwargs):
-        if self.action_perm:
-            app_label = self.model._meta.app_label
-            model_name = self.model._meta.model_name
-            codename = f"{self.action_perm}_{model_name}"
-            if not request.user.has_perm(f"{app_label}.{codename}"):
+        if self.action_perm and request.user.is_authenticated:
+            target = getattr(self, "crud_config", None) or self.model
+            if not has(request.user, self.action_perm, target):
                 raise PermissionDenied
         return super().dispatch(request, *args, **kwargs)
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    TemplateView async (ASGI): exige login con request.auser() y arma el contexto
+    con `async def aget_context_data(**kwargs)`, que define la subclase.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            # handle_no_permission() lee request.user (síncrono): se redirige directo
+            return redirect_to_login(request.get_full_path(), self.get_login_url(),
+                                     self.get_redirect_field_name())
+        self.user = user
+        return self.render_to_response(await self.aget_context_data(**kwargs))
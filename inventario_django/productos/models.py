@@ -1,3 +1,192 @@
+# productos/models.py
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from .models_inventario import (
+    Empleado, Equipo, EstadoEquipo, EstadoMantencion, Marca, Proveedor, TipoEquipo,
+)
+
+# Tablas propias de la app (managed=True, con migraciones). Las del inventario
+# siguen en models_inventario.py (managed=False); las FK hacia ellas van sin
+# constraint para no exigir cambios en ese esquema.
+
+
+class GastoMensual(models.Model):
+    """Rollup de gasto por mes, proveedor y tipo de equipo (ver productos/gastos.py)."""
+    mes = models.DateField(db_index=True)  # primer día del mes
+    id_proveedor = models.ForeignKey(
+        Proveedor, models.DO_NOTHING, db_column="id_proveedor", db_constraint=False,
+        blank=True, null=True, related_name="+",
+    )
+    id_tipo_equipo = models.ForeignKey(
+        TipoEquipo, models.DO_NOTHING, db_column="id_tipo_equipo", db_constraint=False,
+        blank=True, null=True, related_name="+",
+    )
+    total = models.BigIntegerField(default=0)
+    lineas = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "gasto_mensual"
+        ordering = ["mes"]
+
+    def __str__(self):
+        return f"{self.mes:%Y-%m} · {self.id_proveedor_id} · {self.id_tipo_equipo_id}: {self.total}"
+
+
+def _ref(model, column):
+    # FK sin constraint ni índice propio (los índices van compuestos en Meta)
+    return models.ForeignKey(
+        model, models.DO_NOTHING, db_column=column, db_constraint=False, db_index=False,
+        blank=True, null=True, related_name="+",
+    )
+
+
+class EquipoListing(models.Model):
+    """Fila plana por equipo para el listado y el detalle de equipos (ver productos/listing.py)."""
+    id_equipo = models.IntegerField(primary_key=True)
+    nombre_equipo = models.CharField(max_length=150)
+    id_marca = _ref(Marca, "id_marca")
+    marca = models.CharField(max_length=100, blank=True, null=True)
+    id_tipo_equipo = _ref(TipoEquipo, "id_tipo_equipo")
+    tipo_equipo = models.CharField(max_length=100, blank=True, null=True)
+    id_estado_equipo = _ref(EstadoEquipo, "id_estado_equipo")
+    estado = models.CharField(max_length=100, blank=True, null=True)
+    id_empleado = _ref(Empleado, "id_empleado")
+    empleado = models.CharField(max_length=300, blank=True, null=True)
+    id_proveedor = _ref(Proveedor, "id_proveedor")
+    proveedor = models.CharField(max_length=200, blank=True, null=True)
+    mantenciones = models.IntegerField(default=0)
+    ultima_mantencion = models.DateField(blank=True, null=True)
+    id_estado_ultima_mantencion = _ref(EstadoMantencion, "id_estado_ultima_mantencion")
+    estado_ultima_mantencion = models.CharField(max_length=50, blank=True, null=True)
+
+    class Meta:
+        db_table = "equipo_listing"
+        indexes = [
+            # listado ordenado por nombre, con o sin filtro por tipo/estado/marca
+            models.Index(fields=["nombre_equipo"], name="equipo_listing_nombre_idx"),
+            models.Index(fields=["id_tipo_equipo", "nombre_equipo"], name="equipo_listing_tipo_idx"),
+            models.Index(fields=["id_estado_equipo", "nombre_equipo"], name="equipo_listing_estado_idx"),
+            models.Index(fields=["id_marca", "nombre_equipo"], name="equipo_listing_marca_idx"),
+            # refresco al renombrar empleados, proveedores o estados de mantención
+            models.Index(fields=["id_empleado"], name="equipo_listing_empleado_idx"),
+            models.Index(fields=["id_proveedor"], name="equipo_listing_proveedor_idx"),
+            models.Index(fields=["id_estado_ultima_mantencion"], name="equipo_listing_est_mant_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre_equipo} - {self.marca} / {self.tipo_equipo}"
+
+
+class IntervaloMantencion(models.Model):
+    """Cada cuántos días toca mantención a los equipos de un tipo (ver productos/programacion.py)."""
+    id_tipo_equipo = models.OneToOneField(
+        TipoEquipo, models.DO_NOTHING, db_column="id_tipo_equipo", db_constraint=False,
+        primary_key=True, related_name="+",
+    )
+    dias = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = "intervalo_mantencion"
+        verbose_name = "intervalo de mantención"
+        verbose_name_plural = "intervalos de mantención"
+
+    def __str__(self):
+        return f"{self.id_tipo_equipo}: cada {self.dias} días"
+
+
+class MantencionProgramada(models.Model):
+    """Próxima mantención de cada equipo cuyo tipo tiene intervalo (cola ordenada por fecha)."""
+    id_equipo = models.OneToOneField(
+        Equipo, models.DO_NOTHING, db_column="id_equipo", db_constraint=False,
+        primary_key=True, related_name="+",
+    )
+    id_tipo_equipo = _ref(TipoEquipo, "id_tipo_equipo")
+    ultima = models.DateField(blank=True, null=True)  # última mantención realizada
+    alta = models.DateField()  # entrada a la cola: base de la primera mantención
+    proxima = models.DateField()
+
+    class Meta:
+        db_table = "mantencion_programada"
+        indexes = [
+            # vencidas / por vencer: rango sobre proxima, en orden
+            models.Index(fields=["proxima", "id_equipo"], name="mant_prog_proxima_idx"),
+            models.Index(fields=["id_tipo_equipo", "proxima"], name="mant_prog_tipo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.id_equipo_id}: {self.proxima}"
+
+
+class AsignacionEquipo(models.Model):
+    """
+    Historial de asignaciones (ver productos/asignaciones.py): el equipo estuvo
+    con el empleado en [desde, hasta); hasta NULL = asignación vigente.
+    Solo se agregan filas; lo único que se modifica es cerrar la vigente.
+    """
+    id_equipo = _ref(Equipo, "id_equipo")
+    id_empleado = _ref(Empleado, "id_empleado")
+    desde = models.DateTimeField()
+    hasta = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "asignacion_equipo"
+        indexes = [
+            # ¿quién lo tenía en T? / historial del equipo: igualdad + rango sobre desde
+            models.Index(fields=["id_equipo", "desde", "hasta"], name="asignacion_equipo_idx"),
+            # ¿qué tenía el empleado en T? / línea de tiempo del empleado
+            models.Index(fields=["id_empleado", "desde", "hasta"], name="asignacion_empleado_idx"),
+        ]
+        constraints = [
+            # a lo más una asignación vigente por equipo (índice parcial en SQLite y PostgreSQL)
+            models.UniqueConstraint(fields=["id_equipo"], condition=models.Q(hasta__isnull=True),
+                                    name="asignacion_vigente_uniq"),
+        ]
+
+    def __str__(self):
+        hasta = f"{self.hasta:%Y-%m-%d}" if self.hasta else "vigente"
+        return f"{self.id_equipo_id} → {self.id_empleado_id}: {self.desde:%Y-%m-%d} – {hasta}"
+
+
+class Job(models.Model):
+    """Tarea en segundo plano (ver productos/jobs.py y manage.py runworker)."""
+    PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+    STATUS_CHOICES = [(PENDING, "En cola"), (RUNNING, "En proceso"), (DONE, "Lista"), (FAILED, "Falló")]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)  # reintentos: no antes de esta hora
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(blank=True, null=True)
+    result = models.CharField(max_length=255, blank=True)  # archivo bajo MEDIA_ROOT o resumen
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, models.SET_NULL, blank=True, null=True,
+                                   related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "job"
+        indexes = [
+            # siguiente tarea: status = pending AND run_after <= now, en orden
+            models.Index(fields=["status", "run_after", "id"], name="job_cola_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    @property
+    def percent(self) -> int | None:
+        if not self.progress_total:
+            return None
+        return min(100, self.progress_done * 100 // self.progress_total)
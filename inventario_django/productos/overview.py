@@ -1,10 +1,17 @@
 # productos/overview.py
+import asyncio
+
+from django.core.cache import cache
 from django.views.generic import TemplateView
 from django.db.models import Count
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 
 from .crud import get_crud_configs
+from .fanout import gather, run_serial
+from .http_cache import ConditionalPageMixin, fragment_ttl
+from .mixins import AsyncLoginRequiredMixin
+from .stats import aget_module_counts, get_module_counts, count_for
 
 # Modelos opcionales para métricas
 try:
@@ -16,95 +23,111 @@ except Exception:
     Empleado = Departamento = Equipo = TipoEquipo = Mantencion = EstadoMantencion = None
 
 
+def _all_models():
+    return tuple(cfg.model for cfg in get_crud_configs())
+
+
 @method_decorator(login_required(login_url="login"), name="dispatch")
-class CardsGridView(TemplateView):
+class CardsGridView(ConditionalPageMixin, TemplateView):
     """Cuadrícula de módulos (antigua pantalla de tarjetas)."""
     template_name = "overview/cards_grid.html"
 
+    def conditional_models(self):
+        return _all_models()
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        cards = []
-        for cfg in get_crud_configs():
-            try:
-                count = cfg.model.objects.count()
-            except Exception:
-                count = 0
-            cards.append({"cfg": cfg, "count": count})
+        counts = get_module_counts()
+        cards = [{"cfg": cfg, "count": count_for(counts, cfg)} for cfg in get_crud_configs()]
         ctx["cards"] = cards
         return ctx
 
 
 @method_decorator(login_required(login_url="login"), name="dispatch")
-class ListVerticalView(TemplateView):
+class ListVerticalView(ConditionalPageMixin, TemplateView):
     """Listado vertical compacto de módulos."""
     template_name = "overview/list_vertical.html"
 
+    def conditional_models(self):
+        return _all_models()
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        cards = []
-        for cfg in get_crud_configs():
-            try:
-                count = cfg.model.objects.count()
-            except Exception:
-                count = 0
-            cards.append({"cfg": cfg, "count": count})
+        counts = get_module_counts()
+        cards = [{"cfg": cfg, "count": count_for(counts, cfg)} for cfg in get_crud_configs()]
         ctx["cards"] = cards
         return ctx
 
 
+def _group_count(qs, key, pk, empty_label):
+    """Tarea: GROUP BY `key` con COUNT(`pk`), como {"labels": [...], "data": [...]}."""
+    def run():
+        rows = list(qs.values(key).annotate(n=Count(pk)).order_by(key))
+        return {"labels": [r[key] or empty_label for r in rows], "data": [r["n"] for r in rows]}
+    return run
+
+
+def metrics_tasks():
+    """Consultas independientes del dashboard de métricas (ver fanout.py)."""
+    tasks = {}
+    # Empleados por depto
+    if Empleado and Departamento and hasattr(Empleado, "id_departamento"):
+        tasks["emp_by_dept"] = _group_count(
+            Empleado.objects.all(), "id_departamento__nombre_departamento", "id_empleado", "Sin depto")
+    # Equipos por tipo
+    if Equipo and TipoEquipo and hasattr(Equipo, "id_tipo_equipo"):
+        tasks["equipos_by_tipo"] = _group_count(
+            Equipo.objects.all(), "id_tipo_equipo__tipo_equipo", "id_equipo", "Sin tipo")
+    # Mantenciones por estado
+    if Mantencion and EstadoMantencion and hasattr(Mantencion, "id_estado_mantencion"):
+        tasks["mant_by_estado"] = _group_count(
+            Mantencion.objects.all(), "id_estado_mantencion__tipo", "id_mantencion", "Sin estado")
+    return tasks
+
+
+def metrics_context(counts, charts):
+    # Conteos por modelo
+    model_counts = []
+    total = 0
+    for cfg in get_crud_configs():
+        c = count_for(counts, cfg)
+        model_counts.append((str(cfg.model._meta.verbose_name_plural), c))
+        total += c
+
+    return {
+        "kpis": [("Módulos", len(model_counts)), ("Registros totales", total)],
+        "model_counts": model_counts,
+        **charts,
+    }
+
+
 @method_decorator(login_required(login_url="login"), name="dispatch")
-class MetricsDashboardView(TemplateView):
+class MetricsDashboardView(ConditionalPageMixin, TemplateView):
     """Dashboard con KPIs y gráficos."""
     template_name = "overview/dashboard_metrics.html"
 
+    def conditional_models(self):
+        return _all_models()
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        # los GROUP BY se guardan hasta que cambie alguna tabla
+        key = f"productos:metrics_charts:{self.tables.digest}"
+        charts = cache.get(key)
+        if charts is None:
+            charts = run_serial(metrics_tasks())
+            cache.set(key, charts, fragment_ttl())
+        ctx.update(metrics_context(get_module_counts(), charts))
+        return ctx
+
 
-        # Conteos por modelo
-        model_counts = []
-        total = 0
-        for cfg in get_crud_configs():
-            try:
-                c = cfg.model.objects.count()
-            except Exception:
-                c = 0
-            model_counts.append((str(cfg.model._meta.verbose_name_plural), c))
-            total += c
-
-        ctx["kpis"] = [("Módulos", len(model_counts)), ("Registros totales", total)]
-        ctx["model_counts"] = model_counts
-
-        # Empleados por depto
-        if Empleado and Departamento and hasattr(Empleado, "id_departamento"):
-            q = (Empleado.objects
-                 .values("id_departamento__nombre_departamento")
-                 .annotate(n=Count("id_empleado"))
-                 .order_by("id_departamento__nombre_departamento"))
-            ctx["emp_by_dept"] = {
-                "labels": [r["id_departamento__nombre_departamento"] or "Sin depto" for r in q],
-                "data":   [r["n"] for r in q],
-            }
-
-        # Equipos por tipo
-        if Equipo and TipoEquipo and hasattr(Equipo, "id_tipo_equipo"):
-            q = (Equipo.objects
-                 .values("id_tipo_equipo__tipo_equipo")
-                 .annotate(n=Count("id_equipo"))
-                 .order_by("id_tipo_equipo__tipo_equipo"))
-            ctx["equipos_by_tipo"] = {
-                "labels": [r["id_tipo_equipo__tipo_equipo"] or "Sin tipo" for r in q],
-                "data":   [r["n"] for r in q],
-            }
-
-        # Mantenciones por estado
-        if Mantencion and EstadoMantencion and hasattr(Mantencion, "id_estado_mantencion"):
-            q = (Mantencion.objects
-                 .values("id_estado_mantencion__tipo")
-                 .annotate(n=Count("id_mantencion"))
-                 .order_by("id_estado_mantencion__tipo"))
-            ctx["mant_by_estado"] = {
-                "labels": [r["id_estado_mantencion__tipo"] or "Sin estado" for r in q],
-                "data":   [r["n"] for r in q],
-            }
+class AsyncMetricsDashboardView(AsyncLoginRequiredMixin, TemplateView):
+    """MetricsDashboardView para ASGI: conteos y los tres GROUP BY en paralelo."""
+    template_name = MetricsDashboardView.template_name
+    login_url = "login"
 
+    async def aget_context_data(self, **kwargs):
+        ctx = self.get_context_data(**kwargs)
+        counts, charts = await asyncio.gather(aget_module_counts(), gather(metrics_tasks()))
+        ctx.update(metrics_context(counts, charts))
         return ctx
@@ -0,0 +1,161 @@
+# productos/pagination.py
+from typing import List, Sequence
+import json
+
+from django.core import signing
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+_SALT = "productos.keyset"
+
+
+def approximate_count(qs) -> int:
+    """Filas estimadas por el planner (EXPLAIN) en PostgreSQL; COUNT(*) exacto en otros motores."""
+    if connection.vendor == "postgresql":
+        try:
+            plan = json.loads(qs.explain(format="json"))
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except (DatabaseError, ValueError, KeyError, IndexError):
+            pass
+    return qs.count()
+
+
+def keyset_ordering(model, ordering: Sequence[str]) -> List[str] | None:
+    """
+    Normaliza el orden a attnames y agrega el PK como desempate.
+    Devuelve None si alguna columna admite NULL (el orden de NULL varía por motor).
+    """
+    pk = model._meta.pk
+    out = []
+    for o in ordering:
+        desc = o.startswith("-")
+        f = model._meta.get_field(o.lstrip("-"))
+        if f.null:
+            return None
+        out.append(("-" if desc else "") + f.attname)
+    if not any(o.lstrip("-") == pk.attname for o in out):
+        out.append(pk.attname)
+    return out
+
+
+def _after(ordering: Sequence[str], values: Sequence) -> Q:
+    """Q de las filas posteriores a `values` según `ordering` (comparación lexicográfica)."""
+    cond = Q()
+    for i, o in enumerate(ordering):
+        name = o.lstrip("-")
+        step = Q(**{f"{name}__{'lt' if o.startswith('-') else 'gt'}": values[i]})
+        for prev, v in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev.lstrip("-"): v})
+        cond |= step
+    return cond
+
+
+def _reverse(ordering: Sequence[str]) -> List[str]:
+    return [o[1:] if o.startswith("-") else f"-{o}" for o in ordering]
+
+
+class KeysetPage:
+    """Página de paginación por cursor; sustituye a page_obj en la plantilla."""
+    is_keyset = True
+
+    def __init__(self, object_list, ordering, has_next, has_previous, count=None):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def _token(self, obj):
+        values = [getattr(obj, o.lstrip("-")) for o in self.ordering]
+        return signing.dumps([str(v) for v in values], salt=_SALT, compress=True)
+
+    @cached_property
+    def next_token(self):
+        return self._token(self.object_list[-1]) if self.has_next_page and self.object_list else ""
+
+    @cached_property
+    def previous_token(self):
+        return self._token(self.object_list[0]) if self.has_previous_page and self.object_list else ""
+
+
+def decode_token(token: str):
+    try:
+        return signing.loads(token, salt=_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def keyset_paginate(qs, ordering: Sequence[str], per_page: int, after: str = "", before: str = ""):
+    """
+    Pagina `qs` con after=/before= (tokens opacos firmados). Cada página es un
+    WHERE (cols) > (cursor) ORDER BY ... LIMIT n+1: mismo costo en cualquier página.
+    """
+    cursor = decode_token(before or after) if (before or after) else None
+    if cursor is not None and len(cursor) != len(ordering):
+        cursor = None
+
+    if cursor is not None and before:
+        rows = list(qs.filter(_after(_reverse(ordering), cursor))
+                    .order_by(*_reverse(ordering))[:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(rows, ordering, has_next=True, has_previous=has_previous)
+
+    if cursor is not None:
+        qs = qs.filter(_after(ordering, cursor))
+    rows = list(qs.order_by(*ordering)[:per_page + 1])
+    return KeysetPage(rows[:per_page], ordering,
+                      has_next=len(rows) > per_page, has_previous=cursor is not None)
+
+
+class ApproximatePaginator(Paginator):
+    """
+    Paginator cuyo total sale del estimador del planner (sin COUNT(*) en PostgreSQL).
+    La estimación puede quedarse corta: el límite de páginas lo deciden las filas
+    leídas (per_page + 1), no el total estimado.
+    """
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+    def validate_number(self, number):
+        # sin tope superior: una página "más allá" del estimado puede tener filas
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage(self.error_messages["no_results"])
+        if len(rows) > self.per_page:
+            # hay al menos una fila más: el total no puede ser menor
+            self.count = max(self.count, bottom + len(rows))
+        else:
+            # última página: el total es exacto
+            self.count = bottom + len(rows)
+        self.__dict__.pop("num_pages", None)
+        return self._get_page(rows[:self.per_page], number, self)
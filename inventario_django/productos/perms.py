@@ -0,0 +1,67 @@
+# productos/perms.py
+from typing import Dict, FrozenSet, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .versioning import bump_version, versioned_key
+
+# Snapshot de permisos del usuario: se carga una vez por request (y opcionalmente
+# se comparte entre requests vía cache, con versión que sube al cambiar grupos o
+# permisos). También precarga el _perm_cache de ModelBackend, así que
+# user.has_perm / {{ perms }} tampoco vuelven a la BD.
+
+
+def _load(user) -> FrozenSet[str]:
+    ttl = getattr(settings, "PERMS_CACHE_TTL", 300)
+    if not ttl:
+        return frozenset(user.get_all_permissions())
+    key = versioned_key("perms", user.pk, int(user.is_active), int(user.is_superuser))
+    perms = cache.get(key)
+    if perms is None:
+        perms = frozenset(user.get_all_permissions())
+        cache.set(key, perms, ttl)
+    return perms
+
+
+def get_perm_snapshot(user) -> FrozenSet[str]:
+    """Conjunto "app_label.codename" del usuario (vacío si es anónimo)."""
+    if not user.is_authenticated:
+        return frozenset()
+    snap = getattr(user, "_perm_snapshot", None)
+    if snap is None:
+        snap = _load(user)
+        user._perm_snapshot = snap
+        if not hasattr(user, "_perm_cache"):
+            user._perm_cache = set(snap)
+    return snap
+
+
+def _perm(action: str, model) -> str:
+    perms = getattr(model, "perms", None)  # CrudConfig
+    if perms is not None:
+        return perms[action]
+    opts = model._meta
+    return f"{opts.app_label}.{action}_{opts.model_name}"
+
+
+def has(user, action: str, model) -> bool:
+    """¿Puede `user` hacer `action` sobre `model` (modelo o CrudConfig)?"""
+    if not user.is_active:
+        return False
+    if user.is_superuser:
+        return True
+    return _perm(action, model) in get_perm_snapshot(user)
+
+
+def can(user, action: str, models: Iterable) -> Dict[str, bool]:
+    """Versión vectorizada de has(): {label_lower: bool} para varios modelos/CrudConfig."""
+    out = {}
+    for m in models:
+        label = (m.model if hasattr(m, "perms") else m)._meta.label_lower
+        out[label] = has(user, action, m)
+    return out
+
+
+def invalidate_perms(**kwargs):
+    bump_version("perms")
@@ -0,0 +1,142 @@
+# productos/programacion.py
+from datetime import date, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Set
+
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .catalogs import get_catalog, invalidate_catalog
+from .kpis import invalidate_home_kpis
+from .models import IntervaloMantencion, MantencionProgramada
+from .models_inventario import Equipo, EstadoMantencion, Mantencion
+
+# Programación de mantenciones. Cada TipoEquipo puede tener un intervalo en
+# días (IntervaloMantencion); para cada equipo de esos tipos,
+# MantencionProgramada guarda la próxima fecha:
+#   proxima = última mantención realizada + intervalo
+#   (sin mantenciones realizadas: fecha de entrada a la cola + intervalo)
+# Las vencidas a una fecha son un rango sobre el índice de proxima: el panel
+# del inicio las cuenta y `manage.py mantenciones_vencidas` las lista.
+# Las señales recalculan solo los equipos afectados por cada cambio (también
+# al renombrar un estado de mantención: puede dejar de contar como abierto).
+# Recién migrada la cola está vacía porque no hay intervalos (el inicio cuenta
+# entonces las "Pendiente", ver kpis.py); crear un intervalo encola su tipo.
+
+# estados de mantención que todavía no cuentan como realizada
+ESTADOS_ABIERTOS = ("Pendiente", "En curso")
+
+SCHEDULE_MODELS = (Equipo, Mantencion)
+
+
+def _chunks(ids, size):
+    it = iter(ids)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def intervalos() -> Dict[int, int]:
+    """{id_tipo_equipo: días}."""
+    return dict(IntervaloMantencion.objects.values_list("id_tipo_equipo", "dias"))
+
+
+def _abiertos() -> Set[int]:
+    catalog = get_catalog(EstadoMantencion)
+    return {pk for name in ESTADOS_ABIERTOS for pk in catalog.ids_for(name)}
+
+
+def refresh(equipo_ids: Iterable[int], chunk_size: int = 500, hoy: date | None = None) -> int:
+    """Recalcula la cola para `equipo_ids` (saca los borrados o sin intervalo). Devuelve las filas escritas."""
+    hoy = hoy or date.today()
+    dias = intervalos()
+    abiertos = _abiertos() if dias else set()
+    total = 0
+    for chunk in _chunks(sorted(set(equipo_ids)), chunk_size):
+        equipos = Equipo.objects.filter(pk__in=chunk, id_tipo_equipo__in=list(dias)).values_list(
+            "pk", "id_tipo_equipo")
+        ultima = dict(
+            Mantencion.objects.filter(id_equipo__in=chunk, fecha__isnull=False)
+            .exclude(id_estado_mantencion__in=abiertos)
+            .values("id_equipo").annotate(ultima=Max("fecha")).values_list("id_equipo", "ultima")
+        )
+        with transaction.atomic():
+            alta = dict(MantencionProgramada.objects.filter(pk__in=chunk).values_list("pk", "alta"))
+            rows = []
+            for pk, tipo in equipos:
+                base = ultima.get(pk) or alta.get(pk, hoy)
+                rows.append(MantencionProgramada(
+                    id_equipo_id=pk, id_tipo_equipo_id=tipo, ultima=ultima.get(pk),
+                    alta=alta.get(pk, hoy), proxima=base + timedelta(days=dias[tipo]),
+                ))
+            MantencionProgramada.objects.filter(pk__in=chunk).delete()
+            MantencionProgramada.objects.bulk_create(rows)
+        total += len(rows)
+    return total
+
+
+def rebuild(chunk_size: int = 2000) -> int:
+    """Reconstruye la cola completa (conserva la fecha de entrada de los equipos que ya estaban)."""
+    with transaction.atomic():
+        MantencionProgramada.objects.exclude(
+            id_equipo__in=Equipo.objects.filter(id_tipo_equipo__in=list(intervalos())).values("pk")
+        ).delete()
+        ids = Equipo.objects.order_by("pk").values_list("pk", flat=True)
+        return refresh(ids.iterator(chunk_size=chunk_size), chunk_size=chunk_size)
+
+
+def vencidas(al: date | None = None, tipo: int | None = None):
+    """Equipos con mantención vencida o que vence hasta `al` (hoy por defecto), por fecha."""
+    qs = MantencionProgramada.objects.filter(proxima__lte=al or date.today())
+    if tipo is not None:
+        qs = qs.filter(id_tipo_equipo=tipo)
+    return qs.order_by("proxima", "id_equipo")
+
+
+# ---------- mantenimiento incremental ----------
+
+def equipos_de(sender, pks: Iterable) -> Set[int]:
+    """Equipos cuya próxima mantención depende de las filas `pks` de `sender` (según la BD actual)."""
+    pks = list(pks)
+    if sender is Equipo:
+        return set(pks)
+    if sender is EstadoMantencion:
+        mantenciones = Mantencion.objects.filter(id_estado_mantencion__in=pks)
+    else:
+        mantenciones = Mantencion.objects.filter(pk__in=pks)
+    return set(mantenciones.values_list("id_equipo", flat=True).distinct())
+
+
+def _antes(sender, instance, **kwargs):
+    # una mantención que cambia de equipo también afecta al equipo anterior
+    instance._programacion_equipos = equipos_de(Mantencion, [instance.pk]) if instance.pk else set()
+
+
+def _despues(sender, instance, **kwargs):
+    if sender is Mantencion:
+        refresh({instance.id_equipo_id} | getattr(instance, "_programacion_equipos", set()))
+    else:
+        refresh([instance.pk])
+
+
+def _estado(sender, instance, **kwargs):
+    invalidate_catalog(EstadoMantencion)  # _abiertos() lee el nombre nuevo, sin depender del orden de receptores
+    refresh(equipos_de(EstadoMantencion, [instance.pk]))
+    invalidate_home_kpis()
+
+
+def _intervalo(sender, instance, **kwargs):
+    # sin intervalo, refresh saca de la cola a los equipos del tipo
+    refresh(Equipo.objects.filter(id_tipo_equipo=instance.id_tipo_equipo_id).values_list("pk", flat=True))
+    invalidate_home_kpis()
+
+
+def connect_programacion_signals():
+    pre_save.connect(_antes, sender=Mantencion, dispatch_uid="programacion:pre_save:mantencion")
+    for m in SCHEDULE_MODELS:
+        label = m._meta.label_lower
+        post_save.connect(_despues, sender=m, dispatch_uid=f"programacion:post_save:{label}")
+        post_delete.connect(_despues, sender=m, dispatch_uid=f"programacion:post_delete:{label}")
+    post_save.connect(_estado, sender=EstadoMantencion, dispatch_uid="programacion:post_save:estado")
+    post_save.connect(_intervalo, sender=IntervaloMantencion, dispatch_uid="programacion:post_save:intervalo")
+    post_delete.connect(_intervalo, sender=IntervaloMantencion, dispatch_uid="programacion:post_delete:intervalo")
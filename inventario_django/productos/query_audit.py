@@ -0,0 +1,220 @@
+# productos/query_audit.py
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+import json
+import re
+
+from django.apps import apps
+from django.db import DatabaseError, connection
+from django.db.models.expressions import Col
+from django.db.models.lookups import Lookup
+from django.db.models.sql.datastructures import Join
+from django.http import HttpRequest
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+# Lookups que un índice btree puede resolver
+EQ_LOOKUPS = {"exact", "in", "isnull"}
+RANGE_LOOKUPS = {"gt", "gte", "lt", "lte", "range"}
+
+
+@dataclass
+class AuditResult:
+    name: str
+    sql: str
+    scans: List[str] = field(default_factory=list)   # tablas leídas completas
+    sorts: bool = False                              # orden sin índice (temp b-tree / Sort)
+    suggestions: List[Tuple[str, Tuple[str, ...]]] = field(default_factory=list)
+    error: str = ""
+
+
+# ---------- Consultas a auditar ----------
+
+def _view_queryset(view_cls, user, params=None, **kwargs):
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET.update(params or {})
+    request.user = user
+    view = view_cls()
+    view.setup(request, **kwargs)
+    return view.get_queryset()
+
+
+def audit_querysets(user, orderings: bool = False) -> Iterator[Tuple[str, object]]:
+    """
+    (nombre, queryset) de las vistas: listados CRUD, equipos, detalle y paneles.
+    Con orderings=True agrega cada ?o=<columna> de los listados.
+    """
+    from .crud import get_registry
+    from .kpis import kpi_querysets
+    from .models import EquipoListing
+    from .views_old import EquipoDetailView, EquiposListView
+
+    for cfg in get_registry():
+        # la clase de vista registrada en las URLs, con su CrudConfig
+        list_cls = resolve(reverse(cfg.url_names["list"])).func.view_class
+        yield f"{cfg.slug}_list", _view_queryset(list_cls, user)
+        for col in (cfg.list_display[1:] if orderings else ()):
+            yield f"{cfg.slug}_list?o={col}", _view_queryset(list_cls, user, {"o": col})
+
+    yield "equipos.EquiposListView", _view_queryset(EquiposListView, user)
+    for param in ("tipo", "estado", "marca"):
+        yield f"equipos.EquiposListView?{param}=1", _view_queryset(EquiposListView, user, {param: "1"})
+
+    # ?as_of=: equipos de un empleado en esa fecha y el empleado de cada fila de la página
+    from .asignaciones import vigentes_de
+    ahora = timezone.localdate().isoformat()
+    yield "equipos.EquiposListView?as_of&empleado=1", _view_queryset(
+        EquiposListView, user, {"as_of": ahora, "empleado": "1"})
+    yield "equipos.EquiposListView?as_of.empleados", vigentes_de(range(1, 21), timezone.now())
+
+    # EquipoDetailView: la fila del listado y sus listas relacionadas (las mismas consultas de la vista)
+    yield "equipos.EquipoDetailView", _view_queryset(EquipoDetailView, user, equipo_id=1).filter(pk=1)
+    for name, qs in EquipoDetailView.related_querysets(EquipoListing(pk=1, id_tipo_equipo_id=1)).items():
+        yield f"equipos.EquipoDetailView.{name}", qs
+
+    for name, qs in kpi_querysets().items():
+        yield f"home.{name}", qs
+
+
+# ---------- Columnas candidatas a índice ----------
+
+def _col(expr):
+    # baja por transforms (UPPER, __year, ...) hasta la columna
+    while expr is not None and not isinstance(expr, Col):
+        expr = getattr(expr, "lhs", None)
+    return expr
+
+
+def _walk_where(node) -> Iterator[Lookup]:
+    for child in getattr(node, "children", ()):
+        if isinstance(child, Lookup):
+            yield child
+        else:
+            yield from _walk_where(child)
+
+
+def index_candidates(qs) -> Tuple[Dict[str, List[Tuple[str, ...]]], set]:
+    """
+    Por tabla, índices que servirían a la consulta: (igualdades + orden o rango)
+    y las columnas FK de los joins. También devuelve las tablas con columnas de ORDER BY.
+    """
+    compiler = qs.query.get_compiler(connection.alias)
+    compiler.as_sql()
+    query = compiler.query
+
+    def table(alias):
+        return query.alias_map[alias].table_name
+
+    def add(bucket, col):
+        cols = bucket.setdefault(table(col.alias), [])
+        if col.target.column not in cols:
+            cols.append(col.target.column)
+
+    eq, rng, order = {}, {}, {}
+    for lookup in _walk_where(query.where):
+        # solo columnas sin transformar (UPPER(...) o __year no usan un btree simple)
+        col = lookup.lhs
+        if not isinstance(col, Col) or col.alias not in query.alias_map:
+            continue
+        if lookup.lookup_name in EQ_LOOKUPS:
+            add(eq, col)
+        elif lookup.lookup_name in RANGE_LOOKUPS:
+            add(rng, col)
+
+    for expr, _ in compiler.get_order_by():
+        col = _col(getattr(expr, "expression", None))
+        if col is not None and col.alias in query.alias_map:
+            add(order, col)
+
+    pks = _pk_columns()
+    for t in eq:
+        # filas elegidas por PK (pk IN (subconsulta)): un índice (pk, ...) no aporta
+        eq[t] = [c for c in eq[t] if c != pks.get(t)]
+    out: Dict[str, List[Tuple[str, ...]]] = {}
+    for t in set(eq) | set(rng) | set(order):
+        # el PK como desempate del orden no aporta al índice
+        if t in order:
+            order[t] = [c for c in order[t] if c != pks.get(t)] or order[t]
+        cols = list(eq.get(t, []))
+        cols += [c for c in (order.get(t) or rng.get(t, [])) if c not in cols]
+        out.setdefault(t, []).append(tuple(cols))
+
+    for j in query.alias_map.values():
+        if not isinstance(j, Join):
+            continue
+        for parent_col, child_col in j.join_cols:
+            # la columna FK (no PK) de cada lado del join
+            for t, c in ((table(j.parent_alias), parent_col), (j.table_name, child_col)):
+                if c != pks.get(t):
+                    out.setdefault(t, []).append((c,))
+    return out, set(order)
+
+
+def _pk_columns() -> Dict[str, str]:
+    return {m._meta.db_table: m._meta.pk.column for m in apps.get_models()}
+
+
+# ---------- EXPLAIN ----------
+
+def _scans_sqlite(qs) -> Tuple[List[str], bool]:
+    plan = qs.explain()
+    scans = re.findall(r"\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)", plan)
+    return scans, "TEMP B-TREE FOR ORDER BY" in plan
+
+
+def _scans_postgresql(qs) -> Tuple[List[str], bool]:
+    plan = json.loads(qs.explain(format="json"))[0]["Plan"]
+    scans, sorts = [], False
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(node["Relation Name"])
+        if node.get("Node Type") in ("Sort", "Incremental Sort"):
+            sorts = True
+        stack.extend(node.get("Plans", []))
+    return scans, sorts
+
+
+def existing_indexes(table: str) -> List[Tuple[str, ...]]:
+    with connection.cursor() as cur:
+        constraints = connection.introspection.get_constraints(cur, table)
+    return [tuple(c["columns"]) for c in constraints.values()
+            if (c["index"] or c["unique"] or c["primary_key"]) and c["columns"]]
+
+
+def _covered(cols: Tuple[str, ...], indexes) -> bool:
+    return any(idx[:len(cols)] == cols for idx in indexes)
+
+
+def audit(name: str, qs) -> AuditResult:
+    try:
+        sql = str(qs.query)
+    except Exception as e:  # consultas que ni siquiera compilan
+        return AuditResult(name, "", error=str(e))
+    result = AuditResult(name, sql)
+    try:
+        explain = _scans_postgresql if connection.vendor == "postgresql" else _scans_sqlite
+        result.scans, result.sorts = explain(qs)
+        candidates, ordered = index_candidates(qs)
+    except DatabaseError as e:
+        result.error = str(e).strip()
+        return result
+
+    tables = set(result.scans)
+    if result.sorts:
+        tables |= ordered
+    for t in sorted(tables):
+        indexes = existing_indexes(t)
+        for cols in candidates.get(t, []):
+            if cols and not _covered(cols, indexes) and (t, cols) not in result.suggestions:
+                result.suggestions.append((t, cols))
+                break
+    return result
+
+
+def index_ddl(table: str, cols: Tuple[str, ...]) -> str:
+    qn = connection.ops.quote_name
+    name = f"{table}_{'_'.join(cols)}_idx"[:63]
+    return f"CREATE INDEX IF NOT EXISTS {qn(name)} ON {qn(table)} ({', '.join(qn(c) for c in cols)});"
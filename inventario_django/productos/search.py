@@ -0,0 +1,203 @@
+# productos/search.py
+from functools import partial
+from typing import Dict, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .versioning import bump_version, get_version
+
+# El tokenizer trigram de FTS5 no encuentra términos de menos de 3 caracteres
+MIN_TRIGRAM_LEN = 3
+
+
+class LikeSearch:
+    """Búsqueda por defecto: icontains (LIKE '%q%') en cada campo, unidos con OR."""
+    name = "like"
+
+    def filter(self, qs, q: str, fields: Sequence[str]):
+        if not q or not fields:
+            return qs
+        cond = Q()
+        for f in fields:
+            cond |= Q(**{f"{f}__icontains": q})
+        return qs.filter(cond)
+
+    # mantenimiento de índices: este backend no tiene nada que mantener
+    def build_index(self, model, fields: Sequence[str], chunk_size: int = 2000) -> int:
+        return 0
+
+    def index_object(self, obj):
+        pass
+
+    def index_objects(self, model, objs):
+        pass
+
+    def unindex_object(self, obj):
+        pass
+
+    def unindex_pks(self, model, pks):
+        pass
+
+    def reset(self):
+        pass
+
+
+class TrigramSearch(LikeSearch):
+    """
+    PostgreSQL: mismo icontains que LikeSearch (UPPER(col) LIKE UPPER('%q%')),
+    que el planner resuelve con índices GIN pg_trgm sobre UPPER(col::text).
+    """
+    name = "trigram"
+
+    @staticmethod
+    def index_name(model, field_name: str) -> str:
+        return f"{model._meta.db_table}_{field_name}_trgm"[:63]
+
+    def build_index(self, model, fields, chunk_size=2000):
+        qn = connection.ops.quote_name
+        table = qn(model._meta.db_table)
+        with connection.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for f in fields:
+                column = qn(model._meta.get_field(f).column)
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS {qn(self.index_name(model, f))} "
+                    f"ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+                )
+        return len(fields)
+
+
+class FtsSearch(LikeSearch):
+    """
+    SQLite: tabla sombra FTS5 (tokenizer trigram) por modelo, `<db_table>_fts`,
+    con rowid = pk y una columna por cada search_field. Se llena con el comando
+    `search_index` y se mantiene al día con señales (ver signals.py).
+    Si la tabla no existe o el término es corto, cae a LikeSearch.
+    Las columnas de cada tabla (o su ausencia) se guardan por proceso con la
+    versión compartida `fts:<tabla>`, que build_index sube al confirmarse:
+    así los workers ya levantados ven la tabla que creó `search_index`.
+    """
+    name = "fts"
+
+    def __init__(self):
+        self._columns: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+
+    @staticmethod
+    def table_name(model) -> str:
+        return f"{model._meta.db_table}_fts"
+
+    def reset(self):
+        self._columns.clear()
+
+    def indexed_columns(self, model) -> Tuple[str, ...]:
+        table = self.table_name(model)
+        version = get_version(f"fts:{table}")  # una lectura de cache, sin BD
+        cached = self._columns.get(table)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [table])
+            cols = ()
+            if cur.fetchone():
+                cur.execute(f"PRAGMA table_info({connection.ops.quote_name(table)})")
+                cols = tuple(r[1] for r in cur.fetchall())
+        self._columns[table] = (version, cols)
+        return cols
+
+    def filter(self, qs, q, fields):
+        if not q or not fields:
+            return qs
+        cols = self.indexed_columns(qs.model)
+        if len(q) < MIN_TRIGRAM_LEN or not cols or not set(fields) <= set(cols):
+            return super().filter(qs, q, fields)
+
+        table = connection.ops.quote_name(self.table_name(qs.model))
+        phrase = '"' + q.replace('"', '""') + '"'
+        match = "{%s} : %s" % (" ".join(fields), phrase)
+        return qs.filter(pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match]))
+
+    def build_index(self, model, fields, chunk_size=2000):
+        qn = connection.ops.quote_name
+        table = qn(self.table_name(model))
+        cols = ", ".join(qn(f) for f in fields)
+        insert = f"INSERT INTO {table}(rowid, {cols}) VALUES ({', '.join(['%s'] * (len(fields) + 1))})"
+        total = 0
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+            cur.execute(f"CREATE VIRTUAL TABLE {table} USING fts5({cols}, tokenize='trigram')")
+            batch = []
+            for row in model.objects.values_list("pk", *fields).iterator(chunk_size=chunk_size):
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    cur.executemany(insert, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cur.executemany(insert, batch)
+                total += len(batch)
+        self.reset()
+        # los demás procesos vuelven a mirar la tabla (al confirmarse: antes no la verían)
+        transaction.on_commit(partial(bump_version, f"fts:{self.table_name(model)}"))
+        return total
+
+    def index_object(self, obj):
+        cols = self.indexed_columns(type(obj))
+        if not cols:
+            return
+        qn = connection.ops.quote_name
+        table = qn(self.table_name(type(obj)))
+        values = [getattr(obj, c, None) for c in cols]
+        with connection.cursor() as cur:
+            cur.execute(f"DELETE FROM {table} WHERE rowid = %s", [obj.pk])
+            cur.execute(
+                f"INSERT INTO {table}(rowid, {', '.join(qn(c) for c in cols)}) "
+                f"VALUES ({', '.join(['%s'] * (len(cols) + 1))})",
+                [obj.pk, *values],
+            )
+
+    def index_objects(self, model, objs):
+        """index_object en lote (para bulk_create/bulk_update, que no emiten señales)."""
+        cols = self.indexed_columns(model)
+        if not cols or not objs:
+            return
+        qn = connection.ops.quote_name
+        table = qn(self.table_name(model))
+        with connection.cursor() as cur:
+            cur.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(o.pk,) for o in objs])
+            cur.executemany(
+                f"INSERT INTO {table}(rowid, {', '.join(qn(c) for c in cols)}) "
+                f"VALUES ({', '.join(['%s'] * (len(cols) + 1))})",
+                [(o.pk, *(getattr(o, c, None) for c in cols)) for o in objs],
+            )
+
+    def unindex_object(self, obj):
+        if not self.indexed_columns(type(obj)):
+            return
+        table = connection.ops.quote_name(self.table_name(type(obj)))
+        with connection.cursor() as cur:
+            cur.execute(f"DELETE FROM {table} WHERE rowid = %s", [obj.pk])
+
+    def unindex_pks(self, model, pks):
+        """unindex_object en lote (borrados masivos, sin señales)."""
+        if not self.indexed_columns(model) or not pks:
+            return
+        table = connection.ops.quote_name(self.table_name(model))
+        with connection.cursor() as cur:
+            cur.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(pk,) for pk in pks])
+
+
+BACKENDS = {"like": LikeSearch, "trigram": TrigramSearch, "fts": FtsSearch}
+_instances: Dict[str, LikeSearch] = {}
+
+
+def get_search_backend() -> LikeSearch:
+    """Backend según CRUD_SEARCH_BACKEND; 'auto' elige por motor de BD."""
+    name = getattr(settings, "CRUD_SEARCH_BACKEND", "auto")
+    if name == "auto":
+        name = {"sqlite": "fts", "postgresql": "trigram"}.get(connection.vendor, "like")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
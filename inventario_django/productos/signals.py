@@ -0,0 +1,72 @@
+# productos/signals.py
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_save, post_delete
+
+from . import models_inventario  # noqa: F401  (registra los modelos de inventario)
+from .asignaciones import connect_asignacion_signals
+from .catalogs import CATALOG_MODELS, invalidate_catalog
+from .gastos import connect_gasto_signals
+from .http_cache import touch_table
+from .kpis import KPI_MODELS, invalidate_home_kpis
+from .listing import connect_listing_signals
+from .perms import invalidate_perms
+from .programacion import connect_programacion_signals
+from .search import get_search_backend
+from .stats import invalidate_module_counts
+
+
+def update_search_index(sender, instance, **kwargs):
+    get_search_backend().index_object(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend().unindex_object(instance)
+
+
+def connect_signals():
+    for m in apps.get_app_config("productos").get_models():
+        if m.__module__ != models_inventario.__name__:
+            continue
+        for sig in (post_save, post_delete):
+            sig.connect(invalidate_module_counts, sender=m,
+                        dispatch_uid=f"module_counts:{sig is post_save}:{m._meta.label_lower}")
+            # contador de cambios de la tabla (ETag y fragmentos en cache)
+            sig.connect(touch_table, sender=m,
+                        dispatch_uid=f"table:{sig is post_save}:{m._meta.label_lower}")
+            if m.__name__ in KPI_MODELS:
+                sig.connect(invalidate_home_kpis, sender=m,
+                            dispatch_uid=f"home_kpis:{sig is post_save}:{m._meta.label_lower}")
+        post_save.connect(update_search_index, sender=m,
+                          dispatch_uid=f"search:save:{m._meta.label_lower}")
+        post_delete.connect(remove_from_search_index, sender=m,
+                            dispatch_uid=f"search:delete:{m._meta.label_lower}")
+
+    # catálogos en memoria (marcas, tipos, estados)
+    for m in CATALOG_MODELS:
+        for sig in (post_save, post_delete):
+            sig.connect(invalidate_catalog, sender=m,
+                        dispatch_uid=f"catalog:{sig is post_save}:{m._meta.label_lower}")
+
+    # rollup de gasto mensual
+    connect_gasto_signals()
+
+    # modelo de lectura del listado/detalle de equipos
+    connect_listing_signals()
+
+    # cola de próximas mantenciones
+    connect_programacion_signals()
+
+    # historial de asignaciones equipo -> empleado
+    connect_asignacion_signals()
+
+    # snapshot de permisos: cambios en grupos o asignaciones de permisos
+    User = get_user_model()
+    for through in (User.groups.through, User.user_permissions.through, Group.permissions.through):
+        m2m_changed.connect(invalidate_perms, sender=through,
+                            dispatch_uid=f"perms:m2m:{through._meta.label_lower}")
+    for m in (Group, Permission):
+        for sig in (post_save, post_delete):
+            sig.connect(invalidate_perms, sender=m,
+                        dispatch_uid=f"perms:{sig is post_save}:{m._meta.label_lower}")
@@ -0,0 +1,90 @@
+# productos/stats.py
+from functools import partial
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+
+from .crud import CrudConfig, get_crud_configs
+from .fanout import gather
+from .versioning import aget_or_compute, bump_version, versioned_key
+
+
+def _count_select(i: int, cfg: CrudConfig, vendor: str):
+    qn = connection.ops.quote_name
+    table = cfg.model._meta.db_table
+    exact = f"SELECT COUNT(*) FROM {qn(table)}"
+    if cfg.count_estimate and vendor == "postgresql":
+        # reltuples vale -1 si la tabla nunca se analizó y 0 si se analizó vacía
+        # (o recién creada): en ambos casos se cuenta exacto
+        return (
+            f"SELECT {i}, COALESCE((SELECT CASE WHEN reltuples > 0 THEN reltuples::bigint END FROM pg_class "
+            f"WHERE oid = to_regclass(%s)), ({exact}))",
+            [table],
+        )
+    return f"SELECT {i}, ({exact})", []
+
+
+def _count_one_by_one(configs) -> Dict[str, int]:
+    counts = {}
+    for cfg in configs:
+        try:
+            with transaction.atomic():
+                counts[cfg.model._meta.label_lower] = cfg.model.objects.count()
+        except DatabaseError:
+            counts[cfg.model._meta.label_lower] = 0
+    return counts
+
+
+def module_counts(configs: Iterable[CrudConfig] | None = None) -> Dict[str, int]:
+    """
+    Conteo de registros por módulo en una sola consulta (UNION ALL).
+    Los modelos con count_estimate usan pg_class.reltuples en PostgreSQL.
+    Devuelve {label_lower: n}.
+    """
+    configs = list(configs if configs is not None else get_crud_configs())
+    if not configs:
+        return {}
+
+    parts, params = [], []
+    for i, cfg in enumerate(configs):
+        sql, p = _count_select(i, cfg, connection.vendor)
+        parts.append(sql)
+        params += p
+
+    try:
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute(" UNION ALL ".join(parts), params)
+            rows = cur.fetchall()
+    except DatabaseError:
+        # alguna tabla no existe en esta BD: se cae al conteo individual
+        return _count_one_by_one(configs)
+
+    return {configs[i].model._meta.label_lower: int(n or 0) for i, n in rows}
+
+
+def count_for(counts: Dict[str, int], cfg: CrudConfig) -> int:
+    return counts.get(cfg.model._meta.label_lower, 0)
+
+
+def get_module_counts() -> Dict[str, int]:
+    """module_counts() compartido por todas las vistas de panel, en cache hasta que cambie un modelo."""
+    key = versioned_key("module_counts")
+    counts = cache.get(key)
+    if counts is None:
+        counts = module_counts()
+        cache.set(key, counts, getattr(settings, "KPI_CACHE_TTL", 300))
+    return counts
+
+
+async def aget_module_counts() -> Dict[str, int]:
+    """get_module_counts para vistas async (el conteo corre en el pool de fanout.py)."""
+    async def compute():
+        return (await gather({"counts": module_counts}))["counts"]
+    return await aget_or_compute("module_counts", getattr(settings, "KPI_CACHE_TTL", 300), compute)
+
+
+def invalidate_module_counts(**kwargs):
+    # al confirmarse (ver kpis.invalidate_home_kpis)
+    transaction.on_commit(partial(bump_version, "module_counts"))
@@ -1,8 +1,24 @@
 # productos/templatetags/object_extras.py
 from django import template
+
+from productos.perms import has
+from productos.rows import render_rows
+
 register = template.Library()
 
 @register.filter
 def attr(obj, name):
     """{{ obj|attr:'campo' }} -> obj.campo (vacío si no existe)"""
     return getattr(obj, name, "")
+
+
+@register.simple_tag(takes_context=True)
+def user_can(context, action, target):
+    """{% user_can 'add' cfg as can_add %} -> usa el snapshot de permisos del request"""
+    return has(context["request"].user, action, target)
+
+
+@register.simple_tag
+def crud_rows(cfg, items, can_change, can_delete, selectable=False):
+    """{% crud_rows cfg items can_change can_delete [selectable] %} -> <tr> del listado, armados en Python (rows.py)"""
+    return render_rows(cfg, items, can_change, can_delete, selectable)
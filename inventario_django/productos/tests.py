@@ -1,3 +1,1367 @@
-from django.test import TestCase
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .models_inventario import (
+    Empresa, Departamento, Empleado, Marca, EstadoEquipo, Proveedor,
+    TipoEquipo, Equipo, EstadoMantencion, Mantencion, Factura, DetalleFactura
+)
+
+
+def _unmanaged_models():
+    return [m for m in apps.get_app_config("productos").get_models() if not m._meta.managed]
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class InventarioTestCase(TestCase):
+    """
+    Crea las tablas de models_inventario (managed=False) en la BD de pruebas.
+    Los requests del cliente fallan si exceden su presupuesto de consultas (QUERY_BUDGETS).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            for m in _unmanaged_models():
+                editor.create_model(m)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for m in _unmanaged_models():
+                editor.delete_model(m)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        cls.empresa = Empresa.objects.create(rut_empresa="76.000.000-0", nombre_empresa="Galilea")
+        cls.depto = Departamento.objects.create(nombre_departamento="TI", id_empresa=cls.empresa)
+        cls.empleado = Empleado.objects.create(
+            rut="11.111.111-1", nombre="Ana", apellido_paterno="Rojas", activo=True,
+            id_empresa=cls.empresa, id_departamento=cls.depto,
+        )
+        cls.marca = Marca.objects.create(nombre_marca="Lenovo")
+        cls.tipo = TipoEquipo.objects.create(tipo_equipo="Notebook")
+        cls.estado = EstadoEquipo.objects.create(descripcion="Disponible")
+        cls.proveedor = Proveedor.objects.create(nombre_proveedor="PC Factory", rut_proveedor="77.777.777-7")
+        cls.estado_mant = EstadoMantencion.objects.create(tipo="Pendiente")
+
+    def setUp(self):
+        # el rollback entre tests no dispara señales: se parte con cache limpio
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def make_equipos(self, n, start=0):
+        return [
+            Equipo.objects.create(
+                nombre_equipo=f"NB-{start + i:04d}", id_marca=self.marca, id_tipo_equipo=self.tipo,
+                id_estado_equipo=self.estado, id_empleado=self.empleado, id_proveedor=self.proveedor,
+            )
+            for i in range(n)
+        ]
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+            if resp.streaming:
+                b"".join(resp.streaming_content)
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries)
+
+
+class JoinPlanTests(InventarioTestCase):
+    def test_plan_follows_fk_str(self):
+        from .crud import build_config
+        self.assertIn("id_empresa", build_config(Departamento).select_related)
+        plan = build_config(DetalleFactura).select_related
+        self.assertIn("id_factura__id_proveedor", plan)
+        self.assertIn("id_equipo__id_marca", plan)
+        self.assertIn("id_equipo__id_tipo_equipo", plan)
+
+    def _assert_constant(self, url, grow):
+        # las tablas se marcan como cambiadas al commit (fragmentos en cache)
+        with self.captureOnCommitCallbacks(execute=True):
+            grow(1)
+        few = self.count_queries(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            grow(10)
+        self.assertEqual(self.count_queries(url), few)
+
+    def test_equipos_list_constant_queries(self):
+        self._assert_constant(reverse("productos:equipos_list"), lambda n: self.make_equipos(n))
+
+    def test_mantenciones_list_constant_queries(self):
+        def grow(n):
+            for eq in self.make_equipos(n):
+                Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=self.estado_mant)
+        self._assert_constant(reverse("productos:mantencions_list"), grow)
+
+    @override_settings(CRUD_EXPORT_JOBS=False)  # CSV en streaming
+    def test_detalle_factura_csv_constant_queries(self):
+        factura = Factura.objects.create(id_proveedor=self.proveedor)
+
+        def grow(n):
+            for eq in self.make_equipos(n):
+                DetalleFactura.objects.create(
+                    id_factura=factura, id_equipo=eq, cantidad=1, valor_unitario=1000,
+                )
+        self._assert_constant(reverse("productos:detallefacturas_csv"), grow)
+
+
+@override_settings(CRUD_EXPORT_JOBS=False)
+class ExportCsvTests(InventarioTestCase):
+    """Exportación en streaming dentro del request (sin worker); con tareas, ver JobTests."""
+    def get_csv(self, slug, **params):
+        resp = self.client.get(reverse(f"productos:{slug}_csv"), params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        return b"".join(resp.streaming_content).decode().splitlines()
+
+    @override_settings(CRUD_EXPORT_CHUNK_SIZE=3)
+    def test_scalar_columns_stream_in_chunks(self):
+        for i in range(7):
+            Marca.objects.create(nombre_marca=f"Marca {i}")
+        resp = self.client.get(reverse("productos:marcas_csv"))
+        chunks = list(resp.streaming_content)
+        # encabezado + 8 filas (Lenovo + 7) en bloques de 3
+        self.assertEqual(len(chunks), 1 + 3)
+        lines = b"".join(chunks).decode().splitlines()
+        self.assertEqual(lines[0], "id_marca,nombre_marca")
+        self.assertEqual(len(lines), 9)
+
+    def test_fk_columns_use_str_labels(self):
+        self.make_equipos(2)
+        lines = self.get_csv("equipos", q="NB-0001")
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Lenovo", lines[1])
+        self.assertIn("Ana Rojas", lines[1])
+
+
+class ModuleCountsTests(InventarioTestCase):
+    def test_single_round_trip(self):
+        from .stats import module_counts
+        self.make_equipos(3)
+        with CaptureQueriesContext(connection) as ctx:
+            counts = module_counts()
+        selects = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(counts["productos.equipo"], 3)
+        self.assertEqual(counts["productos.marca"], 1)
+        self.assertEqual(counts["productos.mantencion"], 0)
+
+    def test_estimate_falls_back_to_count_when_unknown(self):
+        from dataclasses import replace
+        from .crud import get_registry
+        from .stats import _count_select
+        cfg = replace(next(c for c in get_registry() if c.model is Equipo), count_estimate=True)
+        sql, params = _count_select(0, cfg, "postgresql")
+        # -1 (sin ANALYZE) y 0 (vacía o recién creada) no son estimaciones: COUNT(*)
+        self.assertIn("CASE WHEN reltuples > 0 THEN reltuples::bigint END", sql)
+        self.assertIn("COUNT(*)", sql)
+        self.assertEqual(params, ["equipo"])
+
+    def test_overview_views_share_counts(self):
+        self.make_equipos(2)
+        for name in ("productos:vistas_grid", "productos:vistas_lista", "productos:dashboard"):
+            resp = self.client.get(reverse(name))
+            self.assertEqual(resp.status_code, 200)
+        grid = self.client.get(reverse("productos:vistas_grid"))
+        equipos = next(c for c in grid.context["cards"] if c["cfg"].slug == "equipos")
+        self.assertEqual(equipos["count"], 2)
+
+
+class HomeKpiCacheTests(InventarioTestCase):
+    def test_warm_home_skips_kpi_queries(self):
+        self.make_equipos(2)
+        url = reverse("productos:home")
+        cold = self.count_queries(url)
+        warm = self.count_queries(url)
+        self.assertLess(warm, cold)
+        # solo quedan las consultas de sesión/usuario
+        self.assertLessEqual(warm, 2)
+
+    def test_invalidated_on_save_and_delete(self):
+        from .kpis import get_home_kpis
+        with self.captureOnCommitCallbacks(execute=True):
+            eq, = self.make_equipos(1)
+        self.assertEqual(get_home_kpis()["total_equipos"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            otro, = self.make_equipos(1, start=1)
+            # hasta el commit la versión no cambia: nadie guarda datos sin confirmar con ella
+            self.assertEqual(get_home_kpis()["total_equipos"], 1)
+        self.assertEqual(get_home_kpis()["total_equipos"], 2)
+        # pendientes = equipos con la mantención vencida según la cola (programacion.py)
+        from datetime import date, timedelta
+        from .models import IntervaloMantencion
+        with self.captureOnCommitCallbacks(execute=True):
+            IntervaloMantencion.objects.create(id_tipo_equipo=self.tipo, dias=30)
+        self.assertEqual(get_home_kpis()["mantenciones_pendientes"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            hecha = EstadoMantencion.objects.create(tipo="Hecha")
+            Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=hecha,
+                                      fecha=date.today() - timedelta(days=31))
+        self.assertEqual(get_home_kpis()["mantenciones_pendientes"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            otro.delete()
+        self.assertEqual(get_home_kpis()["total_equipos"], 1)
+        # los nombres de catálogo que muestra el inicio también
+        with self.captureOnCommitCallbacks(execute=True):
+            self.marca.nombre_marca = "Lenovo Group"
+            self.marca.save()
+        self.assertEqual(get_home_kpis()["chart_marcas_labels"], ["Lenovo Group"])
+
+    def test_pending_falls_back_to_estado_without_intervals(self):
+        # recién migrado (sin IntervaloMantencion) la cola está vacía: cuenta las "Pendiente"
+        from .kpis import get_home_kpis
+        eq, = self.make_equipos(1)
+        Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=self.estado_mant)
+        self.assertEqual(get_home_kpis()["mantenciones_pendientes"], 1)
+
+    def test_module_counts_follow_any_model(self):
+        from .stats import get_module_counts
+        self.assertEqual(get_module_counts()["productos.marca"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Marca.objects.create(nombre_marca="HP")
+        self.assertEqual(get_module_counts()["productos.marca"], 2)
+
+
+class SearchBackendTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        from .search import get_search_backend
+        self.backend = get_search_backend()
+        self.addCleanup(self.backend.reset)
+
+    def search_equipos(self, q):
+        resp = self.client.get(reverse("productos:equipos_list"), {"q": q})
+        return [e.nombre_equipo for e in resp.context["items"]]
+
+    def test_fts_index_kept_in_sync(self):
+        from django.core.management import call_command
+        self.assertEqual(self.backend.name, "fts")
+        self.make_equipos(3)
+        call_command("search_index", "equipos", stdout=StringIO())
+        self.assertEqual(self.backend.indexed_columns(Equipo), ("nombre_equipo",))
+
+        self.assertEqual(self.search_equipos("b-0001"), ["NB-0001"])
+        nuevo, = self.make_equipos(1, start=42)
+        self.assertEqual(self.search_equipos("0042"), ["NB-0042"])
+        nuevo.delete()
+        self.assertEqual(self.search_equipos("0042"), [])
+        # términos cortos caen a LIKE
+        self.assertEqual(len(self.search_equipos("NB")), 3)
+
+    def test_like_fallback_without_index(self):
+        self.make_equipos(2)
+        self.assertEqual(self.search_equipos("nb-0000"), ["NB-0000"])
+
+    def test_missing_fts_table_is_cached_per_version(self):
+        from django.core.management import call_command
+        self.assertEqual(self.backend.indexed_columns(Equipo), ())
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.backend.indexed_columns(Equipo), ())
+        self.assertEqual(len(ctx.captured_queries), 0)
+        # otro worker, levantado antes del índice, también cacheó la ausencia
+        from .search import FtsSearch
+        otro = FtsSearch()
+        self.assertEqual(otro.indexed_columns(Equipo), ())
+        # search_index crea la tabla; al confirmar sube la versión fts:<tabla>
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("search_index", "equipos", stdout=StringIO())
+        self.assertEqual(self.backend.indexed_columns(Equipo), ("nombre_equipo",))
+        self.assertEqual(otro.indexed_columns(Equipo), ("nombre_equipo",))
+
+    def test_equipos_list_view_searches_related_tables(self):
+        from django.test import RequestFactory
+        from .views_old import EquiposListView
+        self.make_equipos(1)
+        otra = Marca.objects.create(nombre_marca="Dell")
+        Equipo.objects.create(nombre_equipo="PC-1", id_marca=otra, id_tipo_equipo=self.tipo)
+        for q, expected in (("dell", ["PC-1"]), ("rojas", ["NB-0000"]), ("noteb", ["NB-0000", "PC-1"])):
+            request = RequestFactory().get("/", {"q": q})
+            request.user = self.user
+            view = EquiposListView()
+            view.setup(request)
+            self.assertEqual([e.nombre_equipo for e in view.get_queryset()], expected)
+
+
+class KeysetPaginationTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        from .pagination import keyset_ordering
+        self.keyset_ordering = keyset_ordering
+
+    def keyset_mode(self):
+        from dataclasses import replace
+        from unittest import mock
+        view_class = resolve(reverse("productos:equipos_list")).func.view_class
+        cfg = replace(view_class.crud_config, pagination="keyset")
+        return mock.patch.object(view_class, "crud_config", cfg)
+
+    def walk(self, url, direction="after", start=None):
+        names, token = [], start
+        while True:
+            params = {direction: token} if token else {}
+            resp = self.client.get(url, params)
+            page = resp.context["page_obj"]
+            self.assertTrue(page.is_keyset)
+            batch = [e.nombre_equipo for e in page]
+            names = batch + names if direction == "before" else names + batch
+            token = page.next_token if direction == "after" else page.previous_token
+            if not token:
+                return names, page
+
+    def test_walks_all_pages_both_ways(self):
+        self.make_equipos(60)
+        url = reverse("productos:equipos_list")
+        with self.keyset_mode():
+            forward, last = self.walk(url)
+            self.assertEqual(forward, [f"NB-{i:04d}" for i in range(60)])
+            backward, _ = self.walk(url, "before", start=last.previous_token)
+            self.assertEqual(backward, forward[:50])
+
+            # cada página cuesta lo mismo, sin COUNT(*)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url, {"after": last.previous_token})
+            self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+
+    def test_descending_order_and_nullable_fallback(self):
+        self.assertEqual(self.keyset_ordering(Equipo, ["-nombre_equipo"]), ["-nombre_equipo", "id_equipo"])
+        self.assertIsNone(self.keyset_ordering(Equipo, ["id_estado_equipo"]))
+
+    def test_tampered_token_restarts(self):
+        self.make_equipos(3)
+        with self.keyset_mode():
+            resp = self.client.get(reverse("productos:equipos_list"), {"after": "basura"})
+        self.assertEqual(len(resp.context["items"]), 3)
+
+    def test_approximate_paginator_trusts_rows_over_estimate(self):
+        from unittest import mock
+        from django.core.paginator import EmptyPage
+        from .pagination import ApproximatePaginator
+        self.make_equipos(60)
+        qs = Equipo.objects.order_by("pk")
+
+        # el planner estima 15 filas (1 página de 20); hay 60
+        with mock.patch("productos.pagination.approximate_count", return_value=15):
+            paginator = ApproximatePaginator(qs, 20)
+            first = paginator.page(1)
+            self.assertTrue(first.has_next())
+            last = paginator.page(3)
+            self.assertEqual([e.nombre_equipo for e in last][-1], "NB-0059")
+            self.assertFalse(last.has_next())
+            self.assertEqual(paginator.count, 60)
+            with self.assertRaises(EmptyPage):
+                ApproximatePaginator(qs, 20).page(4)
+
+        # sobreestimado: la última página real no ofrece "Next"
+        with mock.patch("productos.pagination.approximate_count", return_value=500):
+            self.assertFalse(ApproximatePaginator(qs, 20).page(3).has_next())
+
+
+class CrudRegistryTests(InventarioTestCase):
+    def test_lookups_and_precomputed_metadata(self):
+        from .crud import get_registry
+        registry = get_registry()
+        cfg = registry.get(Equipo)
+        self.assertIs(registry.get("productos.equipo"), cfg)
+        self.assertIs(registry.get("equipos"), cfg)
+        self.assertIs(registry.by_slug("equipos"), cfg)
+        self.assertEqual(cfg.perms["add"], "productos.add_equipo")
+        self.assertEqual(cfg.url_names["csv"], "productos:equipos_csv")
+        self.assertEqual(registry.urls(cfg)["list"], reverse("productos:equipos_list"))
+        # el match exacto gana a la coincidencia parcial ("equipo" en "tipoequipo")
+        self.assertEqual(registry.get(TipoEquipo).icon, "bi-hdd-stack")
+
+    def test_configs_are_frozen(self):
+        from dataclasses import FrozenInstanceError
+        from .crud import get_registry
+        with self.assertRaises(FrozenInstanceError):
+            get_registry().get(Equipo).slug = "otro"
+
+
+class PermSnapshotTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        from django.contrib.auth.models import Group, Permission
+        self.group = Group.objects.create(name="Bodega")
+        self.group.permissions.add(Permission.objects.get(codename="view_equipo"))
+        self.bodega = get_user_model().objects.create_user("bodega", password="x")
+        self.bodega.groups.add(self.group)
+        self.client.force_login(self.bodega)
+
+    def perm_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        perm_sql = [q for q in ctx.captured_queries if "auth_permission" in q["sql"]]
+        return resp, len(perm_sql)
+
+    def test_group_perms_cached_across_requests(self):
+        url = reverse("productos:equipos_list")
+        resp, first = self.perm_queries(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertGreater(first, 0)
+        resp, second = self.perm_queries(url)
+        self.assertEqual(second, 0)
+        # sin permiso de alta no aparece el botón "Nuevo"
+        self.assertNotContains(resp, reverse("productos:equipos_create"))
+
+    def test_group_change_bumps_version(self):
+        from django.contrib.auth.models import Permission
+        self.assertEqual(self.client.get(reverse("productos:marcas_list")).status_code, 403)
+        self.group.permissions.add(Permission.objects.get(codename="view_marca"))
+        self.assertEqual(self.client.get(reverse("productos:marcas_list")).status_code, 200)
+
+    def test_vectorized_can(self):
+        from .crud import get_registry
+        from .perms import can
+        allowed = can(self.bodega, "view", get_registry())
+        self.assertTrue(allowed["productos.equipo"])
+        self.assertFalse(allowed["productos.marca"])
+        self.assertEqual(len(allowed), len(get_registry()))
+
+
+class AuditIndexesTests(InventarioTestCase):
+    def test_suggests_missing_indexes(self):
+        from django.core.management import call_command
+        self.make_equipos(3)
+        out = StringIO()
+        call_command("audit_indexes", "--sql", stdout=out)
+        ddl = out.getvalue()
+        # el detalle ordena mantenciones por fecha
+        self.assertIn('ON "mantencion" ("id_equipo", "fecha")', ddl)
+        # EquiposListView lee equipo_listing, que ya trae sus índices
+        self.assertNotIn('ON "equipo_listing"', ddl)
+        self.assertNotIn('ON "equipo" ("nombre_equipo")', ddl)
+        # ?o=<columna> solo con --orderings
+        self.assertNotIn('("giro")', ddl)
+
+    def test_apply_then_clean(self):
+        from django.core.management import call_command
+        call_command("audit_indexes", "--apply", "-q", "EquiposListView", stdout=StringIO())
+        out = StringIO()
+        call_command("audit_indexes", "--sql", "-q", "EquiposListView", stdout=out)
+        self.assertEqual(out.getvalue().strip(), "")
+
+
+class GastoMensualTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.eq, = self.make_equipos(1)
+
+    def linea(self, factura, total):
+        return DetalleFactura.objects.create(
+            id_factura=factura, id_equipo=self.eq, cantidad=1, valor_unitario=total, valor_total=total,
+        )
+
+    def rollup(self):
+        from .models import GastoMensual
+        return {(g.mes, g.id_proveedor_id, g.id_tipo_equipo_id): g.total for g in GastoMensual.objects.all()}
+
+    def test_signals_keep_rollup_in_sync(self):
+        from datetime import date
+        ene, feb = date(2025, 1, 1), date(2025, 2, 1)
+        key = lambda mes: (mes, self.proveedor.pk, self.tipo.pk)  # noqa: E731
+        with self.captureOnCommitCallbacks(execute=True):
+            f = Factura.objects.create(id_proveedor=self.proveedor, fecha_emision=date(2025, 1, 15))
+            a = self.linea(f, 1000)
+            self.linea(f, 500)
+        self.assertEqual(self.rollup(), {key(ene): 1500})
+
+        # mover la factura de mes recalcula ambos meses
+        with self.captureOnCommitCallbacks(execute=True):
+            f.fecha_emision = date(2025, 2, 3)
+            f.save()
+        self.assertEqual(self.rollup(), {key(feb): 1500})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+        self.assertEqual(self.rollup(), {key(feb): 500})
+
+        # reclasificar el equipo cambia el tipo del gasto
+        otro_tipo = TipoEquipo.objects.create(tipo_equipo="Monitor")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.eq.id_tipo_equipo = otro_tipo
+            self.eq.save()
+        self.assertEqual(self.rollup(), {(feb, self.proveedor.pk, otro_tipo.pk): 500})
+
+    def test_rebuild_command_and_chart(self):
+        from datetime import date
+        from django.core.management import call_command
+        from .kpis import gastos_ultimos_meses
+        hoy = date.today()
+        f = Factura.objects.create(id_proveedor=self.proveedor, fecha_emision=hoy)
+        self.linea(f, 700)  # sin on_commit: el rollup queda desfasado
+        self.assertEqual(self.rollup(), {})
+
+        call_command("rebuild_gastos", stdout=StringIO())
+        self.assertEqual(list(self.rollup().values()), [700])
+        labels, values = gastos_ultimos_meses(hoy)
+        self.assertEqual(values[-1], 700)
+        self.assertEqual(len(labels), len(values))
+
+
+class ImportTests(InventarioTestCase):
+    def post_csv(self, slug, text, **extra):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        archivo = SimpleUploadedFile(f"{slug}.csv", text.encode(), content_type="text/csv")
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse(f"productos:{slug}_import"), {"archivo": archivo, **extra})
+        self.assertEqual(resp.status_code, 200)
+        return resp.context["report"], len(ctx.captured_queries)
+
+    def equipos_csv(self, n):
+        rows = [f"NB-{i:04d},lenovo,Notebook,11111111-1" for i in range(n)]
+        return "\n".join(["nombre_equipo,id_marca,id_tipo_equipo,id_empleado", *rows])
+
+    def test_natural_keys_and_constant_queries(self):
+        # la primera vez cada proceso mira si hay tablas FTS (search.py)
+        self.post_csv("equipos", self.equipos_csv(1).replace("NB-0000", "NB-9999"))
+        report, q_small = self.post_csv("equipos", self.equipos_csv(3))
+        self.assertEqual((report.created, report.errors), (3, []))
+        eq = Equipo.objects.get(nombre_equipo="NB-0001")
+        self.assertEqual((eq.id_marca, eq.id_tipo_equipo, eq.id_empleado), (self.marca, self.tipo, self.empleado))
+
+        _, q_big = self.post_csv("equipos", self.equipos_csv(40))
+        self.assertEqual(Equipo.objects.count(), 44)
+        self.assertEqual(q_small, q_big)
+
+    def test_update_and_row_errors(self):
+        eq, = self.make_equipos(1)
+        text = "\n".join([
+            "id_equipo;nombre_equipo;id_marca;id_tipo_equipo",
+            f"{eq.pk};Renombrado;Lenovo;Notebook",
+            ";Nuevo;Asus;Notebook",     # marca inexistente
+            "999;Fantasma;Lenovo;Notebook",  # ID inexistente
+            ";Otro;Lenovo;Notebook",
+        ])
+        report, _ = self.post_csv("equipos", text)
+        self.assertEqual((report.created, report.updated), (1, 1))
+        self.assertEqual([e.line for e in report.errors], [3, 4])
+        self.assertIn("id_marca", report.errors[0].errors)
+        eq.refresh_from_db()
+        self.assertEqual(eq.nombre_equipo, "Renombrado")
+
+    def test_dry_run_and_db_errors(self):
+        report, _ = self.post_csv("marcas", "nombre_marca\nHP\nDell\n", solo_validar="on")
+        self.assertEqual((report.dry_run, report.created), (True, 2))
+        self.assertFalse(Marca.objects.filter(nombre_marca="HP").exists())
+
+        # "Lenovo" choca con el UNIQUE: el bloque se reintenta fila por fila,
+        # con save() y sus señales (sin volver a sincronizar a mano)
+        from unittest import mock
+        with mock.patch("productos.importer.after_bulk_write") as after:
+            report, _ = self.post_csv("marcas", "nombre_marca\nHP\nLenovo\nDell\n")
+        after.assert_not_called()
+        self.assertEqual(report.created, 2)
+        self.assertEqual([e.line for e in report.errors], [3])
+        self.assertEqual(Marca.objects.count(), 3)
+
+    def test_command(self):
+        import tempfile
+        from django.core.management import call_command
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(self.equipos_csv(5))
+        self.addCleanup(__import__("os").unlink, f.name)
+        out = StringIO()
+        call_command("import_crud", "equipos", f.name, "--chunk-size", "2", stdout=out)
+        self.assertIn("5 nuevas", out.getvalue())
+        self.assertEqual(Equipo.objects.count(), 5)
+
+    def test_search_index_follows_bulk_import(self):
+        from django.core.management import call_command
+        from .search import get_search_backend
+        self.addCleanup(get_search_backend().reset)
+        call_command("search_index", "equipos", stdout=StringIO())
+        self.post_csv("equipos", self.equipos_csv(3))
+        resp = self.client.get(reverse("productos:equipos_list"), {"q": "NB-0002"})
+        self.assertEqual([e.nombre_equipo for e in resp.context["items"]], ["NB-0002"])
+
+
+class AsyncPanelTests(InventarioTestCase):
+    def context(self, view_cls, user=None):
+        from asgiref.sync import async_to_sync
+        from django.test import RequestFactory
+        request = RequestFactory().get("/")
+        request.user = user or self.user
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        view = view_cls.as_view()
+        resp = async_to_sync(view)(request) if view_cls.view_is_async else view(request)
+        return resp
+
+    def test_async_views_match_sync(self):
+        from .dashboard import AsyncDashboardView, DashboardView
+        from .overview import AsyncMetricsDashboardView, MetricsDashboardView
+        from .views import AsyncHomeView, HomeView
+        eq, = self.make_equipos(1)
+        Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=self.estado_mant)
+        for sync_cls, async_cls, keys in (
+            (HomeView, AsyncHomeView, ("menu", "total_equipos", "chart_tipos_values", "ultimos_equipos")),
+            (MetricsDashboardView, AsyncMetricsDashboardView, ("kpis", "equipos_by_tipo", "mant_by_estado")),
+            (DashboardView, AsyncDashboardView, ("cards",)),
+        ):
+            self.assertTrue(async_cls.view_is_async)
+            cache.clear()
+            expected = self.context(sync_cls).context_data
+            cache.clear()
+            got = self.context(async_cls).context_data
+            for k in keys:
+                self.assertEqual(got[k], expected[k], f"{async_cls.__name__}.{k}")
+
+    def test_async_requires_login(self):
+        from django.contrib.auth.models import AnonymousUser
+        from .views import AsyncHomeView
+        resp = self.context(AsyncHomeView, user=AnonymousUser())
+        self.assertEqual(resp.status_code, 302)
+        self.assertIn("/login/", resp["Location"])
+
+
+class FanoutTests(SimpleTestCase):
+    def test_tasks_run_concurrently(self):
+        import time
+        from asgiref.sync import async_to_sync
+        from .fanout import gather, run_parallel
+        tasks = {str(i): (lambda i=i: time.sleep(0.2) or i) for i in range(3)}
+        for run in (run_parallel, async_to_sync(gather)):
+            t0 = time.perf_counter()
+            self.assertEqual(run(tasks), {"0": 0, "1": 1, "2": 2})
+            self.assertLess(time.perf_counter() - t0, 0.5)
+
+
+class CatalogTests(InventarioTestCase):
+    def test_warm_catalog_costs_no_queries(self):
+        from .catalogs import get_catalog
+        self.assertEqual(get_catalog(Marca).id_for("lenovo"), self.marca.pk)
+        with self.assertNumQueries(0):
+            cat = get_catalog(Marca)
+            self.assertEqual(cat.get(self.marca.pk).nombre_marca, "Lenovo")
+
+    def test_signals_reload_every_process_copy(self):
+        from .catalogs import get_catalog
+        self.assertEqual(len(get_catalog(TipoEquipo)), 1)
+        TipoEquipo.objects.create(tipo_equipo="Monitor")
+        self.assertEqual([t.tipo_equipo for t in get_catalog(TipoEquipo)], ["Monitor", "Notebook"])
+        # update() no emite señales: la copia sigue vigente hasta invalidar
+        TipoEquipo.objects.filter(tipo_equipo="Monitor").update(tipo_equipo="Pantalla")
+        self.assertIsNotNone(get_catalog(TipoEquipo).id_for("Monitor"))
+
+    def test_shared_version_bumped_on_commit(self):
+        from .catalogs import _version_name, get_catalog
+        from .versioning import get_version
+        antes = get_version(_version_name(Marca))
+        with self.captureOnCommitCallbacks(execute=True):
+            Marca.objects.create(nombre_marca="HP")
+            # la copia de este proceso ya ve la marca nueva; los demás workers, al confirmar
+            self.assertIsNotNone(get_catalog(Marca).id_for("hp"))
+            self.assertEqual(get_version(_version_name(Marca)), antes)
+        self.assertNotEqual(get_version(_version_name(Marca)), antes)
+
+    def test_status_kpis_filter_by_fk(self):
+        from .kpis import kpi_querysets
+        self.make_equipos(2)
+        qs = kpi_querysets()["disponibles"]
+        self.assertNotIn("JOIN", str(qs.query))
+        self.assertEqual(qs.count(), 2)
+        # estado inexistente: sin consulta
+        with self.assertNumQueries(0):
+            self.assertEqual(kpi_querysets()["en_uso"].count(), 0)
+
+    def test_equipos_list_dropdowns_and_rows_from_catalog(self):
+        from django.test import RequestFactory
+        from .views_old import EquiposListView
+        self.make_equipos(3)
+        request = RequestFactory().get("/")
+        request.user = self.user
+        EquiposListView.as_view()(request)  # calienta catálogos
+        with self.assertNumQueries(2):  # COUNT + página (equipo_listing, sin joins)
+            resp = EquiposListView.as_view()(request)
+            ctx = resp.context_data
+            self.assertEqual([m.nombre_marca for m in ctx["marcas"]], ["Lenovo"])
+            self.assertEqual({e.marca for e in ctx["equipos"]}, {"Lenovo"})
+
+
+class ConditionalCacheTests(InventarioTestCase):
+    def etag(self, url):
+        # el primer request deja la cookie CSRF, que también entra en el ETag
+        self.client.get(url)
+        return self.client.get(url)["ETag"]
+
+    def test_list_revalidates_with_304_until_table_changes(self):
+        url = reverse("productos:marcas_list")
+        etag = self.etag(url)
+        self.assertIn("no-cache", self.client.get(url)["Cache-Control"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # otra página o búsqueda es otra representación
+        self.assertEqual(self.client.get(url + "?q=x", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Marca.objects.create(nombre_marca="Dell")
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_related_table_changes_invalidate_list(self):
+        url = reverse("productos:equipos_list")
+        etag = self.etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Marca.objects.filter(pk=self.marca.pk).update(nombre_marca="Lenovo Inc")
+            self.marca.save()  # la marca se muestra en el listado de equipos
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_rows_fragment_served_from_cache(self):
+        from .http_cache import touch_tables
+        url = reverse("productos:marcas_list")
+        self.assertContains(self.client.get(url), "Lenovo")
+        # update() no emite señales: las filas siguen saliendo del fragmento
+        Marca.objects.filter(pk=self.marca.pk).update(nombre_marca="HP")
+        self.assertContains(self.client.get(url), "Lenovo")
+        with self.captureOnCommitCallbacks(execute=True):
+            touch_tables(Marca)
+        self.assertContains(self.client.get(url), "HP")
+
+    def test_overview_pages_revalidate(self):
+        for name in ("vistas_grid", "vistas_lista", "dashboard"):
+            url = reverse(f"productos:{name}")
+            etag = self.etag(url)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, name)
+
+
+class RowRendererTests(InventarioTestCase):
+    def test_same_html_as_attr_filter_template(self):
+        from django.template import engines
+        from .crud import get_registry
+        from .management.commands.bench_rows import LEGACY_TBODY, _normalize
+        from .rows import render_rows
+        self.make_equipos(3)
+        Mantencion.objects.create(id_equipo=Equipo.objects.first(), id_estado_mantencion=self.estado_mant,
+                                  descripcion="Cambio de <b>teclado</b>")
+        legacy = engines["django"].from_string(LEGACY_TBODY)
+        for slug in ("equipos", "mantencions", "empleados", "marcas"):
+            cfg = get_registry().by_slug(slug)
+            items = list(cfg.base_queryset())
+            for can_change, can_delete in ((True, True), (False, True), (False, False)):
+                ctx = {"cfg": cfg, "items": items, "can_change": can_change, "can_delete": can_delete}
+                self.assertEqual(_normalize(render_rows(cfg, items, can_change, can_delete)),
+                                 _normalize(legacy.render(ctx)), slug)
+            self.assertIn("No hay registros.", render_rows(cfg, [], True, True))
+
+    def test_list_rows_link_to_edit(self):
+        eq = self.make_equipos(1)[0]
+        resp = self.client.get(reverse("productos:equipos_list"))
+        self.assertContains(resp, f'href="{reverse("productos:equipos_update", args=[eq.pk])}"')
+        self.assertContains(resp, "<td>NB-0000</td><td>Lenovo</td><td>Notebook</td>", html=False)
+
+
+class EquipoListingTests(InventarioTestCase):
+    def row(self, equipo):
+        from .models import EquipoListing
+        return EquipoListing.objects.get(pk=equipo.pk)
+
+    def test_signals_keep_rows_current(self):
+        from datetime import date
+        eq, otro = self.make_equipos(2)
+        row = self.row(eq)
+        self.assertEqual((row.marca, row.tipo_equipo, row.estado, row.empleado, row.proveedor),
+                         ("Lenovo", "Notebook", "Disponible", "Ana Rojas", "PC Factory"))
+        self.assertEqual(row.mantenciones, 0)
+
+        hecha = EstadoMantencion.objects.create(tipo="Hecha")
+        Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=hecha, fecha=date(2026, 1, 5))
+        m = Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=self.estado_mant, fecha=date(2026, 3, 1))
+        row = self.row(eq)
+        self.assertEqual((row.mantenciones, row.ultima_mantencion, row.estado_ultima_mantencion),
+                         (2, date(2026, 3, 1), "Pendiente"))
+
+        # renombrar un catálogo o mover/borrar una mantención refresca las filas afectadas
+        self.estado_mant.tipo = "En curso"
+        self.estado_mant.save()
+        self.assertEqual(self.row(eq).estado_ultima_mantencion, "En curso")
+        m.id_equipo = otro
+        m.save()
+        self.assertEqual((self.row(eq).mantenciones, self.row(otro).mantenciones), (1, 1))
+        self.assertEqual(self.row(eq).estado_ultima_mantencion, "Hecha")
+        m.delete()
+        self.assertEqual(self.row(otro).mantenciones, 0)
+
+        self.empleado.apellido_paterno = "Soto"
+        self.empleado.save()
+        self.assertEqual(self.row(eq).empleado, "Ana Soto")
+        pk = eq.pk
+        Mantencion.objects.filter(id_equipo=eq).delete()
+        eq.delete()
+        self.assertFalse(type(self.row(otro)).objects.filter(pk=pk).exists())
+
+    def test_rename_is_set_based(self):
+        from .models import EquipoListing
+
+        def rename(nombre):
+            self.marca.nombre_marca = nombre
+            with CaptureQueriesContext(connection) as ctx:
+                self.marca.save()
+            return [q["sql"] for q in ctx.captured_queries]
+
+        self.make_equipos(1)
+        rename("Lenovo 1")  # la primera vez cada proceso mira si hay tablas FTS (search.py)
+        few = rename("Lenovo 2")
+        self.make_equipos(6, start=1)
+        many = rename("Lenovo 3")
+        # un UPDATE del listado sin recalcular filas (sin leer mantenciones), igual con 1 o 7 equipos
+        self.assertEqual(len(few), len(many))
+        self.assertFalse([q for q in many if '"mantencion"' in q])
+        self.assertEqual(set(EquipoListing.objects.values_list("marca", flat=True)), {"Lenovo 3"})
+
+        # varias marcas renombradas sin señales (acción masiva): un solo UPDATE
+        from .listing import rename as rename_listing
+        hp = Marca.objects.create(nombre_marca="HP")
+        Equipo.objects.create(nombre_equipo="PC-1", id_marca=hp, id_tipo_equipo=self.tipo)
+        Marca.objects.filter(pk=self.marca.pk).update(nombre_marca="Lenovo 4")
+        Marca.objects.filter(pk=hp.pk).update(nombre_marca="HP Inc")
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(rename_listing(Marca, [self.marca.pk, hp.pk]), 8)
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "equipo_listing"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(set(EquipoListing.objects.values_list("marca", flat=True)), {"Lenovo 4", "HP Inc"})
+
+    def test_rebuild_and_import_match_signals(self):
+        from django.core.management import call_command
+        from .models import EquipoListing
+        self.make_equipos(3)
+        before = list(EquipoListing.objects.order_by("pk").values())
+        EquipoListing.objects.all().delete()
+        call_command("rebuild_listing", stdout=StringIO())
+        self.assertEqual(list(EquipoListing.objects.order_by("pk").values()), before)
+
+        from .crud import get_registry
+        from .importer import Importer
+        csv_data = "nombre_equipo,id_marca,id_tipo_equipo\nPC-9,Lenovo,Notebook\n".encode()
+        Importer(get_registry().by_slug("equipos")).run(BytesIO(csv_data), "e.csv")
+        self.assertEqual(EquipoListing.objects.get(nombre_equipo="PC-9").tipo_equipo, "Notebook")
+
+    def test_list_filters_on_single_table(self):
+        from django.test import RequestFactory
+        from .views_old import EquiposListView
+        self.make_equipos(2)
+        request = RequestFactory().get("/", {"marca": self.marca.pk, "q": "rojas"})
+        request.user = self.user
+        view = EquiposListView()
+        view.setup(request)
+        sql = str(view.get_queryset().query)
+        self.assertNotIn("JOIN", sql)
+        self.assertEqual(view.get_queryset().count(), 2)
+
+
+class BenchSuiteTests(InventarioTestCase):
+    def test_seed_then_suite_writes_json(self):
+        import json
+        import tempfile
+        from django.core.management import call_command
+        from .models import EquipoListing
+        from .search import get_search_backend
+        self.addCleanup(get_search_backend().reset)  # seed_bench crea los índices FTS
+        call_command("seed_bench", scale=40, stdout=StringIO())
+        self.assertEqual(Equipo.objects.count(), 40)
+        self.assertEqual(Mantencion.objects.count(), 80)
+        self.assertEqual(EquipoListing.objects.count(), 40)
+        self.assertEqual(EstadoEquipo.objects.filter(descripcion="Disponible").count(), 1)
+
+        with tempfile.NamedTemporaryFile(suffix=".json") as f:
+            call_command("bench_suite", "-k", "equipo", "-k", "home", iterations=2, warmup=0,
+                         json_path=f.name, stdout=StringIO())
+            data = json.load(f)
+        self.assertEqual(data["meta"]["rows"]["equipo"], 40)
+        self.assertIn("csv:equipos", data["scenarios"])
+        for name, r in data["scenarios"].items():
+            self.assertEqual(r["status"], 200, name)
+            self.assertGreater(r["queries"], 0, name)
+            self.assertLessEqual(r["p50_ms"], r["p95_ms"])
+
+
+class RequestMetricsTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        from . import metrics
+        self.metrics = metrics
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    @override_settings(CRUD_EXPORT_JOBS=False)  # CSV en streaming
+    def test_records_per_url_name_and_exposes_text(self):
+        self.make_equipos(2)
+        self.client.get(reverse("productos:equipos_list"))
+        resp = self.client.get(reverse("productos:equipos_csv"))
+        stats = self.metrics.snapshot()
+        self.assertNotIn("productos:equipos_csv", stats)  # se registra al consumir el stream
+        b"".join(resp.streaming_content)
+        stats = self.metrics.snapshot()
+
+        lst = stats["productos:equipos_list"]
+        self.assertEqual(lst.requests, 1)
+        self.assertGreater(lst.queries, 0)
+        self.assertGreater(lst.template_seconds, 0)
+        self.assertGreaterEqual(lst.seconds, lst.db_seconds + lst.template_seconds)
+        self.assertEqual(stats["productos:equipos_csv"].requests, 1)
+
+        text = self.client.get(reverse("productos:metrics")).content.decode()
+        self.assertIn('productos_requests_total{view="productos:equipos_list"} 1', text)
+        self.assertIn(f'productos_db_queries_max{{view="productos:equipos_list"}} {lst.queries}', text)
+        self.assertIn('productos_request_seconds_bucket{view="productos:equipos_list",le="+Inf"} 1', text)
+
+    def test_metrics_endpoint_access(self):
+        url = reverse("productos:metrics")
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 403)
+        with override_settings(METRICS_TOKEN="s3cr3t"):
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer x").status_code, 403)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer s3cr3t").status_code, 200)
+
+    def test_query_budget(self):
+        url = reverse("productos:marcas_list")
+        with override_settings(QUERY_BUDGETS={"productos:marcas_list": 1, "productos:*": 100}):
+            self.assertEqual(self.metrics.query_budget("productos:marcas_list"), 1)
+            self.assertEqual(self.metrics.query_budget("productos:home"), 100)
+            with self.assertRaises(self.metrics.QueryBudgetExceeded):
+                self.client.get(url)
+            with override_settings(QUERY_BUDGET_STRICT=False), \
+                    self.assertLogs("productos.metrics", "WARNING") as logs:
+                self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertIn("presupuesto 1", logs.output[0])
+        self.assertEqual(self.metrics.snapshot()["productos:marcas_list"].over_budget, 2)
+
+
+class LeanFormTests(InventarioTestCase):
+    def test_form_class_cached_and_fk_choices_lean(self):
+        from .crud import get_registry
+        from .fk_choices import form_class_for
+        cfg = get_registry().by_slug("equipos")
+        self.assertIs(form_class_for(cfg), form_class_for(cfg))
+
+        url = reverse("productos:equipos_create")
+        self.client.get(url)  # calienta conteos y catálogos
+        before = self.count_queries(url)
+        for i in range(5):
+            Empleado.objects.create(rut=f"9-{i}", nombre="Luis", apellido_paterno=f"P{i}", activo=True,
+                                    id_empresa=self.empresa, id_departamento=self.depto)
+        self.client.get(url)
+        self.assertEqual(self.count_queries(url), before)  # una consulta por FK no catálogo, no por opción
+        resp = self.client.get(url)
+        self.assertContains(resp, f'<option value="{self.empleado.pk}">Ana Rojas</option>', html=True)
+        self.assertContains(resp, f'<option value="{self.marca.pk}">Lenovo</option>', html=True)
+
+    @override_settings(CRUD_FK_AUTOCOMPLETE_THRESHOLD=2, CRUD_AUTOCOMPLETE_PAGE_SIZE=2)
+    def test_large_fk_switches_to_autocomplete(self):
+        eq1, eq2, eq3 = self.make_equipos(3)
+        factura = Factura.objects.create(id_proveedor=self.proveedor)
+        resp = self.client.get(reverse("productos:detallefacturas_create"))
+        ac_url = reverse("productos:detallefacturas_autocomplete", args=["id_equipo"])
+        self.assertContains(resp, f'data-url="{ac_url}"')
+        self.assertNotContains(resp, str(eq1))  # sin opciones hasta buscar
+
+        data = self.client.get(ac_url, {"q": "nb-000"}).json()
+        self.assertEqual([r["text"] for r in data["results"]], [str(eq1), str(eq2)])
+        self.assertEqual((data["more"], data["next"]), (True, eq2.pk))
+        data = self.client.get(ac_url, {"q": "nb-000", "after": data["next"]}).json()
+        self.assertEqual(([r["id"] for r in data["results"]], data["more"]), ([eq3.pk], False))
+        self.assertEqual(self.client.get(ac_url, {"q": str(eq2.pk)}).json()["results"][0]["id"], eq2.pk)
+        self.assertEqual(self.client.get(reverse("productos:detallefacturas_autocomplete",
+                                                 args=["cantidad"])).status_code, 404)
+
+        resp = self.client.post(reverse("productos:detallefacturas_create"), {
+            "id_factura": factura.pk, "id_equipo": eq3.pk, "cantidad": 1, "valor_unitario": 10})
+        self.assertEqual(resp.status_code, 302)
+        detalle = DetalleFactura.objects.get(id_factura=factura)
+        resp = self.client.get(reverse("productos:detallefacturas_update", args=[detalle.pk]))
+        self.assertContains(resp, f'<option value="{eq3.pk}" selected>{eq3}</option>', html=True)
+        self.assertNotContains(resp, str(eq1))
+
+        self.client.force_login(get_user_model().objects.create_user("lector", password="x"))
+        self.assertEqual(self.client.get(ac_url).status_code, 403)
+
+
+class BulkActionTests(InventarioTestCase):
+    url = "productos:equipos_bulk"
+
+    def test_preview_then_reassign_selected(self):
+        from .models import EquipoListing
+        eq1, eq2, eq3 = self.make_equipos(3)
+        baja = EstadoEquipo.objects.create(descripcion="De baja")
+        data = {"action": "update", "field": "id_estado_equipo", "scope": "selected", "pk": [eq1.pk, eq2.pk]}
+        resp = self.client.post(reverse(self.url), data)
+        self.assertContains(resp, "Aplicar (2)")
+        self.assertEqual(Equipo.objects.filter(id_estado_equipo=baja).count(), 0)  # la vista previa no escribe
+
+        resp = self.client.post(reverse(self.url), {**data, "confirm": "1", "value": baja.pk})
+        self.assertRedirects(resp, reverse("productos:equipos_list"), fetch_redirect_response=False)
+        self.assertEqual(set(Equipo.objects.filter(id_estado_equipo=baja).values_list("pk", flat=True)),
+                         {eq1.pk, eq2.pk})
+        self.assertEqual(EquipoListing.objects.get(pk=eq1.pk).estado, "De baja")
+        self.assertEqual(EquipoListing.objects.get(pk=eq3.pk).estado, "Disponible")
+
+    def test_update_by_filter_and_reindex(self):
+        from .search import get_search_backend
+        self.make_equipos(3)
+        otro, = self.make_equipos(1, start=100)
+        otro.nombre_equipo = "PC-1"
+        otro.save()
+        resp = self.client.post(reverse(self.url), {
+            "action": "update", "field": "nombre_equipo", "scope": "filter", "q": "nb-",
+            "confirm": "1", "value": "Renombrado"})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Equipo.objects.filter(nombre_equipo="Renombrado").count(), 3)
+        qs = get_search_backend().filter(Equipo.objects.all(), "renombrado", ["nombre_equipo"])
+        self.assertEqual(qs.count(), 3)
+
+    def test_delete_blocked_by_references_then_deleted(self):
+        from .models import EquipoListing
+        eq1, eq2 = self.make_equipos(2)
+        Mantencion.objects.create(id_equipo=eq1, id_estado_mantencion=self.estado_mant)
+        data = {"action": "delete", "scope": "selected", "pk": [eq1.pk, eq2.pk], "confirm": "1"}
+        resp = self.client.post(reverse(self.url), data)
+        self.assertContains(resp, "No se pueden eliminar")
+        self.assertEqual(Equipo.objects.count(), 2)
+
+        self.client.get(reverse("productos:home"))  # calienta los conteos del panel
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(reverse(self.url), {**data, "pk": [eq2.pk]})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(list(Equipo.objects.values_list("pk", flat=True)), [eq1.pk])
+        self.assertFalse(EquipoListing.objects.filter(pk=eq2.pk).exists())
+        from .stats import get_module_counts
+        self.assertEqual(get_module_counts()["productos.equipo"], 1)
+
+    def test_requires_action_permission(self):
+        from django.contrib.auth.models import Permission
+        eq, = self.make_equipos(1)
+        user = get_user_model().objects.create_user("editor", password="x")
+        user.user_permissions.add(*Permission.objects.filter(codename__in=["view_equipo", "change_equipo"]))
+        self.client.force_login(user)
+        self.assertContains(self.client.get(reverse("productos:equipos_list")), 'id="bulk-form"')
+        resp = self.client.post(reverse(self.url), {"action": "delete", "scope": "selected", "pk": eq.pk})
+        self.assertEqual(resp.status_code, 403)
+        resp = self.client.post(reverse(self.url), {"action": "update", "field": "nombre_equipo",
+                                                    "scope": "selected", "pk": eq.pk})
+        self.assertEqual(resp.status_code, 200)
+
+
+class ProgramacionTests(InventarioTestCase):
+    def setUp(self):
+        super().setUp()
+        from .models import IntervaloMantencion
+        self.hecha = EstadoMantencion.objects.create(tipo="Hecha")
+        self.intervalo = IntervaloMantencion.objects.create(id_tipo_equipo=self.tipo, dias=90)
+
+    def cola(self):
+        from .models import MantencionProgramada
+        return {r.id_equipo_id: (r.ultima, r.proxima) for r in MantencionProgramada.objects.all()}
+
+    def test_first_interval_fills_queue_after_migrate(self):
+        # recién migrado: equipos existentes, sin intervalos ni cola
+        from .models import IntervaloMantencion
+        self.intervalo.delete()
+        eq, = self.make_equipos(1)
+        self.assertEqual(self.cola(), {})
+        # el primer intervalo del tipo encola sus equipos, sin --rebuild
+        IntervaloMantencion.objects.create(id_tipo_equipo=self.tipo, dias=30)
+        self.assertEqual(list(self.cola()), [eq.pk])
+
+    def test_queue_follows_mantenciones(self):
+        from datetime import date, timedelta
+        eq, otro = self.make_equipos(2)
+        hoy = date.today()
+        self.assertEqual(self.cola()[eq.pk], (None, hoy + timedelta(days=90)))
+
+        m = Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=self.hecha, fecha=date(2026, 1, 10))
+        Mantencion.objects.create(id_equipo=eq, id_estado_mantencion=self.estado_mant, fecha=date(2026, 5, 1))
+        self.assertEqual(self.cola()[eq.pk], (date(2026, 1, 10), date(2026, 4, 10)))  # la pendiente no cuenta
+
+        m.id_equipo = otro
+        m.save()
+        self.assertEqual(self.cola()[eq.pk], (None, hoy + timedelta(days=90)))  # conserva la fecha de entrada
+        self.assertEqual(self.cola()[otro.pk][1], date(2026, 4, 10))
+
+        # renombrar el estado de la pendiente a uno realizado: ahora cuenta como la última
+        self.estado_mant.tipo = "Hecha en terreno"
+        self.estado_mant.save()
+        self.assertEqual(self.cola()[eq.pk], (date(2026, 5, 1), date(2026, 7, 30)))
+        self.estado_mant.tipo = "Pendiente"
+        self.estado_mant.save()
+        self.assertEqual(self.cola()[eq.pk], (None, hoy + timedelta(days=90)))
+
+        self.intervalo.dias = 30
+        self.intervalo.save()
+        self.assertEqual(self.cola()[otro.pk][1], date(2026, 2, 9))
+        self.intervalo.delete()
+        self.assertEqual(self.cola(), {})
+
+    def test_command_lists_due_and_rebuild_matches_signals(self):
+        from datetime import date
+        from django.core.management import call_command
+        from .models import MantencionProgramada
+        eq1, eq2, eq3 = self.make_equipos(3)
+        Mantencion.objects.create(id_equipo=eq1, id_estado_mantencion=self.hecha, fecha=date(2026, 1, 1))
+        Mantencion.objects.create(id_equipo=eq2, id_estado_mantencion=self.hecha, fecha=date(2026, 3, 1))
+        before = self.cola()
+        MantencionProgramada.objects.all().delete()
+        call_command("mantenciones_vencidas", "--rebuild", "--count", stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(self.cola(), before)
+
+        out = StringIO()
+        call_command("mantenciones_vencidas", "--fecha", "2026-05-01", "--dias", "31", stdout=out, stderr=StringIO())
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "id_equipo,nombre_equipo,tipo_equipo,ultima,proxima,dias_atraso")
+        self.assertEqual(lines[1:], [f"{eq1.pk},NB-0000,Notebook,2026-01-01,2026-04-01,30",
+                                     f"{eq2.pk},NB-0001,Notebook,2026-03-01,2026-05-30,-29"])
+        from .catalogs import get_catalog
+        get_catalog(TipoEquipo)  # --tipo se resuelve con el catálogo
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("mantenciones_vencidas", "--tipo", "notebook", stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+
+class AsignacionTests(InventarioTestCase):
+    def test_history_follows_equipo_saves(self):
+        from datetime import timedelta
+        from unittest import mock
+        from .asignaciones import empleados_en, historial_empleado, historial_equipo, vigentes_en
+        from .models import AsignacionEquipo
+        t0 = timezone.now() - timedelta(days=30)
+        otra = Empleado.objects.create(rut="22.222.222-2", nombre="Luis", apellido_paterno="Soto", activo=True,
+                                       id_empresa=self.empresa, id_departamento=self.depto)
+        with mock.patch("django.utils.timezone.now", return_value=t0):
+            eq, = self.make_equipos(1)
+        t1 = t0 + timedelta(days=10)
+        with mock.patch("django.utils.timezone.now", return_value=t1):
+            eq.id_empleado = otra
+            eq.save()
+        eq.save()  # sin cambio de empleado: no agrega filas
+        self.assertEqual(AsignacionEquipo.objects.count(), 2)
+
+        self.assertEqual(empleados_en([eq.pk], t0 + timedelta(days=5)), {eq.pk: self.empleado})
+        self.assertEqual(empleados_en([eq.pk], t1), {eq.pk: otra})
+        self.assertEqual(empleados_en([eq.pk], t0 - timedelta(seconds=1)), {})
+        self.assertEqual([a.id_empleado for a in historial_equipo(eq.pk)], [otra, self.empleado])
+        self.assertEqual([a.hasta for a in historial_empleado(self.empleado.pk)], [t1])
+        self.assertFalse(historial_empleado(self.empleado.pk, inicio=t1).exists())
+
+        eq.id_empleado = None
+        eq.save()
+        self.assertFalse(vigentes_en(timezone.now()).exists())
+
+        # acciones masivas (sin señales) también dejan historial
+        resp = self.client.post(reverse("productos:equipos_bulk"), {
+            "action": "update", "field": "id_empleado", "scope": "selected", "pk": eq.pk,
+            "confirm": "1", "value": self.empleado.pk})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(empleados_en([eq.pk], timezone.now()), {eq.pk: self.empleado})
+
+    def test_list_as_of_uses_history(self):
+        from datetime import timedelta
+        from unittest import mock
+        from django.test import RequestFactory
+        from .views_old import EquiposListView
+        otra = Empleado.objects.create(rut="22.222.222-2", nombre="Luis", apellido_paterno="Soto", activo=True,
+                                       id_empresa=self.empresa, id_departamento=self.depto)
+        ayer = timezone.now() - timedelta(days=1)
+        with mock.patch("django.utils.timezone.now", return_value=ayer - timedelta(days=30)):
+            eq1, eq2 = self.make_equipos(2)
+        eq1.id_empleado = otra
+        eq1.save()
+
+        def get(**params):
+            request = RequestFactory().get("/", params)
+            request.user = self.user
+            return EquiposListView.as_view()(request).context_data
+
+        ctx = get(as_of=ayer.date().isoformat())
+        self.assertEqual([e.empleado for e in ctx["equipos"]], ["Ana Rojas", "Ana Rojas"])
+        ctx = get(as_of=ayer.date().isoformat(), empleado=self.empleado.pk)
+        self.assertEqual(len(ctx["equipos"]), 2)
+        ctx = get(empleado=self.empleado.pk)
+        self.assertEqual([e.pk for e in ctx["equipos"]], [eq2.pk])
+
+        with CaptureQueriesContext(connection) as q:
+            list(get(as_of="2000-01-01")["equipos"])
+        self.assertTrue(any("asignacion_equipo" in c["sql"] for c in q.captured_queries))
+        self.assertEqual([e.empleado for e in get(as_of="2000-01-01")["equipos"]], [None, None])
+
+    def test_point_in_time_queries_use_indexes(self):
+        from .asignaciones import historial_empleado, vigentes_en
+        plan = vigentes_en(timezone.now()).filter(id_equipo=1).explain()
+        self.assertIn("asignacion_equipo_idx", plan)
+        plan = historial_empleado(self.empleado.pk).explain()
+        self.assertIn("asignacion_empleado_idx", plan)
+
+
+class TempMediaMixin:
+    """MEDIA_ROOT temporal para los archivos generados por las tareas."""
+
+    def setUp(self):
+        super().setUp()
+        import shutil
+        import tempfile
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def run_worker(self):
+        import threading
+        from .jobs import work
+        return work("test", threading.Event(), once=True)
+
+
+class JobTests(TempMediaMixin, InventarioTestCase):
+    def test_csv_export_runs_as_job_with_download(self):
+        from datetime import timedelta
+        from .models import Job
+        self.make_equipos(3)
+        url = reverse("productos:equipos_csv")
+        resp = self.client.get(url, {"q": "NB-0001"})
+        job = Job.objects.get()
+        self.assertRedirects(resp, reverse("productos:job_detail", args=[job.pk]))
+        self.client.get(url, {"q": "NB-0001"})  # doble clic: misma tarea
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertContains(self.client.get(reverse("productos:job_detail", args=[job.pk])), "En cola")
+        self.assertNotContains(self.client.get(reverse("productos:job_detail", args=[job.pk])), "runworker")
+        Job.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertContains(self.client.get(reverse("productos:job_detail", args=[job.pk])), "Ningún worker")
+
+        self.assertEqual(self.run_worker(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress_done, job.progress_total), (Job.DONE, 1, 1))
+        download = reverse("productos:job_download", args=[job.pk])
+        self.assertContains(self.client.get(reverse("productos:job_detail", args=[job.pk])), download)
+        resp = self.client.get(download)
+        self.assertEqual(resp["Content-Disposition"], 'attachment; filename="equipos.csv"')
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("NB-0001", lines[1])
+
+        self.client.force_login(get_user_model().objects.create_user("otro", password="x"))
+        self.assertEqual(self.client.get(download).status_code, 404)
+
+    @override_settings(JOB_RETRY_DELAY=60)
+    def test_retries_then_fails_and_requeues_stale(self):
+        from datetime import timedelta
+        from unittest import mock
+        from .jobs import JOB_HANDLERS, Progress, claim, enqueue, execute
+        from .models import Job
+
+        def falla(job, progress):
+            raise RuntimeError("sin disco")
+        with mock.patch.dict(JOB_HANDLERS, {"falla": falla}):
+            job = enqueue("falla", max_attempts=2)
+            execute(claim("w"))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+            self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=50))
+            self.assertIsNone(claim("w"))  # espera antes del reintento
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            execute(claim("w"))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+            self.assertIn("sin disco", job.error)
+
+        # error permanente (modelo inexistente): falla sin reintentos
+        job = enqueue("crud_csv", {"slug": "no-existe"})
+        execute(claim("w"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertIn("Modelo desconocido", job.error)
+
+        # cada avance guardado renueva locked_at: una tarea larga no vuelve a la cola
+        job = enqueue("rebuild_programacion")
+        lento = claim("lento")
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+        Progress(lento, every=0)(1, 10)
+        self.assertIsNone(claim("w"))
+
+        # worker caído (sin avance pasado JOB_TIMEOUT): vuelve a la cola y el
+        # resultado tardío del worker anterior se descarta
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(claim("w").pk, job.pk)
+        descartado = execute(lento)
+        self.assertEqual((descartado.status, descartado.locked_by), (Job.RUNNING, "w"))
+        self.assertEqual(execute(Job.objects.get(pk=job.pk)).status, Job.DONE)
+
+    def test_prune_removes_old_jobs_and_files(self):
+        import os
+        from datetime import timedelta
+        from django.core.management import call_command
+        from .jobs import enqueue, export_path
+        from .models import Job
+        viejo, nuevo = enqueue("rebuild_gastos"), enqueue("rebuild_gastos")
+        Job.objects.filter(pk=viejo.pk).update(status=Job.DONE, finished_at=timezone.now() - timedelta(days=8))
+        Job.objects.filter(pk=nuevo.pk).update(status=Job.DONE, finished_at=timezone.now())
+        for name, age in (("equipos-1.csv", 8 * 86400), ("equipos-2.csv", 0)):
+            path = export_path(name)
+            path.write_text("x")
+            os.utime(path, (path.stat().st_atime, path.stat().st_mtime - age))
+
+        out = StringIO()
+        call_command("prune_jobs", stdout=out)
+        self.assertIn("1 tarea(s) y 1 archivo(s)", out.getvalue())
+        self.assertEqual(list(Job.objects.values_list("pk", flat=True)), [nuevo.pk])
+        self.assertEqual([p.name for p in export_path("").iterdir()], ["equipos-2.csv"])
+
+
+class ExportAllTests(TempMediaMixin, InventarioTestCase):
+    def read_zip(self, data):
+        import json
+        import zipfile
+        with zipfile.ZipFile(BytesIO(data)) as z:
+            return {n: z.read(n).decode() for n in z.namelist()}, json.loads(z.read("manifest.json"))
+
+    def test_command_writes_one_table_per_model_with_manifest(self):
+        import tarfile
+        from pathlib import Path
+        from django.core.management import call_command
+        from .crud import get_crud_configs
+        self.make_equipos(3)
+        out = Path(self.media, "todo.zip")
+        call_command("export_all", output=str(out), stdout=StringIO(), stderr=StringIO())
+        files, manifest = self.read_zip(out.read_bytes())
+        self.assertEqual(set(files), {f"{c.slug}.csv" for c in get_crud_configs()} | {"manifest.json"})
+        self.assertEqual(manifest["tablas"]["equipos"]["filas"], 3)
+        self.assertEqual(len(files["equipos.csv"].splitlines()), 4)  # encabezado + 3
+        self.assertEqual(files["marcas.csv"].splitlines()[1:], ["1,Lenovo"])
+
+        out = Path(self.media, "equipos.tar.gz")
+        call_command("export_all", output=str(out), format="tar.gz", only=["equipos"],
+                     stdout=StringIO(), stderr=StringIO())
+        with tarfile.open(out) as t:
+            self.assertEqual(sorted(t.getnames()), ["equipos.csv", "manifest.json"])
+        self.assertFalse(Path(self.media, "equipos.tar.gz.part").exists())
+
+    def test_view_runs_as_job(self):
+        from .models import Job
+        self.make_equipos(2)
+        resp = self.client.get(reverse("productos:export_all"), {"formato": "zip"})
+        job = Job.objects.get(kind="export_all")
+        self.assertRedirects(resp, reverse("productos:job_detail", args=[job.pk]))
+        self.assertEqual(self.run_worker(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.progress_done, job.progress_total)
+        self.assertContains(self.client.get(reverse("productos:job_detail", args=[job.pk])), "inventario.zip")
+        resp = self.client.get(reverse("productos:job_download", args=[job.pk]))
+        self.assertEqual(resp["Content-Disposition"], 'attachment; filename="inventario.zip"')
+        _, manifest = self.read_zip(b"".join(resp.streaming_content))
+        self.assertEqual(manifest["tablas"]["equipos"]["filas"], 2)
+
+        # sin permisos de lectura no hay nada que exportar
+        self.client.force_login(get_user_model().objects.create_user("otro", password="x"))
+        self.assertEqual(self.client.get(reverse("productos:export_all")).status_code, 403)
@@ -1,24 +1,46 @@
 # productos/urls.py
+from django.conf import settings
 from django.urls import path
-from .crud import urlpatterns as crud_urls
-from .views import HomeView  # tu vista de Inicio (panel con sidebar)
-from .overview import CardsGridView, ListVerticalView, MetricsDashboardView
+from .archive import export_all_view
+from .crud import make_urlpatterns
+from .dashboard import AsyncDashboardView, DashboardView
+from .jobs import job_detail, job_download
+from .metrics import metrics_view
+from .views import AsyncHomeView, HomeView  # tu vista de Inicio (panel con sidebar)
+from .overview import AsyncMetricsDashboardView, CardsGridView, ListVerticalView, MetricsDashboardView
+
+
+def panel(sync_cls, async_cls):
+    # paneles async (consultas en paralelo) cuando se sirve con ASGI: PANEL_ASYNC_VIEWS=True
+    return (async_cls if getattr(settings, "PANEL_ASYNC_VIEWS", False) else sync_cls).as_view()
+
 
 app_name = "productos"
 
 urlpatterns = [
-    path("", HomeView.as_view(), name="home"),
+    path("", panel(HomeView, AsyncHomeView), name="home"),
 
     # Vistas (dropdown del navbar)
     path("vistas/cuadricula/", CardsGridView.as_view(), name="vistas_grid"),
     path("vistas/lista/", ListVerticalView.as_view(), name="vistas_lista"),
+    path("vistas/modulos/", panel(DashboardView, AsyncDashboardView), name="vistas_modulos"),
 
     # Dashboard (gráficos/metricas)
-    path("dashboard/", MetricsDashboardView.as_view(), name="dashboard"),
+    path("dashboard/", panel(MetricsDashboardView, AsyncMetricsDashboardView), name="dashboard"),
 
     # (opcional) alias de compatibilidad si en algún lado aún usas 'list'
     path("listado/", ListVerticalView.as_view(), name="list"),
+
+    # métricas por vista (texto Prometheus)
+    path("metrics/", metrics_view, name="metrics"),
+
+    # tareas en segundo plano (exportaciones)
+    path("tareas/<int:pk>/", job_detail, name="job_detail"),
+    path("tareas/<int:pk>/descargar/", job_download, name="job_download"),
+
+    # todos los modelos en un zip / tar.gz
+    path("exportar/todo/", export_all_view, name="export_all"),
 ]
 
-# rutas CRUD
-urlpatterns += crud_urls
+# rutas CRUD (una por cada CrudConfig del registro)
+urlpatterns += make_urlpatterns()
@@ -0,0 +1,56 @@
+# productos/versioning.py
+import random
+from typing import Dict, Iterable
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+# Contadores de versión en el cache compartido. Las claves de datos incluyen
+# la versión vigente; invalidar es subir el contador (las claves viejas expiran solas).
+# Si el contador se pierde (cache vacío o reiniciado) arranca en un valor al azar
+# y no en 1: así una copia en memoria de un proceso (ver catalogs.py) no puede
+# volver a coincidir con una versión que ya tenía.
+
+
+def _key(name: str) -> str:
+    return f"productos:ver:{name}"
+
+
+def _initial() -> int:
+    return random.randrange(1, 2**31)
+
+
+def get_version(name: str) -> int:
+    return cache.get_or_set(_key(name), _initial, timeout=None)
+
+
+def get_versions(names: Iterable[str]) -> Dict[str, int]:
+    """get_version de varios contadores con una sola lectura del cache."""
+    names = list(names)
+    found = cache.get_many([_key(n) for n in names])
+    return {n: found[_key(n)] if _key(n) in found else get_version(n) for n in names}
+
+
+def bump_version(name: str) -> int:
+    try:
+        return cache.incr(_key(name))
+    except ValueError:
+        # la clave no existía (cache vacío o reiniciado)
+        version = _initial()
+        cache.set(_key(name), version, timeout=None)
+        return version
+
+
+def versioned_key(name: str, *parts) -> str:
+    extra = ":".join(str(p) for p in parts)
+    return f"productos:{name}:v{get_version(name)}" + (f":{extra}" if extra else "")
+
+
+async def aget_or_compute(name: str, ttl: int, compute):
+    """Para vistas async: valor de versioned_key(name) en cache o `await compute()`."""
+    key = await sync_to_async(versioned_key)(name)
+    data = await cache.aget(key)
+    if data is None:
+        data = await compute()
+        await cache.aset(key, data, ttl)
+    return data
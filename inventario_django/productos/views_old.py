@@ -1,17 +1,18 @@
 # productos/views.py
-from datetime import date, timedelta
-import calendar
-
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView, DetailView
-from django.db.models import Q, Count, Sum
 from django.shortcuts import render
 
+from .asignaciones import empleados_en, historial_equipo, parse_as_of, vigentes_en
+from .catalogs import get_catalog
+from .kpis import get_home_kpis
+from .listing import LISTING_SEARCH_FIELDS
+from .models import EquipoListing
+from .search import get_search_backend
 from .models_inventario import (
-    Equipo, TipoEquipo, EstadoEquipo, Marca, Empleado,
-    Mantencion, EstadoMantencion, AtributosEquipo,
-    Proveedor, Factura, DetalleFactura
+    Equipo, TipoEquipo, EstadoEquipo, Marca,
+    Mantencion, AtributosEquipo, Factura
 )
 
 # ---------------------------
@@ -19,28 +20,19 @@ from .models_inventario import (
 # ---------------------------
 @method_decorator(login_required(login_url='login'), name='dispatch')
 class EquiposListView(ListView):
-    model = Equipo
+    model = EquipoListing
     template_name = 'equipos/list.html'      # coincide con /templates/equipos/list.html
     context_object_name = 'equipos'
     paginate_by = 20
 
     def get_queryset(self):
-        qs = (
-            Equipo.objects
-            .select_related('id_marca', 'id_tipo_equipo', 'id_estado_equipo', 'id_empleado')
-            .order_by('nombre_equipo')
-        )
+        # modelo de lectura (ver listing.py): nombres de marca, tipo, estado y
+        # empleado en la misma fila; filtrar y ordenar no necesita joins
+        qs = EquipoListing.objects.order_by('nombre_equipo')
 
         q = self.request.GET.get('q')
         if q:
-            qs = qs.filter(
-                Q(nombre_equipo__icontains=q) |
-                Q(id_marca__nombre_marca__icontains=q) |
-                Q(id_tipo_equipo__tipo_equipo__icontains=q) |
-                Q(id_empleado__nombre__icontains=q) |
-                Q(id_empleado__apellido_paterno__icontains=q) |
-                Q(id_empleado__apellido_materno__icontains=q)
-            )
+            qs = get_search_backend().filter(qs, q, LISTING_SEARCH_FIELDS)
 
         tipo = self.request.GET.get('tipo')
         if tipo:
@@ -54,18 +46,36 @@ class EquiposListView(ListView):
         if marca:
             qs = qs.filter(id_marca_id=marca)
 
+        # ?as_of=: empleado a esa fecha según el historial de asignaciones
+        self.as_of = parse_as_of(self.request.GET.get('as_of', ''))
+        empleado = self.request.GET.get('empleado')
+        if empleado and self.as_of:
+            qs = qs.filter(pk__in=vigentes_en(self.as_of).filter(id_empleado=empleado).values('id_equipo'))
+        elif empleado:
+            qs = qs.filter(id_empleado_id=empleado)
+
         return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['tipos'] = TipoEquipo.objects.all().order_by('tipo_equipo')
-        ctx['estados'] = EstadoEquipo.objects.all().order_by('descripcion')
-        ctx['marcas'] = Marca.objects.all().order_by('nombre_marca')
+        # dropdowns de filtros: catálogos en memoria, sin consultas
+        ctx['tipos'] = get_catalog(TipoEquipo)
+        ctx['estados'] = get_catalog(EstadoEquipo)
+        ctx['marcas'] = get_catalog(Marca)
         # mantener selección del usuario
         ctx['q'] = self.request.GET.get('q', '')
         ctx['tipo_sel'] = self.request.GET.get('tipo', '')
         ctx['estado_sel'] = self.request.GET.get('estado', '')
         ctx['marca_sel'] = self.request.GET.get('marca', '')
+        ctx['empleado_sel'] = self.request.GET.get('empleado', '')
+        ctx['as_of'] = self.as_of
+        if self.as_of:
+            # la página muestra quién tenía cada equipo en esa fecha (una consulta)
+            equipos = ctx['object_list']
+            en_fecha = empleados_en([e.pk for e in equipos], self.as_of)
+            for e in equipos:
+                emp = en_fecha.get(e.pk)
+                e.id_empleado_id, e.empleado = (emp.pk, str(emp)) if emp else (None, None)
         return ctx
 
 
@@ -74,31 +84,35 @@ class EquiposListView(ListView):
 # ---------------------------
 @method_decorator(login_required(login_url='login'), name='dispatch')
 class EquipoDetailView(DetailView):
-    model = Equipo
+    model = EquipoListing
     pk_url_kwarg = 'equipo_id'
     template_name = 'equipos/detalle.html'   # <-- corregido (antes: 'equipos/detail.html')
     context_object_name = 'equipo'
 
-    def get_queryset(self):
-        return (
-            Equipo.objects
-            .select_related('id_marca', 'id_tipo_equipo', 'id_estado_equipo', 'id_empleado', 'id_proveedor')
-        )
+    @staticmethod
+    def related_querysets(eq):
+        """Listas del detalle (sin evaluar); también las audita query_audit."""
+        return {
+            'mantenciones': (
+                Mantencion.objects
+                .filter(id_equipo=eq.pk)
+                .select_related('id_estado_mantencion')
+                .order_by('-fecha', '-id_mantencion')[:20]
+            ),
+            'asignaciones': historial_equipo(eq.pk)[:20],
+            'atributos': (
+                AtributosEquipo.objects
+                .filter(id_tipo_equipo=eq.id_tipo_equipo_id)
+                .order_by('atributo')
+            ),
+        }
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        eq = self.object
-        ctx['mantenciones'] = (
-            Mantencion.objects
-            .filter(id_equipo=eq)
-            .select_related('id_estado_mantencion')
-            .order_by('-fecha', '-id_mantencion')[:20]
-        )
-        ctx['atributos'] = (
-            AtributosEquipo.objects
-            .filter(id_tipo_equipo=eq.id_tipo_equipo)
-            .order_by('atributo')
-        )
+        ctx.update(self.related_querysets(self.object))
+        # el listado ya sabe si hay mantenciones: sin historial, no se consulta
+        if not self.object.mantenciones:
+            ctx['mantenciones'] = []
         return ctx
 
 
@@ -107,17 +121,8 @@ class EquipoDetailView(DetailView):
 # ---------------------------
 @login_required(login_url='login')
 def home(request):
-    # --- TARJETAS PRINCIPALES ---
-    total_equipos = Equipo.objects.count()
-
-    # Ajusta estos textos según los valores reales de tu tabla estado_equipo
-    disponibles = Equipo.objects.filter(id_estado_equipo__descripcion__iexact="Disponible").count()
-    en_uso = Equipo.objects.filter(id_estado_equipo__descripcion__iexact="En uso").count()
-
-    # Mantenciones (ajusta si tus estados son otros)
-    mant_pendientes = Mantencion.objects.filter(
-        id_estado_mantencion__tipo__iexact="Pendiente"
-    ).count()
+    # --- TARJETAS Y GRÁFICOS (cacheados, ver kpis.py) ---
+    kpis = get_home_kpis()
 
     # --- TABLAS (recientes) ---
     ultimos_equipos = (
@@ -138,167 +143,13 @@ def home(request):
         .order_by('-id_factura')[:10]
     )
 
-    # --- GRÁFICOS ---
-    # 1) Equipos por tipo
-    equipos_por_tipo = (
-        Equipo.objects
-        .values('id_tipo_equipo__tipo_equipo')
-        .annotate(total=Count('id_equipo'))
-        .order_by('id_tipo_equipo__tipo_equipo')
-    )
-    chart_tipos_labels = [e['id_tipo_equipo__tipo_equipo'] or 'Sin tipo' for e in equipos_por_tipo]
-    chart_tipos_values = [e['total'] for e in equipos_por_tipo]
-
-    # 2) Equipos por marca (top 10)
-    equipos_por_marca = (
-        Equipo.objects
-        .values('id_marca__nombre_marca')
-        .annotate(total=Count('id_equipo'))
-        .order_by('-total')[:10]
-    )
-    chart_marcas_labels = [e['id_marca__nombre_marca'] or 'Sin marca' for e in equipos_por_marca]
-    chart_marcas_values = [e['total'] for e in equipos_por_marca]
-
-    # 3) Mantenciones por estado (torta)
-    mant_por_estado = (
-        Mantencion.objects
-        .values('id_estado_mantencion__tipo')
-        .annotate(total=Count('id_mantencion'))
-        .order_by('id_estado_mantencion__tipo')
-    )
-    chart_mant_labels = [m['id_estado_mantencion__tipo'] or 'Sin estado' for m in mant_por_estado]
-    chart_mant_values = [m['total'] for m in mant_por_estado]
-
-    # 4) Gasto mensual (últimos 6 meses)
-    hoy = date.today()
-    seis_meses_atras = (hoy.replace(day=1) - timedelta(days=180)).replace(day=1)
-
-    gastos_por_mes = (
-        DetalleFactura.objects
-        .filter(id_factura__fecha_emision__gte=seis_meses_atras)
-        .values('id_factura__fecha_emision__year', 'id_factura__fecha_emision__month')
-        .annotate(gasto=Sum('valor_total'))
-        .order_by('id_factura__fecha_emision__year', 'id_factura__fecha_emision__month')
-    )
-
-    # Normalizamos los meses faltantes
-    labels_line = []
-    cur = seis_meses_atras
-    while cur <= hoy:
-        labels_line.append((cur.year, cur.month))
-        cur = date(cur.year + 1, 1, 1) if cur.month == 12 else date(cur.year, cur.month + 1, 1)
-
-    dic_gastos = {
-        (g['id_factura__fecha_emision__year'], g['id_factura__fecha_emision__month']): (g['gasto'] or 0)
-        for g in gastos_por_mes
-    }
-    chart_gastos_labels = [f"{calendar.month_abbr[m]}-{y}" for (y, m) in labels_line]
-    chart_gastos_values = [dic_gastos.get((y, m), 0) for (y, m) in labels_line]
-
     context = {
-        # tarjetas
-        "total_equipos": total_equipos,
-        "disponibles": disponibles,
-        "en_uso": en_uso,
-        "mantenciones_pendientes": mant_pendientes,
+        # tarjetas y charts
+        **kpis,
         # tablas
         "ultimos_equipos": ultimos_equipos,
         "ultimas_mantenciones": ultimas_mantenciones,
         "ultimas_facturas": ultimas_facturas,
-        # charts
-        "chart_tipos_labels": chart_tipos_labels,
-        "chart_tipos_values": chart_tipos_values,
-        "chart_marcas_labels": chart_marcas_labels,
-        "chart_marcas_values": chart_marcas_values,
-        "chart_mant_labels": chart_mant_labels,
-        "chart_mant_values": chart_mant_values,
-        "chart_gastos_labels": chart_gastos_labels,
-        "chart_gastos_values": chart_gastos_values,
     }
 
-    # productos/views.py
-from django.db.models import Q
-from django.urls import reverse_lazy
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
-from django.http import HttpResponse
-import csv
-
-from .mixins import ModelPermsMixin
-from .forms import EquipoForm
-from .models import Equipo  # o desde models_inventario
-
-class EquipoList(ModelPermsMixin, ListView):
-    model = Equipo
-    template_name = "equipos/list.html"
-    context_object_name = "items"
-    paginate_by = 25
-    action_perm = "view"
-
-    def get_queryset(self):
-        qs = super().get_queryset()
-        q = self.request.GET.get("q", "").strip()
-        o = self.request.GET.get("o", "")
-        if q:
-            # Ajusta campos a los que te convenga buscar
-            qs = qs.filter(
-                Q(nombre__icontains=q) |
-                Q(serie__icontains=q) |
-                Q(modelo__icontains=q)
-            )
-        if o:
-            qs = qs.order_by(o)
-        return qs
-
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        ctx["q"] = self.request.GET.get("q", "")
-        ctx["o"] = self.request.GET.get("o", "")
-        return ctx
-
-class EquipoCreate(ModelPermsMixin, CreateView):
-    model = Equipo
-    form_class = EquipoForm
-    template_name = "equipos/detalle.html"  # usas tu plantilla existente
-    success_url = reverse_lazy("productos:equipos_list")
-    action_perm = "add"
-
-class EquipoUpdate(ModelPermsMixin, UpdateView):
-    model = Equipo
-    form_class = EquipoForm
-    template_name = "equipos/detalle.html"
-    success_url = reverse_lazy("productos:equipos_list")
-    action_perm = "change"
-
-class EquipoDelete(ModelPermsMixin, DeleteView):
-    model = Equipo
-    template_name = "equipos/confirm_delete.html"
-    success_url = reverse_lazy("productos:equipos_list")
-    action_perm = "delete"
-
-def equipos_csv(request):
-    """Exporta a CSV lo que estás viendo/filtrando en la lista."""
-    from django.contrib.auth.decorators import permission_required
-    # chequeo manual de permiso (mismo que la lista)
-    if not request.user.has_perm(f"{Equipo._meta.app_label}.view_{Equipo._meta.model_name}"):
-        return HttpResponse(status=403)
-
-    q = request.GET.get("q", "").strip()
-    rows = Equipo.objects.all()
-    if q:
-        rows = rows.filter(
-            Q(nombre__icontains=q) |
-            Q(serie__icontains=q) |
-            Q(modelo__icontains=q)
-        )
-
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = 'attachment; filename="equipos.csv"'
-    w = csv.writer(resp)
-    w.writerow(["ID", "Nombre", "Serie", "Modelo", "Estado", "Ubicación"])
-    for r in rows:
-        w.writerow([r.id, getattr(r, "nombre", ""), getattr(r, "serie", ""),
-                    getattr(r, "modelo", ""), getattr(r, "estado", ""),
-                    getattr(r, "ubicacion", "")])
-    return resp
-
     return render(request, "home.html", context)